@@ -6,4 +6,36 @@ target:
 	python -m tests.test_dbc
 	@ echo "\n"
 	python -m tests.test_datacube
+	@ echo "\n"
+	python -m tests.test_async_database_connection
+	@ echo "\n"
+	python -m tests.test_response_cache
+	@ echo "\n"
+	python -m tests.test_catalog_snapshot
+	@ echo "\n"
+	python -m tests.test_coverage_index
+	@ echo "\n"
+	python -m tests.test_coverage_catalog
+	@ echo "\n"
+	python -m tests.test_bounds_validator
+	@ echo "\n"
+	python -m tests.test_geometry
+	@ echo "\n"
+	python -m tests.test_query_plan
+	@ echo "\n"
+	python -m tests.test_query_optimizer
+	@ echo "\n"
+	python -m tests.test_query_template
+	@ echo "\n"
+	python -m tests.test_point_sampling
+	@ echo "\n"
+	python -m tests.test_time_chunking
+	@ echo "\n"
+	python -m tests.test_coverage_grid
+	@ echo "\n"
+	python -m tests.test_tiling
+	@ echo "\n"
+	python -m tests.test_cost_estimate
+	@ echo "\n"
+	python -m tests.test_csv_decoder
 	@ echo "<Finished>"
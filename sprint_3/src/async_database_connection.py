@@ -0,0 +1,121 @@
+import asyncio
+import aiohttp
+from .database_connection import DatabaseConnectionObject
+from .response_cache import ResponseCache
+
+class AsyncDatabaseConnectionObject(DatabaseConnectionObject):
+    def __init__(self, server_url: str, coverage_url: str = None,
+                 max_concurrency: int = 20, **settings) -> None:
+        """
+        Initializes an AsyncDatabaseConnectionObject object.
+        It behaves like a DatabaseConnectionObject (the coverage preprocessing
+        and the blocking methods stay available), and adds awaitable queries
+        which share one aiohttp session, so many queries can run concurrently
+        on a single event loop.
+
+        :param server_url: a string with the server's base url.
+        :param coverage_url: a string with the url for getting the coverage to be preprocessed.
+        :param max_concurrency: maximum number of queries in flight at the same time.
+        :param settings: pool_connections, pool_maxsize, keep_alive, pool_block, cache and snapshot,
+            as for DatabaseConnectionObject. pool_maxsize also bounds the number of
+            asynchronous connections opened per host.
+
+        :raise: a ValueError if max_concurrency is not a positive integer,
+                any ValueError raised by DatabaseConnectionObject's initialization.
+        """
+        if isinstance(max_concurrency, bool) or not isinstance(max_concurrency, int)\
+           or max_concurrency < 1:
+            raise ValueError("max_concurrency gotta be a positive integer.")
+        super().__init__(server_url, coverage_url, **settings)
+        self.max_concurrency = max_concurrency
+        self.async_session = None
+        self.__semaphore = None
+        self.__loop = None
+
+    async def __prepare_async_session(self) -> None:
+        """
+        Creates the aiohttp session and the concurrency bound the first time
+        they're needed on the running event loop (or whenever the loop changed),
+        the session of the previous loop being closed first.
+        """
+        loop = asyncio.get_running_loop()
+        if self.async_session is None or self.__loop is not loop or self.async_session.closed:
+            if self.async_session is not None and not self.async_session.closed:
+                try:
+                    await self.async_session.close()
+                except RuntimeError:
+                    # the connections of an event loop that's already closed are gone with it
+                    pass
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             limit_per_host=self.pool_maxsize,
+                                             force_close=not self.keep_alive)
+            self.async_session = aiohttp.ClientSession(connector=connector)
+            self.__semaphore = asyncio.Semaphore(self.max_concurrency)
+            self.__loop = loop
+
+    async def execute_query_async(self, query: str, print_status_updates: bool = False,
+                                  canonical: str = None) -> bytes:
+        """
+        Awaitable counterpart of execute_query: sends a POST request to the
+        server_url with the data parameter set to {'query': query}.
+
+        :param query: query to be sent to the server.
+        :param print_status_updates: Prints on the standard output log messages if it's set to True.
+        :param canonical: the query's normalized form, if already known (see execute_query).
+        :returns the content of the response.
+
+        :raise: Exception error Will raise an exception is anything goes wrong.
+        """
+        self._check_open()
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.canonical_key(canonical, self.server_url) if canonical is not None else None
+            cached = self.cache.get(query, self.server_url, key)
+            if cached is not None:
+                return cached
+        await self.__prepare_async_session()
+        try:
+            async with self.__semaphore:
+                async with self.async_session.post(self.server_url, data={'query': query}) as response:
+                    content = await response.read()
+                    if response.status == 200:
+                        if print_status_updates:
+                            print("Request Made Successfully.")
+                        if self.cache is not None:
+                            self.cache.put(query, self.server_url, content, key=key)
+                        return content
+                    if print_status_updates:
+                        print(f"Query execution failure. Status code: {response.status}.")
+                    raise self._bad_response_error(response.status,
+                                                   content.decode(errors="replace"))
+        except aiohttp.ClientError as e:
+            if print_status_updates:
+                print(f"Error establishing connection: {e}")
+            raise Exception(e)
+
+    async def execute_queries_async(self, queries: list, return_exceptions: bool = False) -> list:
+        """
+        Runs many queries concurrently, never more than max_concurrency at once.
+
+        :param queries: list of queries to be sent to the server.
+        :param return_exceptions: if set to True, a failing query puts its exception
+            in the results instead of aborting the whole call.
+        :return: list of the responses' contents, in the same order as queries.
+        """
+        return await asyncio.gather(*(self.execute_query_async(query) for query in queries),
+                                    return_exceptions=return_exceptions)
+
+    async def aclose(self) -> None:
+        """
+        Closes both the asynchronous and the pooled blocking connections.
+        """
+        if self.async_session is not None:
+            await self.async_session.close()
+            self.async_session = None
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
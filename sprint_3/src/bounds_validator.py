@@ -0,0 +1,298 @@
+import numpy as np
+from datetime import datetime
+from functools import lru_cache
+
+@lru_cache(maxsize=4096)
+def parse_date(date: str):
+    """
+    Converts a YYYY-MM (first day of the month) or YYYY-MM-DD string to a date object.
+    The results are memoized, as the same dates get checked over and over
+    (e.g. a timerange per query of a time series sweep).
+    The format is checked as strictly as dates_array does, as strptime also
+    accepts single digit months and days, such as "2012-1-5".
+
+    :raises ValueError if the date is not in one of those formats.
+    """
+    try:
+        _check_date_strings(np.array([date]))
+        if len(date) > len("yyyy-mm"):
+            return datetime.strptime(date, "%Y-%m-%d").date()
+        return datetime.strptime(date + "-01", "%Y-%m-%d").date()
+    except Exception as e:
+        raise ValueError(e)
+
+# the YYYY-MM-DD characters' positions, the day's ones being left blank in YYYY-MM strings
+_DIGITS = np.array([0, 1, 2, 3, 5, 6, 8, 9])
+_DASHES = np.array([4, 7])
+_DIGIT_CODES = (ord("0"), ord("9"))
+
+def _check_date_strings(strings: np.ndarray) -> None:
+    """
+    Checks that every string is a YYYY-MM or YYYY-MM-DD date, all of them at once
+    through their characters' codes, as numpy's datetime64 parsing also accepts
+    other formats, such as "2012" or "2012-07-15T10:00".
+
+    :raises ValueError if a string is in none of those formats.
+    """
+    strings = strings.ravel()
+    width = max(strings.dtype.itemsize // 4, 10)
+    codes = strings.astype(f"U{width}").view(np.uint32).reshape(len(strings), width)
+    monthly = codes[:, 7] == 0
+    digits = codes[:, _DIGITS]
+    valid = (((digits >= _DIGIT_CODES[0]) & (digits <= _DIGIT_CODES[1])) | (monthly[:, None] & (_DIGITS > 7))).all(axis=1)
+    valid &= (codes[:, _DASHES] == ord("-")).all(axis=1) | (monthly & (codes[:, 4] == ord("-")))
+    valid &= (codes[:, 8:] == 0).all(axis=1) | ~monthly
+    valid &= (codes[:, 10:] == 0).all(axis=1)
+    if not valid.all():
+        raise ValueError(f"{strings[~valid][0]} is not a YYYY-MM or YYYY-MM-DD date.")
+
+def dates_array(dates) -> np.ndarray:
+    """
+    Converts dates to a datetime64[D] array in one call.
+
+    :param dates: array-like of YYYY-MM (first day of the month) / YYYY-MM-DD strings,
+        of date objects, or a datetime64 array.
+
+    :raises TypeError if dates holds anything else (for instance numbers).
+    :raises ValueError if a date is not in one of those formats.
+    """
+    array = np.asarray(dates)
+    if array.dtype.kind not in "MUO":
+        raise TypeError("invalid dates type, expected type: array of str or datetime64.")
+    if array.dtype.kind == "U":
+        _check_date_strings(array)
+    elif array.dtype.kind == "O":
+        strings = np.frompyfunc(lambda value: isinstance(value, str), 1, 1)(array).astype(bool)
+        _check_date_strings(array[strings].astype(str))
+    try:
+        return array.astype("datetime64[D]")
+    except (ValueError, TypeError) as e:
+        raise ValueError(e)
+
+class BoundsValidator:
+    """
+    The bounds of one coverage, taken once from its parsed bounds, so that
+    a value or a whole interval is checked with two comparisons instead of
+    looking the bounds up (and parsing them) again for every value.
+    As for the rest of the package, 'lat' and 'lon' are the coverage's
+    'coord_1' and 'coord_2' axes.
+
+    :param coverage: the coverage's type_request object.
+    """
+    lat: tuple
+    lon: tuple
+    dates: tuple
+
+    def __init__(self, coverage) -> None:
+        """Initializes the object"""
+        bounds = coverage.parsed_bounds_dict
+        self.lat = bounds.get('coord_1')
+        self.lon = bounds.get('coord_2')
+        self.dates = bounds.get('date')
+        if self.dates is not None:
+            self.__dates64 = tuple(np.datetime64(bound, 'D') for bound in self.dates)
+
+    def check_lat(self, start, end=None) -> None:
+        """
+        Checks that a latitude, or the whole [start, end] interval, is within the coverage's bounds.
+
+        :param start (int, float): the latitude, or the interval's first end.
+        :param end (int, float): the interval's other end, if any.
+
+        :raises Exception if the coverage has no latitude bounds.
+        :raises TypeError if the latitudes are not int or float.
+        :raises ValueError if the latitudes are outside the valid range.
+        """
+        lower, upper = self.__bounds(self.lat)
+        if not isinstance(start, (int, float)) or not isinstance(end, (int, float, type(None))):
+            raise TypeError("invalid lat type, expected type: int or float.")
+        end = start if end is None else end
+        if not (lower <= start <= upper and lower <= end <= upper):
+            raise ValueError("The latitude is not in the valid range")
+
+    def check_lon(self, start, end=None) -> None:
+        """
+        Checks that a longitude, or the whole [start, end] interval, is within the coverage's bounds.
+
+        :param start (int, float): the longitude, or the interval's first end.
+        :param end (int, float): the interval's other end, if any.
+
+        :raises Exception if the coverage has no longitude bounds.
+        :raises TypeError if the longitudes are not int or float.
+        :raises ValueError if the longitudes are outside the valid range.
+        """
+        lower, upper = self.__bounds(self.lon)
+        if not isinstance(start, (int, float)) or not isinstance(end, (int, float, type(None))):
+            raise TypeError("invalid lon type, expected type: int or float.")
+        end = start if end is None else end
+        if not (lower <= start <= upper and lower <= end <= upper):
+            raise ValueError("The longitude is not in the valid range")
+
+    def clamp_lat(self, start, end=None):
+        """
+        Intersects a latitude, or the [start, end] interval, with the coverage's bounds.
+
+        :param start (int, float): the latitude, or the interval's first end.
+        :param end (int, float): the interval's other end, if any.
+        :return: the (lower, upper) intersection, None if it's empty.
+
+        :raises Exception if the coverage has no latitude bounds.
+        :raises TypeError if the latitudes are not int or float.
+        """
+        if not isinstance(start, (int, float)) or not isinstance(end, (int, float, type(None))):
+            raise TypeError("invalid lat type, expected type: int or float.")
+        return self.__clamp(self.__bounds(self.lat), start, start if end is None else end)
+
+    def clamp_lon(self, start, end=None):
+        """
+        Intersects a longitude, or the [start, end] interval, with the coverage's bounds.
+
+        :param start (int, float): the longitude, or the interval's first end.
+        :param end (int, float): the interval's other end, if any.
+        :return: the (lower, upper) intersection, None if it's empty.
+
+        :raises Exception if the coverage has no longitude bounds.
+        :raises TypeError if the longitudes are not int or float.
+        """
+        if not isinstance(start, (int, float)) or not isinstance(end, (int, float, type(None))):
+            raise TypeError("invalid lon type, expected type: int or float.")
+        return self.__clamp(self.__bounds(self.lon), start, start if end is None else end)
+
+    def clamp_years(self, start_date: str, end_date: str = None):
+        """
+        Intersects the [start_date, end_date] period with the coverage's bounds.
+
+        :param start_date (str): starting date, as YYYY-MM or YYYY-MM-DD.
+        :param end_date (str): ending date, as YYYY-MM or YYYY-MM-DD, defaults to start_date.
+        :return: the (start, end) intersection as date objects, None if it's empty.
+
+        :raises Exception if the coverage has no date bounds.
+        :raises TypeError if start_date and end_date have invalid types.
+        :raises ValueError if the dates are not in correct format or out of order.
+        """
+        bounds = self.__bounds(self.dates)
+        if not end_date:
+            end_date = start_date
+        if not isinstance(start_date, str):
+            raise TypeError("invalid start_date type, expected type: str.")
+        if not isinstance(end_date, str):
+            raise TypeError("invalid end_date type, expected type: str.")
+        start_date = parse_date(start_date)
+        end_date = parse_date(end_date)
+        if start_date > end_date:
+            raise ValueError("Start date cannot be greater than end date.")
+        return self.__clamp(bounds, start_date, end_date)
+
+    def check_points(self, points: np.ndarray) -> None:
+        """
+        Checks many (lat, lon) points at once, e.g. a polygon's vertices:
+        the extreme latitudes and longitudes are compared to the bounds.
+
+        :param points: (n, 2) float array of latitudes and longitudes.
+
+        :raises Exception if the coverage has no latitude or longitude bounds.
+        :raises ValueError if any point is outside the valid range.
+        """
+        lat_lower, lat_upper = self.__bounds(self.lat)
+        lon_lower, lon_upper = self.__bounds(self.lon)
+        if len(points) == 0:
+            return
+        low, high = points.min(axis=0), points.max(axis=0)
+        # NaNs make both comparisons fail, like any out of range value
+        if not (lat_lower <= low[0] and high[0] <= lat_upper):
+            raise ValueError("The latitude is not in the valid range")
+        if not (lon_lower <= low[1] and high[1] <= lon_upper):
+            raise ValueError("The longitude is not in the valid range")
+
+    def points_mask(self, points: np.ndarray) -> np.ndarray:
+        """
+        Vectorized counterpart of check_points for single points.
+
+        :param points: (n, 2) float array of latitudes and longitudes.
+        :return: boolean array, True for the points within the coverage's bounds.
+
+        :raises Exception if the coverage has no latitude or longitude bounds.
+        """
+        lat_lower, lat_upper = self.__bounds(self.lat)
+        lon_lower, lon_upper = self.__bounds(self.lon)
+        return ((lat_lower <= points[:, 0]) & (points[:, 0] <= lat_upper) &
+                (lon_lower <= points[:, 1]) & (points[:, 1] <= lon_upper))
+
+    def check_years(self, start_date: str, end_date: str = None) -> None:
+        """
+        Checks that the dates are valid, ordered and within the coverage's bounds.
+
+        :param start_date (str): starting date, as YYYY-MM or YYYY-MM-DD.
+        :param end_date (str): ending date, as YYYY-MM or YYYY-MM-DD, defaults to start_date.
+
+        :raises Exception if the coverage has no date bounds.
+        :raises TypeError if start_date and end_date have invalid types.
+        :raises ValueError if the dates are not in correct format, out of order or out of range.
+        """
+        start_bound, end_bound = self.__bounds(self.dates)
+        if not end_date:
+            end_date = start_date
+
+        # checking parameters' data types
+        if not isinstance(start_date, str):
+            raise TypeError("invalid start_date type, expected type: str.")
+        if not isinstance(end_date, str):
+            raise TypeError("invalid end_date type, expected type: str.")
+
+        start_date = parse_date(start_date)
+        end_date = parse_date(end_date)
+
+        # raise invalid date combinations erros, if any
+        if not start_bound <= start_date <= end_bound:
+            raise ValueError(f"The start date is not withing the allowed range: [{start_bound} : {end_bound}].")
+        if not start_bound <= end_date <= end_bound:
+            raise ValueError(f"The  end  date is not withing the allowed range: [{start_bound} : {end_bound}].")
+        if start_date > end_date:
+            raise ValueError("Start date cannot be greater than end date.")
+
+    def years_mask(self, dates) -> np.ndarray:
+        """
+        Vectorized counterpart of check_years for single dates.
+
+        :param dates: array-like of YYYY-MM / YYYY-MM-DD strings or datetime64 values.
+        :return: boolean array, True for the dates within the coverage's bounds.
+
+        :raises Exception if the coverage has no date bounds.
+        :raises TypeError / ValueError if the dates are of invalid types / formats.
+        """
+        self.__bounds(self.dates)
+        array = dates_array(dates)
+        return (array >= self.__dates64[0]) & (array <= self.__dates64[1])
+
+    def check_years_array(self, dates) -> None:
+        """
+        Checks many dates against the coverage's bounds in one call.
+
+        :param dates: array-like of YYYY-MM / YYYY-MM-DD strings or datetime64 values.
+
+        :raises Exception if the coverage has no date bounds.
+        :raises TypeError / ValueError if the dates are of invalid types / formats.
+        :raises ValueError if any date is outside the allowed range.
+        """
+        mask = self.years_mask(dates)
+        if not mask.all():
+            outside = np.asarray(dates).ravel()[~mask.ravel()]
+            raise ValueError(f"{len(outside)} date(s), starting with {outside[0]}, not withing the allowed range: "
+                             f"[{self.dates[0]} : {self.dates[1]}].")
+
+    @staticmethod
+    def __clamp(bounds: tuple, start, end):
+        """Returns the intersection of the interval between start and end with bounds, None if it's empty."""
+        low, high = min(start, end), max(start, end)
+        if high < bounds[0] or low > bounds[1]:
+            return None
+        return max(low, bounds[0]), min(high, bounds[1])
+
+    @staticmethod
+    def __bounds(bounds: tuple) -> tuple:
+        """
+        :raises Exception if the bounds are unavailable.
+        """
+        if bounds is None:
+            raise Exception("Unable to check")
+        return bounds
@@ -0,0 +1,142 @@
+import os
+import pickle
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+import requests
+from .get_coverage import iterCapabilities, processedDataFromRows, ResponseStream
+
+# bumped whenever the pickled type_request layout changes,
+# so snapshots written by older versions are ignored
+SNAPSHOT_VERSION = 4
+
+class CatalogSnapshot:
+    """
+    A local snapshot of the preprocessed coverages of a server, so that a
+    DatabaseConnectionObject can start from a file read instead of downloading
+    and parsing the whole GetCapabilities document. A snapshot younger than
+    its time to live is used as is; an older one is revalidated with a
+    conditional request (ETag / Last-Modified), and only re-downloaded if
+    the server's capabilities changed.
+
+    The snapshot is a pickle file: only point it to files written by this class.
+
+    :param path: the snapshot file's path.
+    :param ttl: seconds during which a snapshot is used without asking the server.
+
+    :raise: ValueError if any of the parameter's type are wrongfully given.
+    """
+    path: str
+    ttl: float
+
+    def __init__(self, path: str, ttl: float = 24 * 60 * 60) -> None:
+        """Initializes the object"""
+        if not isinstance(path, str) or path == "":
+            raise ValueError("path gotta be a non empty string.")
+        if isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl < 0:
+            raise ValueError("ttl gotta be a non negative number.")
+        self.path = path
+        self.ttl = ttl
+
+    def load(self, coverage_url: str):
+        """
+        Reads the snapshot taken for coverage_url.
+
+        :param coverage_url: the url the coverages were requested from.
+        :return: the snapshot's content as a dictionary with the keys 'version',
+            'coverage_url', 'fetched_at', 'etag', 'last_modified' and 'coverages',
+            or None if there is no usable snapshot.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                payload = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(payload, dict)\
+           or payload.get("version") != SNAPSHOT_VERSION\
+           or payload.get("coverage_url") != coverage_url:
+            return None
+        return payload
+
+    def save(self, coverage_url: str, coverages: dict, etag: str = None, last_modified: str = None) -> None:
+        """
+        Atomically writes a new snapshot.
+
+        :param coverage_url: the url the coverages were requested from.
+        :param coverages: the preprocessed coverages' dictionary.
+        :param etag: the server's ETag header for the capabilities, if any.
+        :param last_modified: the server's Last-Modified header for the capabilities, if any.
+        """
+        payload = {"version": SNAPSHOT_VERSION,
+                   "coverage_url": coverage_url,
+                   "fetched_at": time.time(),
+                   "etag": etag,
+                   "last_modified": last_modified,
+                   "coverages": coverages}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        descriptor, temp_path = tempfile.mkstemp(prefix=".snapshot_", dir=directory)
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def is_fresh(self, payload: dict) -> bool:
+        """Checks whether a loaded snapshot is still within its time to live."""
+        return time.time() - payload["fetched_at"] < self.ttl
+
+    def coverages(self, coverage_url: str, session: requests.Session = None):
+        """
+        Returns the preprocessed coverages of coverage_url, from the snapshot if
+        it's fresh or still valid according to the server, from the server
+        otherwise (in which case the snapshot is updated).
+
+        :param coverage_url: the url to request the coverages from.
+        :param session: optional requests.Session to send the request through.
+        :return: dictionary with the coverage IDs as keys and the type_request
+            objects as values, or None if the coverages couldn't be processed.
+        """
+        payload = self.load(coverage_url)
+        if payload is not None and self.is_fresh(payload):
+            return payload["coverages"]
+
+        headers = {}
+        if payload is not None:
+            if payload["etag"]:
+                headers["If-None-Match"] = payload["etag"]
+            if payload["last_modified"]:
+                headers["If-Modified-Since"] = payload["last_modified"]
+        try:
+            http = session if session is not None else requests
+            with http.get(coverage_url, headers=headers, stream=True) as response:
+                if response.status_code == 304 and payload is not None:
+                    self.__try_save(coverage_url, payload["coverages"],
+                                    response.headers.get("ETag", payload["etag"]),
+                                    response.headers.get("Last-Modified", payload["last_modified"]))
+                    return payload["coverages"]
+                if response.status_code != 200:
+                    return None
+                # read through iter_content, so that a connection lost midway raises a RequestException
+                lst, ignored = processedDataFromRows(iterCapabilities(ResponseStream(response)))
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
+        except (requests.exceptions.RequestException, ET.ParseError):
+            return None
+
+        if ignored != 0 or lst == []:
+            return None
+        dictionary = dict()
+        for coverage in lst:
+            dictionary[coverage.id] = coverage
+        self.__try_save(coverage_url, dictionary, etag, last_modified)
+        return dictionary
+
+    def __try_save(self, *args) -> None:
+        """Saves a snapshot, without failing the caller if the file can't be written."""
+        try:
+            self.save(*args)
+        except OSError:
+            pass
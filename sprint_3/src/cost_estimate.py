@@ -0,0 +1,106 @@
+from .query_optimizer import parse_subset
+
+# rough size of one cell of the response in each encoding, the text encodings writing a value and its separator
+BYTES_PER_CELL = {"csv": 10, "json": 10, "netcdf": 4, "gtiff": 4, "image/tiff": 4,
+                  "png": 3, "image/png": 3, "jpeg": 3, "image/jpeg": 3}
+
+# the actions a Guardrail takes on the queries above its limits
+GUARDRAIL_ACTIONS = ("refuse", "tile")
+
+def count_cells(grid, operations) -> dict:
+    """
+    Estimates the number of grid cells a query's axis operations select along every
+    axis of the coverage, the axes without operation being taken whole.
+
+    :param grid: the coverage's CoverageGrid.
+    :param operations: the plan's axis operations, e.g. ('Lat(0:10)', 'ansi("2012-01")').
+    :return: dictionary of the number of cells by axis, in the grid's order.
+    """
+    cells = dict(zip(grid.axis_labels, grid.cells))
+    for operation in operations:
+        parsed = parse_subset(operation)
+        if parsed is not None and parsed[0] in cells:
+            cells[parsed[0]] = min(cells[parsed[0]], grid.cells_within(parsed[0], parsed[1][0], parsed[2][0]))
+    return cells
+
+class QueryEstimate:
+    """
+    What a query is expected to cost, before it's sent: the grid cells it
+    scans, the cells and bytes of its response, and its number of round trips.
+    The counts come from the coverage's grid and are None if it's unknown.
+
+    :param axes: dictionary of the number of cells scanned along every axis, None if unknown.
+    :param output_cells: the number of cells of the response, None if unknown.
+    :param encoding: the response's encoding.
+    :param round_trips: the number of requests the query is sent as.
+    """
+    __slots__ = ("axes", "cells", "output_cells", "encoding", "bytes", "round_trips")
+
+    def __init__(self, axes: dict, output_cells: int, encoding: str, round_trips: int = 1) -> None:
+        """Initializes the object"""
+        self.axes = axes
+        self.cells = None
+        if axes is not None:
+            self.cells = 1
+            for count in axes.values():
+                self.cells *= count
+        self.output_cells = output_cells
+        self.encoding = encoding
+        # the response's size in every encoding, the query's own one included
+        self.bytes = None if output_cells is None else {
+            name: output_cells * size for name, size in {**BYTES_PER_CELL, encoding: BYTES_PER_CELL.get(encoding, 4)}.items()}
+        self.round_trips = round_trips
+
+    @property
+    def output_bytes(self) -> int:
+        """The response's size in the query's encoding, None if unknown."""
+        return None if self.bytes is None else self.bytes[self.encoding]
+
+    def __repr__(self) -> str:
+        return (f"QueryEstimate(cells={self.cells}, output_cells={self.output_cells}, encoding={self.encoding!r}, "
+                f"output_bytes={self.output_bytes}, round_trips={self.round_trips})")
+
+class Guardrail:
+    """
+    Limits on the queries a DatacubeObject executes, checked against its
+    estimate: above them, execute refuses the query. With the 'tile' action,
+    DatacubeObject.fetch splits the query into tiles whose responses fit in
+    the guardrail's budget (see tile_bytes), and execute's refusal points to it.
+    A query whose cost is unknown passes.
+
+    :param max_cells: the maximum number of grid cells a query scans.
+    :param max_bytes: the maximum size of a query's response.
+    :param action: 'refuse' or 'tile'.
+
+    :raise: ValueError if the limits are not positive integers, if neither is given,
+        or for another action.
+    """
+    __slots__ = ("max_cells", "max_bytes", "action")
+
+    def __init__(self, max_cells: int = None, max_bytes: int = None, action: str = "refuse") -> None:
+        """Initializes the object"""
+        if max_cells is None and max_bytes is None:
+            raise ValueError("max_cells or max_bytes gotta be given.")
+        for name, value in (("max_cells", max_cells), ("max_bytes", max_bytes)):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, int) or value <= 0):
+                raise ValueError(f"{name} gotta be a positive integer.")
+        if action not in GUARDRAIL_ACTIONS:
+            raise ValueError(f"action gotta be one of {GUARDRAIL_ACTIONS}.")
+        self.max_cells = max_cells
+        self.max_bytes = max_bytes
+        self.action = action
+
+    def exceeded(self, estimate: QueryEstimate) -> bool:
+        """Checks whether an estimate goes over the limits."""
+        if self.max_cells is not None and estimate.cells is not None and estimate.cells > self.max_cells:
+            return True
+        return self.max_bytes is not None and estimate.output_bytes is not None and estimate.output_bytes > self.max_bytes
+
+    def tile_bytes(self) -> int:
+        """The byte budget of the tiles a query above the limits is split into."""
+        if self.max_bytes is not None:
+            return self.max_bytes
+        return self.max_cells * BYTES_PER_CELL["netcdf"]
+
+    def __repr__(self) -> str:
+        return f"Guardrail(max_cells={self.max_cells}, max_bytes={self.max_bytes}, action={self.action!r})"
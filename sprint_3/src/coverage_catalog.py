@@ -0,0 +1,116 @@
+import numpy as np
+from .type_request import type_request
+
+class CoverageCatalog:
+    """
+    A columnar view of the preprocessed coverages, for analyzing the whole
+    catalog at once: every attribute is a NumPy array with one entry per
+    coverage, so filters run as vectorized masks, for instance
+
+        catalog.select((catalog.time_high > np.datetime64("2020-12-31"))
+                       & (catalog.lat_high - catalog.lat_low > 10))
+
+    Missing bounds are NaN (or NaT for the time bounds), which compare as
+    False, so a coverage lacking an axis never matches a filter on it.
+    As for DatacubeObject.check_lat / check_lon, the lat and lon columns
+    hold the 'coord_1' and 'coord_2' bounds, in the coverage's own CRS.
+
+    :param ids: array of the coverage IDs.
+    :param types: array of the coverage types.
+    :param lat_low: array of the lower 'coord_1' bounds.
+    :param lat_high: array of the upper 'coord_1' bounds.
+    :param lon_low: array of the lower 'coord_2' bounds.
+    :param lon_high: array of the upper 'coord_2' bounds.
+    :param time_low: array of the lower 'date' bounds, as datetime64[D].
+    :param time_high: array of the upper 'date' bounds, as datetime64[D].
+    """
+    ids: np.ndarray
+    types: np.ndarray
+    lat_low: np.ndarray
+    lat_high: np.ndarray
+    lon_low: np.ndarray
+    lon_high: np.ndarray
+    time_low: np.ndarray
+    time_high: np.ndarray
+
+    def __init__(self, ids, types, lat_low, lat_high, lon_low, lon_high, time_low, time_high) -> None:
+        """Initializes the object"""
+        self.ids = np.asarray(ids, dtype=object)
+        self.types = np.asarray(types, dtype=object)
+        self.lat_low = np.asarray(lat_low, dtype=float)
+        self.lat_high = np.asarray(lat_high, dtype=float)
+        self.lon_low = np.asarray(lon_low, dtype=float)
+        self.lon_high = np.asarray(lon_high, dtype=float)
+        self.time_low = np.asarray(time_low, dtype="datetime64[D]")
+        self.time_high = np.asarray(time_high, dtype="datetime64[D]")
+
+    @classmethod
+    def from_coverages(cls, coverages):
+        """
+        Builds a catalog out of type_request objects.
+
+        :param coverages: dictionary with type_request objects as values
+            (a pre_processed_coverage_dict) or iterable of type_request objects.
+        :return: the CoverageCatalog.
+
+        :raise: ValueError if coverages holds anything but type_request objects.
+        """
+        builder = CoverageCatalogBuilder()
+        for coverage in (coverages.values() if isinstance(coverages, dict) else coverages):
+            builder.add(coverage)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def select(self, mask) -> list:
+        """
+        Returns the IDs of the coverages selected by a boolean mask.
+
+        :param mask: boolean array with one entry per coverage.
+        :return: list of the selected coverage IDs.
+
+        :raise: ValueError if mask doesn't have one boolean per coverage.
+        """
+        mask = np.asarray(mask)
+        if mask.dtype != bool or mask.shape != self.ids.shape:
+            raise ValueError("mask gotta be a boolean array with one entry per coverage.")
+        return self.ids[mask].tolist()
+
+class CoverageCatalogBuilder:
+    """
+    Collects the columns of a CoverageCatalog one coverage at a time, so the
+    catalog can be filled while the coverages are still being processed
+    (see processedDataIntoList's catalog parameter).
+    As for a pre_processed_coverage_dict, a coverage added again under an
+    id already there replaces the earlier one, keeping its position.
+    """
+    def __init__(self) -> None:
+        """Initializes the object"""
+        self.__columns = tuple([] for _ in range(8))
+        self.__rows = dict()
+
+    def add(self, coverage) -> None:
+        """
+        Appends a coverage's id, type and parsed bounds to the columns.
+
+        :param coverage: the type_request object.
+
+        :raise: ValueError if coverage isn't a type_request object.
+        """
+        if not isinstance(coverage, type_request):
+            raise ValueError("coverage gotta be a type_request.")
+        bounds = coverage.parsed_bounds_dict
+        lat = bounds.get("coord_1", (np.nan, np.nan))
+        lon = bounds.get("coord_2", (np.nan, np.nan))
+        time = bounds.get("date", ("NaT", "NaT"))
+        row = self.__rows.setdefault(coverage.id, len(self.__rows))
+        for column, value in zip(self.__columns, (coverage.id, coverage.coverageType, *lat, *lon, *time)):
+            if row < len(column):
+                column[row] = value
+            else:
+                column.append(value)
+
+    def build(self) -> CoverageCatalog:
+        """Returns the CoverageCatalog of every coverage added so far."""
+        return CoverageCatalog(*self.__columns)
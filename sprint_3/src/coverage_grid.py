@@ -0,0 +1,170 @@
+import math
+import xml.etree.ElementTree as ET
+from bisect import bisect_left, bisect_right
+from datetime import date
+from .bounds_validator import parse_date
+
+def _local_name(tag: str) -> str:
+    """Strips the namespace of an element's tag."""
+    return tag.rsplit("}", 1)[-1]
+
+def _parse_corner(value: str):
+    """Parses a coordinate of an envelope's corner: a number, or a (quoted) date."""
+    value = value.strip('"')
+    try:
+        return float(value)
+    except ValueError:
+        return parse_date(value[:len("yyyy-mm-dd")])
+
+class CoverageGrid:
+    """
+    The grid of one coverage, as given by a DescribeCoverage response: the
+    number of grid points along each axis and the axes' extents, from which
+    the resolution of the axes, and the number of grid points a subset
+    covers, are derived. Numeric axes are taken as regular grids whose
+    extent spans all of their cells; the date axes as series of points,
+    the extent going from the first to the last one. The dates of an
+    irregular axis' points (e.g. the months of a monthly axis) are kept
+    when the description lists them, so its points are counted exactly.
+
+    :param axis_labels: the axes' labels, in the grid's order.
+    :param cells: the number of grid points along each axis.
+    :param lower: the lower end of each axis' extent, a float or a date.
+    :param upper: the upper end of each axis' extent, a float or a date.
+    :param points: optional dictionary of the date axes' points, by axis label.
+
+    :raise: ValueError if the parameters don't all have the same length,
+        or if points doesn't list every grid point of an axis.
+    """
+    __slots__ = ("axis_labels", "cells", "lower", "upper", "points")
+
+    def __init__(self, axis_labels, cells, lower, upper, points: dict = None) -> None:
+        """Initializes the object"""
+        self.axis_labels = tuple(axis_labels)
+        self.cells = tuple(int(count) for count in cells)
+        self.lower = tuple(lower)
+        self.upper = tuple(upper)
+        if not len(self.axis_labels) == len(self.cells) == len(self.lower) == len(self.upper):
+            raise ValueError("axis_labels, cells, lower and upper gotta have the same length.")
+        self.points = {label: tuple(sorted(values)) for label, values in (points or {}).items()}
+        for label, values in self.points.items():
+            if label not in self.axis_labels or len(values) != self.cells[self.axis_labels.index(label)]:
+                raise ValueError("points gotta list every grid point of one of the axes.")
+
+    @classmethod
+    def from_describe(cls, document: bytes):
+        """
+        Parses a DescribeCoverage response. The extent is read from the coverage's
+        envelope, the numbers of grid points from its grid envelope, whose axes are
+        in the order of the grid's axisLabels (the envelope's order if there are none),
+        and the dates of the irregular axes' points from their coefficients, if any.
+
+        :param document: the xml document.
+        :return: the coverage's CoverageGrid.
+
+        :raise: ValueError if the document has no envelope or grid envelope,
+            or if they don't describe the same axes.
+        :raise: xml.etree.ElementTree.ParseError if the document is malformed.
+        """
+        envelope = grid_envelope = grid_labels = None
+        coefficients = {}
+        for element in ET.fromstring(document).iter():
+            name = _local_name(element.tag)
+            if envelope is None and name in ("Envelope", "EnvelopeWithTimePeriod"):
+                envelope = element
+            elif grid_envelope is None and name == "GridEnvelope":
+                grid_envelope = element
+            elif grid_labels is None and name == "axisLabels":
+                grid_labels = element.text.split()
+            elif name == "GeneralGridAxis":
+                fields = {_local_name(child.tag): (child.text or "").split() for child in element}
+                if len(fields.get("gridAxesSpanned", ())) == 1:
+                    coefficients[fields["gridAxesSpanned"][0]] = fields.get("coefficients", [])
+        if envelope is None or grid_envelope is None:
+            raise ValueError("The DescribeCoverage response has no envelope or grid envelope.")
+
+        corners = {_local_name(child.tag): child.text.split() for child in envelope}
+        grid = {_local_name(child.tag): [int(value) for value in child.text.split()] for child in grid_envelope}
+        labels = envelope.get("axisLabels", "").split()
+        grid_labels = grid_labels or labels
+        if sorted(labels) != sorted(grid_labels) or not (len(labels) == len(corners.get("lowerCorner", ())) ==
+                                                         len(corners.get("upperCorner", ())) == len(grid.get("low", ()))):
+            raise ValueError("The DescribeCoverage response's envelopes don't describe the same axes.")
+        counts = dict(zip(grid_labels, (high - low + 1 for low, high in zip(grid["low"], grid["high"]))))
+
+        # only the date axes listing all of their points keep them, the numeric
+        # coefficients being offsets along the axis rather than coordinates
+        points = {}
+        for label, values in coefficients.items():
+            try:
+                values = [_parse_corner(value) for value in values]
+            except ValueError:
+                continue
+            if values and counts.get(label) == len(values) and all(isinstance(value, date) for value in values):
+                points[label] = values
+        return cls(labels, [counts[label] for label in labels],
+                   [_parse_corner(value) for value in corners["lowerCorner"]],
+                   [_parse_corner(value) for value in corners["upperCorner"]], points)
+
+    def __index(self, axis: str) -> int:
+        """
+        :raise: ValueError if the coverage has no such axis.
+        """
+        if axis not in self.axis_labels:
+            raise ValueError(f"The coverage has no {axis} axis.")
+        return self.axis_labels.index(axis)
+
+    def resolution(self, axis: str) -> float:
+        """
+        Returns the distance between two grid points of an axis, in days for the date axes.
+
+        :raise: ValueError if the coverage has no such axis.
+        """
+        index = self.__index(axis)
+        extent = self.upper[index] - self.lower[index]
+        if isinstance(extent, float):
+            return extent / self.cells[index]
+        return extent.days / max(self.cells[index] - 1, 1)
+
+    def cells_within(self, axis: str, low=None, high=None) -> int:
+        """
+        Estimates the number of grid points of an axis within the [low, high] interval.
+
+        :param axis: the axis' label.
+        :param low: the interval's lower end, a number or a YYYY-MM / YYYY-MM-DD date,
+            defaults to the axis' lower end (as does high to its upper end).
+        :param high: the interval's upper end, defaults to low if low is given.
+        :return: the number of grid points, 0 if the interval misses the axis' extent.
+
+        :raise: ValueError if the coverage has no such axis, or for invalid dates.
+        """
+        index = self.__index(axis)
+        lower, upper, cells = self.lower[index], self.upper[index], self.cells[index]
+        if low is None:
+            low, high = lower, upper
+        elif high is None:
+            high = low
+        if isinstance(low, str):
+            low, high = parse_date(low), parse_date(high)
+        low, high = max(min(low, high), lower), min(max(low, high), upper)
+        if low > high:
+            return 0
+        if isinstance(lower, float):
+            resolution = self.resolution(axis)
+            # the cells the interval overlaps, a single value falling in one of them,
+            # the positions being rounded so that the cells' edges don't suffer from float errors
+            first = min(math.floor(round((low - lower) / resolution, 9)), cells - 1)
+            last = min(math.ceil(round((high - lower) / resolution, 9)) - 1, cells - 1)
+            return max(last, first) - first + 1
+        points = self.points.get(axis)
+        if points:
+            # the date axes' own points within the interval
+            return bisect_right(points, high) - bisect_left(points, low)
+        # otherwise the points are taken as evenly spread, the interval's ends being rounded
+        # to the nearest one, as the calendar's months and years aren't all of the same length
+        span = (upper - lower).days
+        if span == 0:
+            return cells
+        first = round((low - lower).days * (cells - 1) / span)
+        last = round((high - lower).days * (cells - 1) / span)
+        return last - first + 1
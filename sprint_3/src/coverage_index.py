@@ -0,0 +1,100 @@
+import numpy as np
+from .coverage_catalog import CoverageCatalog
+
+def _parse_day(date: str) -> np.datetime64:
+    """
+    Parses a 'yyyy-mm' (first day of the month) or 'yyyy-mm-dd' date.
+
+    :raise: ValueError if the date is not a string in one of those formats.
+    """
+    if not isinstance(date, str) or len(date) not in (len("yyyy-mm"), len("yyyy-mm-dd")):
+        raise ValueError(f"invalid date: {date}, expected format: yyyy-mm or yyyy-mm-dd.")
+    return np.datetime64(date).astype("datetime64[D]")
+
+class CoverageIndex:
+    """
+    An index over the preprocessed coverages' bounds, answering
+    "which coverages cover this area / period" without parsing
+    every coverage's bounds again. The columns of a CoverageCatalog are
+    sorted by the lower latitude ('coord_1') bound, so a lookup is a
+    binary search followed by a few vectorized comparisons.
+
+    As for DatacubeObject.check_lat / check_lon, 'coord_1' and 'coord_2'
+    are the coverages' first two spatial axes, in the coverage's own CRS.
+
+    :param coverages: CoverageCatalog, or dictionary with the coverage IDs as keys
+        and type_request objects as values (a pre_processed_coverage_dict).
+
+    :raise: ValueError if coverages is neither a CoverageCatalog nor a dictionary.
+    """
+    def __init__(self, coverages) -> None:
+        """Initializes the object"""
+        if isinstance(coverages, dict):
+            coverages = CoverageCatalog.from_coverages(coverages)
+        if not isinstance(coverages, CoverageCatalog):
+            raise ValueError("coverages gotta be a CoverageCatalog or a dictionary.")
+
+        # missing bounds are NaN / NaT, which never compare as intersecting.
+        # NaNs are sorted last, so the coverages without latitude bounds
+        # never take part in the binary search
+        order = np.argsort(coverages.lat_low, kind="stable")
+        self.ids = coverages.ids[order]
+        self.__lat_low, self.__lat_high = coverages.lat_low[order], coverages.lat_high[order]
+        self.__lon_low, self.__lon_high = coverages.lon_low[order], coverages.lon_high[order]
+        self.__date_low, self.__date_high = coverages.time_low[order], coverages.time_high[order]
+        self.__with_lat = int(np.count_nonzero(~np.isnan(self.__lat_low)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def coverages_intersecting(self, bbox: tuple = None, time_range: tuple = None) -> list:
+        """
+        Looks up the coverages whose bounds intersect the given area and period.
+        A coverage lacking the bounds of a constrained axis is left out.
+
+        :param bbox: optional (lat_min, lon_min, lat_max, lon_max) tuple.
+        :param time_range: optional (start_date, end_date) tuple of 'yyyy-mm(-dd)' strings.
+        :return: list of the matching coverage IDs.
+
+        :raise: ValueError if bbox or time_range are malformed or not in ascending order.
+        """
+        end = len(self.ids)
+        if bbox is not None:
+            if not isinstance(bbox, (tuple, list)) or len(bbox) != 4\
+               or not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in bbox):
+                raise ValueError("bbox gotta be a (lat_min, lon_min, lat_max, lon_max) tuple of numbers.")
+            lat_min, lon_min, lat_max, lon_max = bbox
+            if lat_min > lat_max or lon_min > lon_max:
+                raise ValueError("bbox's minimums gotta be lower than its maximums.")
+            # only the coverages starting below lat_max can intersect the bbox
+            end = int(np.searchsorted(self.__lat_low[:self.__with_lat], lat_max, side="right"))
+        if time_range is not None:
+            if not isinstance(time_range, (tuple, list)) or len(time_range) != 2:
+                raise ValueError("time_range gotta be a (start_date, end_date) tuple.")
+            start, stop = _parse_day(time_range[0]), _parse_day(time_range[1])
+            if start > stop:
+                raise ValueError("time_range's start_date gotta be before its end_date.")
+
+        mask = np.ones(end, dtype=bool)
+        if bbox is not None:
+            mask &= self.__lat_high[:end] >= lat_min
+            mask &= (self.__lon_low[:end] <= lon_max) & (self.__lon_high[:end] >= lon_min)
+        if time_range is not None:
+            # comparisons with NaT are False, which leaves out the coverages without dates
+            mask &= (self.__date_low[:end] <= stop) & (self.__date_high[:end] >= start)
+        return self.ids[:end][mask].tolist()
+
+    def coverages_containing(self, point: tuple) -> list:
+        """
+        Looks up the coverages whose bounds contain the given point.
+
+        :param point: (lat, lon) or (lat, lon, date) tuple, date as a 'yyyy-mm(-dd)' string.
+        :return: list of the matching coverage IDs.
+
+        :raise: ValueError if point is malformed.
+        """
+        if not isinstance(point, (tuple, list)) or len(point) not in (2, 3):
+            raise ValueError("point gotta be a (lat, lon) or (lat, lon, date) tuple.")
+        lat, lon = point[0], point[1]
+        time_range = (point[2], point[2]) if len(point) == 3 else None
+        return self.coverages_intersecting((lat, lon, lat, lon), time_range)
@@ -0,0 +1,227 @@
+import warnings
+import numpy as np
+import xarray as xr
+from .query_optimizer import parse_subset
+
+# the csv response's separators: the {} nesting, the cells' commas, and the quotes and spaces of the struct cells
+_SEPARATORS = b'{},"\t\r\n'
+_TO_SPACES = bytes.maketrans(_SEPARATORS, b" " * len(_SEPARATORS))
+# everything but the separators, the characters a value can be made of
+_VALUE_CHARACTERS = bytes(character for character in range(256) if character not in _SEPARATORS + b" ")
+# the characters of the numbers, nan and inf(inity) included, and the ones only written in floats
+_NUMERIC = b"0123456789+-. eEnNaAiIfFtTyY"
+_FLOAT_MARKERS = b".eEnNiI"
+_BOOLEANS = {b"true": True, b"false": False}
+_INT64_BOUNDS = (np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+
+def _count_tokens(text: bytes) -> int:
+    """Counts the space separated tokens of a text."""
+    filled = np.frombuffer(text, dtype=np.uint8) != ord(" ")
+    if not len(filled):
+        return 0
+    return int(filled[0]) + int(np.count_nonzero(filled[1:] & ~filled[:-1]))
+
+def _overflowed(values: np.ndarray, text: bytes) -> bool:
+    """
+    Checks whether numpy's text parser saturated ints that don't fit in an int64, the
+    values it gives for them being the int64 bounds: those are checked against their text.
+    """
+    suspects = np.flatnonzero((values == _INT64_BOUNDS[0]) | (values == _INT64_BOUNDS[1]))
+    if not len(suspects):
+        return False
+    tokens = text.split()
+    try:
+        return any(int(tokens[index]) != values[index] for index in suspects)
+    except ValueError:
+        return True
+
+def _parse_values(data: bytes) -> np.ndarray:
+    """
+    Reads the values of a piece of csv response, ints if none of them is written as a float
+    and all of them fit in an int64, floats otherwise. The purely numeric pieces are read at
+    once by numpy's text parser, the other ones token by token, which also reads the true /
+    false cells as booleans.
+
+    :raise: ValueError for a value that isn't a number nor a boolean.
+    """
+    text = data.translate(_TO_SPACES)
+    count = _count_tokens(text)
+    if count == 0:
+        return np.empty(0, dtype=np.int64)
+    dtype = np.int64 if len(text.translate(None, _FLOAT_MARKERS)) == len(text) else np.float64
+    if not text.translate(None, _NUMERIC):
+        try:
+            # older numpy versions only warn about the text they can't read
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", DeprecationWarning)
+                values = np.fromstring(text, dtype=dtype, sep=" ")
+            if len(values) == count and not (dtype == np.int64 and _overflowed(values, text)):
+                return values
+        except (ValueError, DeprecationWarning):
+            pass
+    tokens = text.lower().split()
+    if all(token in _BOOLEANS for token in tokens):
+        return np.array([_BOOLEANS[token] for token in tokens], dtype=bool)
+    try:
+        return np.array(tokens, dtype=float)
+    except ValueError:
+        raise ValueError("The csv response holds values that aren't numbers.") from None
+
+class _Reader:
+    """
+    Reads a csv response piece after piece, each one ending between two values: it keeps the
+    depth of the {} nesting reached so far, the number of groups opened at each depth and the
+    number of cells, from which the array's shape is worked out once the whole response is read.
+    Every group is checked to have as many elements as the first one closed at its depth, the
+    elements being counted by the commas at the group's own depth.
+    """
+    __slots__ = ("depth", "groups", "commas", "values", "sizes", "pending")
+
+    def __init__(self) -> None:
+        """Initializes the object"""
+        self.depth = 0
+        self.groups = np.zeros(1, dtype=np.int64)
+        self.commas = 0
+        self.values = []
+        # the number of elements of the groups at each depth, and the commas of the open groups
+        self.sizes = {}
+        self.pending = {}
+
+    def feed(self, data: bytes) -> None:
+        """Reads a piece of the response."""
+        if not data:
+            return
+        characters = np.frombuffer(data, dtype=np.uint8)
+        opening, closing = characters == ord("{"), characters == ord("}")
+        depths = self.depth + np.cumsum(opening.astype(np.int64) - closing)
+        if len(depths) and depths.min() < 0:
+            raise ValueError("The csv response isn't a regular array.")
+        opened = np.bincount(depths[opening])
+        if len(opened) > len(self.groups):
+            self.groups = np.pad(self.groups, (0, len(opened) - len(self.groups)))
+        self.groups[:len(opened)] += opened
+        self.depth = int(depths[-1])
+        commas = np.flatnonzero(characters == ord(","))
+        self.commas += len(commas)
+        self.__check_groups(depths[commas], commas, np.flatnonzero(closing), depths[closing] + 1)
+        self.values.append(_parse_values(data))
+
+    def __check_groups(self, comma_depths, commas, closings, closing_depths) -> None:
+        """
+        Counts the elements of the groups closed in a piece of the response, at each depth at once.
+
+        :raise: ValueError if a group doesn't have as many elements as the other ones at its depth.
+        """
+        for depth in np.union1d(comma_depths[comma_depths > 0], closing_depths).tolist():
+            at_depth = commas[comma_depths == depth]
+            ends = closings[closing_depths == depth]
+            # the commas before each closing brace, the ones of the previous pieces counting for the first group
+            before = np.searchsorted(at_depth, ends)
+            elements = np.diff(before, prepend=0) + 1
+            if len(elements):
+                elements[0] += self.pending.get(depth, 0)
+                size = self.sizes.setdefault(depth, int(elements[0]))
+                if (elements != size).any():
+                    raise ValueError("The csv response isn't a regular array.")
+                self.pending[depth] = len(at_depth) - int(before[-1])
+            else:
+                self.pending[depth] = self.pending.get(depth, 0) + len(at_depth)
+
+    def result(self, dtype=None) -> np.ndarray:
+        """
+        Shapes the values read: the top level's elements are the first axis, the groups' ones
+        the next axes, and the struct cells' bands, if any, the last one.
+
+        :raise: ValueError if the nesting isn't regular.
+        """
+        values = np.concatenate(self.values) if self.values else np.empty(0, dtype=np.int64)
+        if dtype is not None:
+            values = values.astype(dtype, copy=False)
+        cells = self.commas + 1 if len(values) else 0
+        counts = [int(count) for count in self.groups[1:]] + [cells]
+        shape = [counts[0]]
+        for outer, inner in zip(counts, counts[1:]):
+            if outer == 0 or inner % outer:
+                raise ValueError("The csv response isn't a regular array.")
+            shape.append(inner // outer)
+        if cells and len(values) != cells:
+            # the struct cells' bands make the last axis
+            if len(values) % cells:
+                raise ValueError("The csv response isn't a regular array.")
+            shape.append(len(values) // cells)
+        if self.depth != 0 or int(np.prod(shape)) != len(values):
+            raise ValueError("The csv response isn't a regular array.")
+        return values.reshape(shape)
+
+def decode_csv(response: bytes, dtype=None) -> np.ndarray:
+    """
+    Reads a csv response into an array, shaped after its {} nesting: e.g. '{1,2},{3,4}'
+    gives a (2, 2) array. The struct cells ('"1 2 3"') add their bands as a last axis.
+    The values are ints if none of them is written as a float, floats otherwise, and
+    booleans for the true / false cells.
+
+    :param response: the csv response.
+    :param dtype: the type the values are cast to, inferred from the response by default.
+    :return: the array, empty for an empty response.
+
+    :raise: ValueError if the nesting isn't regular or a value isn't a number.
+    """
+    reader = _Reader()
+    reader.feed(bytes(response))
+    return reader.result(dtype)
+
+def decode_csv_stream(chunks, dtype=None) -> np.ndarray:
+    """
+    Reads a csv response handed out in chunks (e.g. by DatabaseConnectionObject.execute_query_stream)
+    into an array as decode_csv does, without ever holding the whole response's text: each chunk
+    is read as soon as it comes, the value it ends in the middle of being carried to the next one.
+
+    :param chunks: an iterable of the response's bytes chunks.
+    :param dtype: the type the values are cast to, inferred from the response by default.
+    :return: the array.
+
+    :raise: ValueError if the nesting isn't regular or a value isn't a number.
+    """
+    reader = _Reader()
+    carry = b""
+    for chunk in chunks:
+        data = carry + bytes(chunk)
+        head = data.rstrip(_VALUE_CHARACTERS)
+        reader.feed(head)
+        carry = data[len(head):]
+    reader.feed(carry)
+    return reader.result(dtype)
+
+def plan_axes(plan, axis_labels=None) -> tuple:
+    """
+    Works out the axes of a plan's csv response: the coverage's axes but the sliced ones.
+
+    :param plan: the QueryPlan.
+    :param axis_labels: the coverage's axes, in the grid's order (see CoverageGrid). If None,
+        the axes the plan subsets are taken, in the order of their operations.
+    :return: the axes' labels, none for an aggregate.
+    """
+    if plan.aggregate_function:
+        return ()
+    subsets = [subset for subset in map(parse_subset, plan.operations) if subset is not None]
+    sliced = {subset[0] for subset in subsets if subset[3]}
+    if axis_labels is None:
+        axis_labels = dict.fromkeys(subset[0] for subset in subsets)
+    return tuple(label for label in axis_labels if label not in sliced)
+
+def to_xarray(array: np.ndarray, plan, axis_labels=None) -> xr.DataArray:
+    """
+    Wraps a decoded response into a DataArray named after the plan's coverage, its dimensions
+    labelled after the plan's axes (see plan_axes), plus a 'band' one for the struct cells.
+    If the array doesn't have as many axes, xarray's default dim_0, dim_1... are kept.
+
+    :param array: the decoded response.
+    :param plan: the QueryPlan the response answers.
+    :param axis_labels: the coverage's axes, in the grid's order.
+    :return: the DataArray, with the query as its 'query' attribute.
+    """
+    dims = list(plan_axes(plan, axis_labels))
+    if array.ndim == len(dims) + 1:
+        dims.append("band")
+    return xr.DataArray(array, dims=dims if array.ndim == len(dims) else None,
+                        name=plan.coverage_name, attrs={"query": plan.render()})
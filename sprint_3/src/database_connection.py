@@ -1,6 +1,16 @@
 import requests
 import re
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from .get_coverage import processedDataIntoList
+from .response_cache import ResponseCache
+from .catalog_snapshot import CatalogSnapshot
+from .coverage_catalog import CoverageCatalog, CoverageCatalogBuilder
+from .coverage_index import CoverageIndex
+from .bounds_validator import BoundsValidator
+from .coverage_grid import CoverageGrid
 
 """
 how to run: 'python -m src.database_connection'
@@ -8,27 +18,295 @@ you need to be in sprint_2 (don't go to either src or get_coverage files)
 """
 
 class DatabaseConnectionObject:
-    def __init__(self, server_url : str, coverage_url: str = None) -> None:
+    def __init__(self, server_url : str, coverage_url: str = None,
+                 pool_connections: int = 10, pool_maxsize: int = 10,
+                 keep_alive: bool = True, pool_block: bool = False,
+                 cache: ResponseCache = None, snapshot: CatalogSnapshot = None,
+                 preprocessing: str = "eager") -> None:
         """
         Initializes a DatabaseConnectionObject object.
+        Every request made by the object goes through one pooled
+        requests.Session, so consecutive queries reuse the already
+        opened (keep-alive) connections instead of paying a new
+        TCP + TLS handshake each time.
 
         :param server_url: a string with the server's base url.
         :param coverage_url: a string with the url for getting the coverage to be preprocessed.
+        :param pool_connections: number of per-host connection pools kept alive.
+        :param pool_maxsize: maximum number of connections kept per host.
+        :param keep_alive: reuses connections between requests if set to True,
+            otherwise every request asks the server to close its connection.
+        :param pool_block: if set to True, a request waits for a free connection
+            once pool_maxsize connections to a host are in use, instead of
+            opening a throw-away one.
+        :param cache: optional ResponseCache answering repeated queries without
+            a round trip to the server.
+        :param snapshot: optional CatalogSnapshot the preprocessed coverages are
+            loaded from (and saved to), instead of parsing the whole
+            capabilities document on every start.
+        :param preprocessing: when the coverages are preprocessed: "eager" does it
+            before returning, "lazy" on the first access to the preprocessed
+            coverages (e.g. the first bounds check), "background" in a thread
+            started here. See preprocessing_future and wait_for_preprocessing.
 
         :raise: a ValueError if server_url is anything but a str variable.
                 a ValueError if coverage_url is given and is anything by a str variable.
+                a ValueError if the pool parameters are not positive int / bool variables.
+                a ValueError if cache is given and is anything but a ResponseCache.
+                a ValueError if snapshot is given and is anything but a CatalogSnapshot.
+                a ValueError if preprocessing is not "eager", "lazy" or "background".
         """
         if not isinstance(server_url, str):
             raise ValueError("server_url gotta be a string.")
         if coverage_url != None:
             if not isinstance(coverage_url, str):
                 raise ValueError("coverage_url gotta be a string.")
+        for value in (pool_connections, pool_maxsize):
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError("pool_connections and pool_maxsize gotta be positive integers.")
+        if not isinstance(keep_alive, bool) or not isinstance(pool_block, bool):
+            raise ValueError("keep_alive and pool_block gotta be booleans.")
+        if cache is not None and not isinstance(cache, ResponseCache):
+            raise ValueError("cache gotta be a ResponseCache.")
+        if snapshot is not None and not isinstance(snapshot, CatalogSnapshot):
+            raise ValueError("snapshot gotta be a CatalogSnapshot.")
+        if preprocessing not in ("eager", "lazy", "background"):
+            raise ValueError("preprocessing gotta be 'eager', 'lazy' or 'background'.")
         
         self.server_url = server_url
         self.coverage_url = coverage_url
-        self.pre_processed_coverage_support = False
-        self.pre_processed_coverage_dict = None
-        self.__pre_processing_coverages()
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.cache = cache
+        self.snapshot = snapshot
+        self.closed = False
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+        self.preprocessing = preprocessing
+        self.preprocessing_future = Future()
+        self.__coverage_support = False
+        self.__coverage_dict = None
+        self.__coverage_catalog = None
+        self.__coverage_index = None
+        self.__validators = dict()
+        self.__grids = dict()
+        self.__preprocessing_started = False
+        self.__overridden = set()
+        self.__preprocessing_lock = threading.Lock()
+        if preprocessing == "eager":
+            self.__start_preprocessing()
+        elif preprocessing == "background":
+            self.__start_preprocessing(background=True)
+
+    @property
+    def pre_processed_coverage_support(self) -> bool:
+        """
+        Whether the coverages were preprocessed, waiting for
+        (or, in "lazy" mode, running) the preprocessing first.
+        """
+        self.wait_for_preprocessing()
+        return self.__coverage_support
+
+    @pre_processed_coverage_support.setter
+    def pre_processed_coverage_support(self, value: bool) -> None:
+        with self.__preprocessing_lock:
+            running = self.__override_preprocessing("support")
+            self.__coverage_support = value
+        if not running:
+            self.__resolve_preprocessing()
+
+    @property
+    def pre_processed_coverage_dict(self) -> dict:
+        """
+        The preprocessed coverages, with their IDs as keys, waiting for
+        (or, in "lazy" mode, running) the preprocessing first.
+        """
+        self.wait_for_preprocessing()
+        return self.__coverage_dict
+
+    @pre_processed_coverage_dict.setter
+    def pre_processed_coverage_dict(self, value: dict) -> None:
+        with self.__preprocessing_lock:
+            running = self.__override_preprocessing("dict")
+            self.__coverage_dict = value
+            self.__coverage_catalog = None
+            self.__coverage_index = None
+            self.__validators = dict()
+        if not running:
+            self.__resolve_preprocessing()
+
+    @property
+    def coverage_catalog(self) -> CoverageCatalog:
+        """
+        Columnar CoverageCatalog of the preprocessed coverages, filled while
+        they're processed (or built on first access, when they come from a
+        snapshot or pre_processed_coverage_dict is replaced).
+        None if the coverages couldn't be preprocessed.
+        """
+        if not self.pre_processed_coverage_support or self.pre_processed_coverage_dict is None:
+            return None
+        with self.__preprocessing_lock:
+            if self.__coverage_catalog is None:
+                self.__coverage_catalog = CoverageCatalog.from_coverages(self.__coverage_dict)
+            return self.__coverage_catalog
+
+    @property
+    def coverage_index(self) -> CoverageIndex:
+        """
+        CoverageIndex over the coverage_catalog, built on first access
+        (and again whenever pre_processed_coverage_dict is replaced).
+        None if the coverages couldn't be preprocessed.
+        """
+        catalog = self.coverage_catalog
+        if catalog is None:
+            return None
+        with self.__preprocessing_lock:
+            if self.__coverage_index is None:
+                self.__coverage_index = CoverageIndex(catalog)
+            return self.__coverage_index
+
+    def bounds_validator(self, coverage_name: str) -> BoundsValidator:
+        """
+        Returns the BoundsValidator of a preprocessed coverage, created once
+        per coverage (and again whenever pre_processed_coverage_dict is replaced).
+
+        :param coverage_name: the coverage's ID.
+
+        :raise: an Exception if the coverage's bounds are unavailable.
+        """
+        validator = self.__validators.get(coverage_name)
+        if validator is None:
+            if not self.pre_processed_coverage_support:
+                raise Exception("Unable to check")
+            coverages = self.pre_processed_coverage_dict
+            try:
+                validator = BoundsValidator(coverages[coverage_name])
+            except (KeyError, TypeError):
+                raise Exception("Unable to check")
+            with self.__preprocessing_lock:
+                # not cached if the coverages were replaced in the meantime
+                if self.__coverage_dict is coverages:
+                    self.__validators[coverage_name] = validator
+        return validator
+
+    def coverage_grid(self, coverage_name: str) -> CoverageGrid:
+        """
+        Returns the grid of a coverage (its numbers of grid points and resolutions),
+        described by the server once per coverage through a DescribeCoverage request.
+
+        :param coverage_name: the coverage's ID.
+
+        :raise: an Exception if the request fails.
+                a ValueError if the response doesn't describe the coverage's grid.
+        """
+        self._check_open()
+        grid = self.__grids.get(coverage_name)
+        if grid is None:
+            try:
+                response = self.session.get(self.server_url, params={
+                    "SERVICE": "WCS", "VERSION": "2.0.1", "REQUEST": "DescribeCoverage", "COVERAGEID": coverage_name})
+            except requests.exceptions.RequestException as e:
+                raise Exception(e)
+            if response.status_code != 200:
+                raise self._bad_response_error(response.status_code, response.text)
+            try:
+                grid = CoverageGrid.from_describe(response.content)
+            except ET.ParseError as e:
+                raise ValueError(e)
+            self.__grids[coverage_name] = grid
+        return grid
+
+    def wait_for_preprocessing(self, timeout: float = None) -> bool:
+        """
+        Waits for the coverage preprocessing to be over, starting it if it
+        didn't start yet ("lazy" mode): in the calling thread without timeout,
+        in a background thread otherwise, so that the timeout holds.
+
+        :param timeout: maximum number of seconds to wait, None to wait as long as needed.
+        :return: True if the coverages were preprocessed, False otherwise.
+
+        :raise: a TimeoutError if the preprocessing isn't over after timeout seconds.
+        """
+        if not self.preprocessing_future.done():
+            self.__start_preprocessing(background=timeout is not None)
+        return self.preprocessing_future.result(timeout)
+
+    def __start_preprocessing(self, background: bool = False) -> None:
+        """Runs the preprocessing, in the calling thread or a background one, unless it already started."""
+        with self.__preprocessing_lock:
+            if self.__preprocessing_started:
+                return
+            self.__preprocessing_started = True
+        if background:
+            threading.Thread(target=self.__run_preprocessing, daemon=True).start()
+        else:
+            self.__run_preprocessing()
+
+    def __run_preprocessing(self) -> None:
+        """Runs the preprocessing and resolves preprocessing_future with its outcome."""
+        try:
+            support, dictionary, catalog = self.__pre_processing_coverages()
+        except Exception:
+            support, dictionary, catalog = False, None, None
+        with self.__preprocessing_lock:
+            # values assigned by hand while the preprocessing ran take precedence,
+            # the other ones being the preprocessing's
+            if "support" not in self.__overridden:
+                self.__coverage_support = support
+            if "dict" not in self.__overridden:
+                self.__coverage_dict = dictionary
+                self.__coverage_catalog = catalog
+                self.__coverage_index = None
+                self.__validators = dict()
+        self.__resolve_preprocessing()
+
+    def __override_preprocessing(self, name: str) -> bool:
+        """
+        Marks one of the preprocessed values ('support' or 'dict') as set by hand, so that
+        no preprocessing replaces it, and no pending one starts. Must be called while
+        holding the preprocessing lock.
+
+        :return: True if a preprocessing is running, which then resolves preprocessing_future
+            with its own values merged with the ones set by hand.
+        """
+        running = self.__preprocessing_started and not self.preprocessing_future.done()
+        self.__preprocessing_started = True
+        self.__overridden.add(name)
+        return running
+
+    def __resolve_preprocessing(self) -> None:
+        """Resolves preprocessing_future with the current support, unless it's already resolved."""
+        try:
+            self.preprocessing_future.set_result(self.__coverage_support)
+        except InvalidStateError:
+            pass
+
+    def close(self) -> None:
+        """
+        Closes the pooled connections of the DatabaseConnectionObject.
+        Any query attempted afterwards raises an exception.
+        """
+        self.closed = True
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _check_open(self) -> None:
+        """
+        :raise: an Exception if the DatabaseConnectionObject was already closed.
+        """
+        if self.closed:
+            raise Exception("the DatabaseConnectionObject is closed.")
 
     def test_connection(self, print_status_updates: bool = False) -> None:
         """
@@ -38,11 +316,12 @@ class DatabaseConnectionObject:
         
         :raise: an exception if anything goes wrong.
         """
+        self._check_open()
         try:
             if print_status_updates:
                 print("Checking server availability:", end=' ')
             # Send a GET request to the server URL to establish connection
-            response = requests.get(self.server_url)
+            response = self.session.get(self.server_url)
 
             # Check if the response status code is 200 (OK)
             if response.status_code == 200:
@@ -60,42 +339,180 @@ class DatabaseConnectionObject:
                 print("Check your Wi-Fi connection.")
             raise Exception(e)
 
-    def execute_query(self, query : str, print_status_updates: bool = False) -> str:
+    def execute_query(self, query : str, print_status_updates: bool = False, canonical: str = None) -> str:
         """
         sends a POST request to the DatabaseConnectionObject's server_url
         with the data parameter set to {'query': query}.
+        If the object has a cache, a cached response is returned instead
+        whenever possible, and successful responses are stored in it.
         
         :param query: query to be sent to the server.
         :param print_status_updates: Prints on the standard output log messages if it's set to True.
+        :param canonical: the query's normalized form, if already known (see QueryPlan.canonical),
+            which spares the cache normalizing the query again.
         :returns the content of the response.
         
         :raise: Exception error Will raise an exception is anything goes wrong.
         """
+        self._check_open()
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.canonical_key(canonical, self.server_url) if canonical is not None else None
+            cached = self.cache.get(query, self.server_url, key)
+            if cached is not None:
+                if print_status_updates:
+                    print("Response found in cache.")
+                return cached
         try:
             # Send POST request to server_url
-            response = requests.post(self.server_url, data = {'query': query})
+            response = self.session.post(self.server_url, data = {'query': query})
 
             # Check if the response status code is 200 (OK)
             if response.status_code == 200:
                 if print_status_updates:
                     print("Request Made Successfully.")
+                if self.cache is not None:
+                    self.cache.put(query, self.server_url, response.content, key=key)
                 return response.content
             else:
-                # if we got a different response code, we try to better understand the reason
-                # based on server's response
-                interpreted_error = self.__interpret_error_msg(response.text)
                 if print_status_updates:
                     print(f"Query execution failure. Status code: {response.status_code}.")
-                if interpreted_error != "":
-                    raise Exception(f"bad response, status_code: {response.status_code}. "
-                                    + interpreted_error)
-                else:
-                    raise Exception(f"bad response, status_code: {response.status_code}.")
+                raise self._bad_response_error(response.status_code, response.text)
+        except requests.exceptions.RequestException as e:
+            if print_status_updates:
+                print(f"Error establishing connection: {e}")
+            raise Exception(e)
+
+    def execute_query_stream(self, query: str, chunk_size: int = 1 << 16, sink=None,
+                             print_status_updates: bool = False):
+        """
+        Sends the query like execute_query, but doesn't buffer the response's
+        content in memory: the body is either handed out in chunks or written
+        straight into sink, so big coverage exports run in constant memory.
+
+        :param query: query to be sent to the server.
+        :param chunk_size: maximum size in bytes of every chunk read from the response.
+        :param sink: optional file-like object (with a write method) the body is written to.
+        :param print_status_updates: Prints on the standard output log messages if it's set to True.
+        :returns an iterator over the body's chunks if sink is None,
+            otherwise the number of bytes written into sink.
+
+        :raise: a ValueError if chunk_size is not a positive integer or sink can't be written to.
+                Exception error Will raise an exception is anything goes wrong with the request.
+        """
+        if isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size < 1:
+            raise ValueError("chunk_size gotta be a positive integer.")
+        if sink is not None and not callable(getattr(sink, "write", None)):
+            raise ValueError("sink gotta be a file-like object.")
+        self._check_open()
+        try:
+            response = self.session.post(self.server_url, data = {'query': query}, stream = True)
         except requests.exceptions.RequestException as e:
             if print_status_updates:
                 print(f"Error establishing connection: {e}")
             raise Exception(e)
 
+        if response.status_code != 200:
+            try:
+                if print_status_updates:
+                    print(f"Query execution failure. Status code: {response.status_code}.")
+                raise self._bad_response_error(response.status_code, response.text)
+            finally:
+                response.close()
+        if print_status_updates:
+            print("Request Made Successfully.")
+
+        chunks = self.__iter_chunks(response, chunk_size)
+        if sink is None:
+            return chunks
+        written = 0
+        for chunk in chunks:
+            sink.write(chunk)
+            written += len(chunk)
+        return written
+
+    def __iter_chunks(self, response: requests.Response, chunk_size: int):
+        """
+        Yields a streamed response's body chunk by chunk, releasing
+        the connection back to the pool once it's consumed (or dropped).
+        """
+        try:
+            for chunk in response.iter_content(chunk_size):
+                if chunk:
+                    yield chunk
+        except requests.exceptions.RequestException as e:
+            raise Exception(e)
+        finally:
+            response.close()
+
+    def execute_many(self, queries: list, max_workers: int = 8, max_in_flight: int = None,
+                     print_status_updates: bool = False, canonicals: list = None) -> list:
+        """
+        Executes many queries on a pool of worker threads, sharing the pooled
+        connections (keep pool_maxsize >= max_workers so every worker gets
+        its own keep-alive connection). A failing query doesn't abort the
+        batch, its error is reported next to the other results instead.
+
+        :param queries: list of queries to be sent to the server.
+        :param max_workers: number of worker threads sending queries.
+        :param max_in_flight: maximum number of queries submitted to the workers
+            at once, bounding the pending work for very long batches.
+            Defaults to 2 * max_workers.
+        :param print_status_updates: Prints on the standard output log messages if it's set to True.
+        :param canonicals: optional list of the queries' normalized forms, see execute_query.
+        :return: a list of (response, error) pairs, in the same order as queries.
+            For every query exactly one of the two is None.
+
+        :raise: a ValueError if queries is not a list / tuple of strings,
+                if canonicals doesn't have one entry per query or
+                if max_workers / max_in_flight are not positive integers.
+        """
+        if not isinstance(queries, (list, tuple)) or not all(isinstance(query, str) for query in queries):
+            raise ValueError("queries gotta be a list of strings.")
+        if canonicals is None:
+            canonicals = [None] * len(queries)
+        elif not isinstance(canonicals, (list, tuple)) or len(canonicals) != len(queries):
+            raise ValueError("canonicals gotta be a list with one entry per query.")
+        if max_in_flight is None:
+            max_in_flight = 2 * max_workers if isinstance(max_workers, int) else 0
+        for value in (max_workers, max_in_flight):
+            if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+                raise ValueError("max_workers and max_in_flight gotta be positive integers.")
+        self._check_open()
+
+        results = [None] * len(queries)
+        slots = threading.BoundedSemaphore(max_in_flight)
+
+        def run(index: int, query: str) -> None:
+            try:
+                results[index] = (self.execute_query(query, print_status_updates, canonicals[index]), None)
+            except Exception as e:
+                results[index] = (None, e)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, query in enumerate(queries):
+                slots.acquire()
+                executor.submit(run, index, query)
+
+        return results
+
+    def _bad_response_error(self, status_code: int, response_txt: str) -> Exception:
+        """
+        Builds the exception raised for a non 200 response, trying to better
+        understand the reason based on the server's response.
+
+        :param status_code: the response's status code.
+        :param response_txt: server's response as a string.
+        :return: the Exception to be raised.
+        """
+        interpreted_error = self.__interpret_error_msg(response_txt)
+        if interpreted_error != "":
+            return Exception(f"bad response, status_code: {status_code}. " + interpreted_error)
+        else:
+            return Exception(f"bad response, status_code: {status_code}.")
+
     def __interpret_error_msg(self, response_txt: str) -> str:
         """
         Attemps to extract error message from the server's response message.
@@ -117,28 +534,38 @@ class DatabaseConnectionObject:
         else:
             return ""
 
-    def __pre_processing_coverages(self):
+    def __pre_processing_coverages(self) -> tuple:
         """
         Attempts to process once and for all a dictionary
         with the keys as coverage IDs and
-        with the content as their extracted data.
+        with the content as their extracted data,
+        along with their columnar catalog.
+        If the object has a snapshot, the dictionary is taken from it whenever possible
+        (the catalog is then built on first access instead).
+
+        :return: a (support, dictionary, catalog) triple, (False, None, None) if the attempt failed.
         """
         if self.coverage_url == None:
-            return
+            return False, None, None
+        if self.snapshot is not None:
+            dictionary = self.snapshot.coverages(self.coverage_url, self.session)
+            if dictionary:
+                return True, dictionary, None
+            return False, None, None
         try:
-            lst, ignored = processedDataIntoList(self.coverage_url, False)
+            catalog = CoverageCatalogBuilder()
+            lst, ignored = processedDataIntoList(self.coverage_url, False, self.session, catalog=catalog)
         except:
-            return
+            return False, None, None
         
         if ignored != 0 or lst == []:
-            return
+            return False, None, None
         
         try:
             dictionary = dict()
             for coverage in lst:
                 dictionary[coverage.id] = coverage
         except:
-            return
+            return False, None, None
         
-        self.pre_processed_coverage_support = True
-        self.pre_processed_coverage_dict = dictionary
+        return True, dictionary, catalog.build()
@@ -1,17 +1,43 @@
+import asyncio
+import math
+import os
+import tempfile
+import numpy as np
 import xarray as xr
-from datetime import datetime
 from .database_connection import *
+from .geometry import vertices_array, simplify
+from .bounds_validator import parse_date
+from .query_plan import QueryPlan
+from .query_optimizer import optimize as optimize_plan, fold_arithmetic, parse_subset
+from .response_cache import normalize_query
+from .query_template import QueryTemplate, TEMPLATE_AXES
+from .point_sampling import MAX_QUERY_LENGTH, point_terms, pack_queries, parse_samples
+from .time_chunking import CHUNK_UNITS, steps_for_budget, chunk_ranges, chunk_points, execute_chunks, stitch
+from .tiling import MAX_TILE_BYTES, plan_tiles, open_tile, mosaic
+from .cost_estimate import BYTES_PER_CELL, QueryEstimate, Guardrail, count_cells
+from .csv_decoder import decode_csv, to_xarray
+
+_VARIABLE = re.compile(r'\$[a-zA-Z_][a-zA-Z0-9_]*')
+
+def _format_bound(value) -> str:
+    """Writes a clamped subset bound, integral values without their decimal part."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
 
 class DatacubeObject:
     """
     Class for working with data cubes obtained from a remote data server.
     """
-    def __init__(self, dbc : DatabaseConnectionObject, coverage_name=None):
+    def __init__(self, dbc : DatabaseConnectionObject, coverage_name=None, clamp: bool = False, guardrail: Guardrail = None):
         """
         Initialize a new DatacubeObject instance.
  
         :param dbc (Database Connection Object): DatabaseConnectionObject that manages the connection to the WCPS server.
         :param coverage_name (str): The name of the coverage to perform operations on.
+        :param clamp (bool): If True, subset and timerange intersect their ranges with the coverage's extent
+            instead of rejecting the ranges that go beyond it.
+        :param guardrail (Guardrail): Limits on the estimated cost of the queries execute sends (see estimate),
+            above which a query is refused, or left to fetch / execute_tiled to split into tiles.
 
         Local variables:
             operations (list): List of operations to be performed on the coverage. Contains the general axis operations.
@@ -21,12 +47,14 @@ class DatacubeObject:
             color_cases (list): List of color cases for color switching operations.
             color_returns (list): List of color returns for color switching operations.
             extras (list): Additional parameters or options for datacube operations. Contains the additional filtering operations.
-            d_main_operations (list): List of the main/subset operations associated to each variable.
+            d_main_operations (list): List of the main/subset operations associated to each variable (None if unset).
             d_query_vars (list): List containing all extracted variables.
             d_coverages (list): List of the coverages associated to each variable.
+            The three d_ lists above are views, computed from one registry mapping each variable to its coverage and main operation.
             d_agg_func (str): The aggregate function that is used for a query.
             d_encoding_type (str): The encoding type used in the new method for generating dynamic queries.
             d_combination_query: The complex cobinated query that gets used for the execution.
+            empty_result (bool): Checks if a clamped range fell entirely outside the coverage's extent.
         """
 
         #Check the parameters' data types
@@ -34,9 +62,16 @@ class DatacubeObject:
             raise TypeError("invalid dbc type, expected type: DatabaseConnectionObject.")
         if coverage_name and not isinstance(coverage_name, str):
             raise TypeError("invalid coverage_name type, expected type: str.")
+        if not isinstance(clamp, bool):
+            raise TypeError("invalid clamp type, expected type: bool.")
+        if guardrail is not None and not isinstance(guardrail, Guardrail):
+            raise TypeError("invalid guardrail type, expected type: Guardrail.")
 
         self.dbc = dbc
         self.coverage_name = coverage_name
+        self.clamp = clamp
+        self.guardrail = guardrail
+        self.empty_result = False
         self.operations = []
         self.aggregate_function = None
         self.encode_type = None
@@ -46,36 +81,54 @@ class DatacubeObject:
         self.extras = []
 
         #new parameters used for another method of generating dynamic queries
-        self.d_main_operations = []
-        self.d_query_vars = []
-        self.d_coverages = []
+        self.__variables = {} # variable -> (coverage, main operation)
         self.d_agg_func = None
         self.d_encoding_type = ''
         self.d_combination_query = None
         
-    def create_datacube(self):
+    def create_datacube(self, filename: str = "datacube.nc", chunk_size: int = 1 << 20):
         """
         Create a datacube by executing a WCPS query and writing the result to a NetCDF file.
+        The response is streamed into the file chunk by chunk, so the whole coverage is never held in memory.
+        It is written to a temporary file next to filename first, which replaces filename only once the
+        whole response arrived: a failed export leaves an existing file as it was.
+
+        :param filename (str): The NetCDF file the coverage is written to.
+        :param chunk_size (int): Size in bytes of the chunks streamed into the file.
 
         :return A tuple containing the current DatacubeObject instance and the created datacube as an xarray Dataset.
+
+        :raises TypeError if filename is not a string.
+        :raises ValueError if a clamped range fell outside the coverage's extent.
+        :raises Exception if the request fails, the temporary file being removed.
         """
+        if not isinstance(filename, str):
+            raise TypeError("invalid filename type, expected type: str.")
+        if self.empty_result:
+            raise ValueError("The clamped ranges are outside the coverage's extent, there is no data to write.")
+
         #extract the data from the database
         extraction_query = f"""
                         for $c in ({self.coverage_name})
                         return encode($c, "netcdf")
                         """
 
-        response = self.dbc.execute_query(extraction_query)
-
-        #store the extracted data into a netcdf file
-        filename = "datacube.nc"  
-        with open(filename, "wb") as f:
-            f.write(response.content) 
+        #stream the extracted data into a temporary file, moved onto filename once complete
+        descriptor, temporary = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(os.path.abspath(filename)))
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                self.dbc.execute_query_stream(extraction_query, chunk_size, sink=f)
+            os.replace(temporary, filename)
+        except BaseException:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
 
         #create a datacube using xarray and the extracted data
-        if response.status_code == 200:
-            datacube = xr.open_dataset("datacube.nc")
-            return self, datacube
+        datacube = xr.open_dataset(filename)
+        return self, datacube
 
     def check_lat(self, lat):
         """
@@ -88,24 +141,8 @@ class DatacubeObject:
         :raises TypeError if the type of lat is invalid
         """
 
-        #Extract the corresponding values for the specific coverage which have been preprocessed while establishing the connection
-        if self.dbc.pre_processed_coverage_support:
-            try:
-                lower_lat = self.dbc.pre_processed_coverage_dict[self.coverage_name].extracted_bounds_dict['coord_1'][0]
-                upper_lat = self.dbc.pre_processed_coverage_dict[self.coverage_name].extracted_bounds_dict['coord_1'][1]
-                lower_lat = float(lower_lat)
-                upper_lat = float(upper_lat)
-            except KeyError:
-                raise Exception("Unable to check")
-        
-        #Checking parameters' data types
-        if not isinstance(lat, (int, float)):
-                raise TypeError("invalid lat type, expected type: int or float.")
-        
-        if lower_lat <= lat <= upper_lat:
-            pass
-        else:
-            raise ValueError("The latitude is not in the valid range")
+        #The bounds were extracted once for the specific coverage, from the ones preprocessed while establishing the connection
+        self.dbc.bounds_validator(self.coverage_name).check_lat(lat)
             
     def check_lon(self, lon):
         """
@@ -118,24 +155,8 @@ class DatacubeObject:
         :raises TypeError if the type of lon is invalid
         """
 
-        #Extract the corresponding values for the specific coverage which have been preprocessed while establishing the connection
-        if self.dbc.pre_processed_coverage_support:
-            try:
-                lower_lon = self.dbc.pre_processed_coverage_dict[self.coverage_name].extracted_bounds_dict['coord_2'][0]
-                upper_lon = self.dbc.pre_processed_coverage_dict[self.coverage_name].extracted_bounds_dict['coord_2'][1]
-                lower_lon = float(lower_lon)
-                upper_lon = float(upper_lon)
-            except KeyError:
-                raise Exception("Unable to check")
-
-            #Checking parameters' data types
-            if not isinstance(lon, (int, float)):
-                raise TypeError("invalid lon type, expected type: int or float.")
-
-            if lower_lon <= lon <= upper_lon:
-                pass
-            else:
-                raise ValueError("The longitude is not in the valid range")
+        #The bounds were extracted once for the specific coverage, from the ones preprocessed while establishing the connection
+        self.dbc.bounds_validator(self.coverage_name).check_lon(lon)
 
     def check_years(self, start_date: str, end_date: str = None) -> None:
         """
@@ -148,68 +169,31 @@ class DatacubeObject:
         :raises TypeError if start_date and end_date have invalid types
         :raises ValueError if the  dates are not in correct format or out of order
         """
-        date_format = "%Y-%m-%d"
-        
-        if not end_date:
-            end_date = start_date
-
-        if self.dbc.pre_processed_coverage_support:
-            try:    
-                start_bound = self.dbc.pre_processed_coverage_dict[self.coverage_name].extracted_bounds_dict['date'][0]
-                end_bound = self.dbc.pre_processed_coverage_dict[self.coverage_name].extracted_bounds_dict['date'][1]
-            except KeyError:
-                raise Exception("Unable to check")
-
-        # checking parameters' data types
-        if not isinstance(start_date, str):
-            raise TypeError("invalid start_date type, expected type: str.")
-        if not isinstance(end_date, str):
-            raise TypeError("invalid end_date type, expected type: str.")
+        self.dbc.bounds_validator(self.coverage_name).check_years(start_date, end_date)
 
-        try:
-            # convert the string to a date object
-            # add support for both type of accepted inputs: YYYY-MM and YYYY-MM-DD
-            # raise any possible occuring error
-            if len(start_bound) > len("yyyy-mm"):
-                start_bound = datetime.strptime(start_bound, date_format).date()
-            else:
-                start_bound = datetime.strptime(start_bound + "-01", date_format).date()
-            if len(end_bound) > len("yyyy-mm"):
-                end_bound = datetime.strptime(end_bound, date_format).date()
-            else:
-                end_bound = datetime.strptime(end_bound + "-01", date_format).date()
-            if len(start_date) > len("yyyy-mm"):
-                start_date = datetime.strptime(start_date, date_format).date()
-            else:
-                start_date = datetime.strptime(start_date + "-01", date_format).date()
-            if len(end_date) > len("yyyy-mm"):
-                end_date = datetime.strptime(end_date, date_format).date()
-            else:
-                end_date = datetime.strptime(end_date + "-01", date_format).date()
-        except Exception as e:
-            raise ValueError(e)
+    def check_years_array(self, dates) -> None:
+        """
+        Checks many dates against the coverage's time extent in one vectorized call,
+        e.g. every date of a time series sweep.
 
-        # raise invalid date combinations erros, if any
-        if start_bound <= start_date <= end_bound:
-            pass
-        else:
-            raise ValueError(f"The start date is not withing the allowed range: [{start_bound} : {end_bound}].")
-        
-        if start_bound <= end_date <= end_bound:
-            pass
-        else:
-            raise ValueError(f"The  end  date is not withing the allowed range: [{start_bound} : {end_bound}].")
- 
-        if start_date > end_date:
-            raise ValueError("Start date cannot be greater than end date.")
+        :param: dates: array-like of YYYY-MM / YYYY-MM-DD strings or a datetime64 array.
+
+        :raises KeyError Exception if the bounds cannot be checked
+        :raises TypeError if dates holds anything but strings or datetime64 values
+        :raises ValueError if any date is not in correct format or out of range
+        """
+        self.dbc.bounds_validator(self.coverage_name).check_years_array(dates)
 
     def subset(self, dimension:str, range_str):
         """
         Add a subset operation for a specific dimension (Lat/Lon) and a range.
 
         :param dimension (str): The dimension on which to apply the subset, typically 'axis0', 'axis1', etc.
-        :param range_str (int, float, str): The range in the format "start:end" to subset the dimension. Single (int, float) values are also accepted.
+        :param range_str (int, float, str): The range in the format "start:end" to subset the dimension, ends can be floats. Single (int, float) values are also accepted.
         
+        With clamp set, the range is intersected with the coverage's extent; a range entirely outside
+        of it marks the datacube as empty (see empty_result) instead of raising.
+
         :return: self to allow for method chaining.
 
         :raises ValueError if the dimension string or range of latitude/longitude values are invalid
@@ -224,70 +208,565 @@ class DatacubeObject:
         if dimension != "Lat" and dimension != "Long":
             raise ValueError("The dimension can only be Lat or Long specifying either the Latitude or Longitude dimensions")
 
-        #for single values - check the corresponding dimension
+        #for single values the interval is just the value itself
         if isinstance(range_str, (float, int)):
-            if dimension == "Lat":
-                self.check_lat(range_str)
-            elif dimension == "Long":
-                self.check_lon(range_str)
+            start = end = range_str
 
-        #for range of values - check the corresponding values one by one
+        #for range of values - both ends being within the bounds means the whole interval is
         else:
             start, end = range_str.split(':')
 
-            start = int(start)
-            end = int(end)
-
-            if dimension == "Lat":
-                for i in range(start, end + 1): 
-                    self.check_lat(i)
-            elif dimension == "Long":
-                for i in range(start, end + 1):
-                    self.check_lon(i)
+            start = float(start)
+            end = float(end)
+
+        validator = self.dbc.bounds_validator(self.coverage_name)
+        if self.clamp:
+            interval = validator.clamp_lat(start, end) if dimension == "Lat" else validator.clamp_lon(start, end)
+            if interval is None:
+                self.empty_result = True
+                return self
+            #the range is only rewritten if the extent actually cut it
+            if interval != (min(start, end), max(start, end)):
+                range_str = f"{_format_bound(interval[0])}:{_format_bound(interval[1])}"
+        elif dimension == "Lat":
+            validator.check_lat(start, end)
+        elif dimension == "Long":
+            validator.check_lon(start, end)
 
         self.operations.append(f"{dimension}({range_str})")
         return self 
 
-    def execute(self):
+    def execute(self, optimize: bool = True, decode=False):
         """
         Generate and execute a WCPS query based on accumulated operations.
 
-        :param dbc (DatabaseConnectionObject): Provides the connection to the database.
+        Example usage:
+        array, query = datacube.subset("Lat", "0:10").timerange("2012-01", "2012-12").execute(decode=True)
+
+        :param optimize (bool): If True, the repeated axis subsets are intersected and the constant
+            arithmetic is folded before the query is sent (see plan).
+        :param decode (bool, str): If True, the csv response is decoded into a NumPy array shaped after
+            its {} nesting (see csv_decoder.decode_csv), an aggregate's into a 0-d array. If 'xarray',
+            the array is wrapped into a DataArray whose dimensions are the axes the query doesn't slice.
         
-        :return the response of the execution and the sent query
+        :return the response of the execution and the sent query.
+            If a clamped range fell outside the coverage's extent, nothing is sent and (b"", None) is returned
+            (an empty array with decode set).
 
         :raises TypeError if the provided argument is not of the correct type.
+        :raises ValueError if the query goes over the guardrail (with action 'tile', fetch fetches it as tiles),
+            if decode is set for a query that is not csv encoded, or if the response is not a regular csv array of numbers.
+        """
+        plan = self.__decodable_plan(optimize, decode)
+        if self.empty_result:
+            return (self.__decode(b"", plan, decode) if decode else b""), None
+        if self.guardrail is not None:
+            self.__check_guardrail()
+        canonical = plan.canonical() if self.dbc.cache is not None else None
+        response = self.dbc.execute_query(plan.render(), canonical=canonical)
+        if decode:
+            response = self.__decode(response, plan, decode)
+        return response, plan.render()
+
+    async def execute_async(self, optimize: bool = True, decode=False):
+        """
+        Awaitable counterpart of execute, for a datacube whose dbc is an AsyncDatabaseConnectionObject.
+
+        :param optimize (bool): If True, the query is optimized first (see plan).
+        :param decode (bool, str): If True or 'xarray', the csv response is decoded (see execute).
+
+        :return the response of the execution and the sent query.
+
+        :raises TypeError if the datacube's dbc does not support asynchronous queries.
+        :raises ValueError if the query goes over the guardrail, or the response can't be decoded (see execute).
+        """
+        dbc = self._async_dbc()
+        plan = self.__decodable_plan(optimize, decode)
+        if self.empty_result:
+            return (self.__decode(b"", plan, decode) if decode else b""), None
+        #the estimate may have to describe the coverage
+        if self.guardrail is not None:
+            await asyncio.to_thread(self.__check_guardrail)
+        canonical = plan.canonical() if dbc.cache is not None else None
+        response = await dbc.execute_query_async(plan.render(), canonical=canonical)
+        if decode:
+            #the coverage may have to be described to label the axes
+            response = await asyncio.to_thread(self.__decode, response, plan, decode)
+        return response, plan.render()
+
+    def __decodable_plan(self, optimize: bool, decode) -> QueryPlan:
+        """
+        Returns the datacube's plan, making sure its response can be decoded if decode is set.
+
+        :raises ValueError if decode is not False, True or 'xarray', or the query is not csv encoded.
+        """
+        if decode not in (False, True, "xarray"):
+            raise ValueError("decode gotta be False, True or 'xarray'.")
+        plan = self.plan(optimize)
+        if decode and self.__encoding(plan) != "csv":
+            raise ValueError("Only the csv encoded responses can be decoded.")
+        return plan
+
+    def __decode(self, response: bytes, plan: QueryPlan, decode):
+        """
+        Decodes a csv response into an array, or a DataArray labelled with the coverage's axes
+        if decode is 'xarray' (the plan's subset axes if the coverage can't be described).
+        """
+        array = decode_csv(response)
+        if plan.aggregate_function and array.size == 1:
+            array = array.reshape(())
+        if decode != "xarray":
+            return array
+        try:
+            axis_labels = self.dbc.coverage_grid(self.coverage_name).axis_labels
+        except Exception:
+            axis_labels = None
+        return to_xarray(array, plan, axis_labels)
+
+    @staticmethod
+    def __encoding(plan: QueryPlan) -> str:
+        """Returns the encoding of a plan's response, csv for an aggregate."""
+        if plan.aggregate_function:
+            return "csv"
+        return plan.encode_type or ("image/png" if plan.color_cases else plan.polygon[1] if plan.polygon else "csv")
+
+    @staticmethod
+    def execute_many(datacubes: list, max_workers: int = 8, max_in_flight: int = None, optimize: bool = True):
         """
+        Generate the WCPS queries of many datacubes and execute them as one batch
+        through their (shared) DatabaseConnectionObject's execute_many.
 
-        #Contains the general operations related to the axis
-        operations_str = ','.join(self.operations)
-        #Contains the additional filtering operations
-        if self.extras == []:
-            extras_str = ""
+        :param datacubes (list): DatacubeObjects sharing the same dbc.
+        :param max_workers (int): number of worker threads sending queries.
+        :param max_in_flight (int): maximum number of queries submitted at once.
+        :param optimize (bool): If True, the queries are optimized first (see plan).
+
+        :return a list of (response, query, error) tuples, in the same order as datacubes.
+            A failing query has response None and its exception as error, the other ones have error None.
+            A datacube whose clamped ranges fell outside the coverage's extent is not sent and gets (b"", None, None).
+            Datacubes with the same query (same canonical form) share a single request.
+
+        :raises TypeError if datacubes is not a list of DatacubeObjects.
+        :raises ValueError if the datacubes don't share the same dbc.
+        """
+        if not isinstance(datacubes, (list, tuple)) or not all(isinstance(datacube, DatacubeObject) for datacube in datacubes):
+            raise TypeError("invalid datacubes type, expected type: list of DatacubeObject.")
+        if datacubes == []:
+            return []
+        dbc = datacubes[0].dbc
+        if any(datacube.dbc is not dbc for datacube in datacubes):
+            raise ValueError("All datacubes need to share the same DatabaseConnectionObject.")
+
+        plans = [None if datacube.empty_result else datacube.plan(optimize) for datacube in datacubes]
+        #every distinct query is sent once, in order of first appearance
+        unique = {}
+        for plan in plans:
+            if plan is not None:
+                unique.setdefault(plan.canonical(), plan)
+        results = dbc.execute_many([plan.render() for plan in unique.values()], max_workers, max_in_flight,
+                                   canonicals=list(unique))
+        results = dict(zip(unique, results))
+
+        batch = []
+        for plan in plans:
+            if plan is None:
+                batch.append((b"", None, None))
+            else:
+                response, error = results[plan.canonical()]
+                batch.append((response, plan.render(), error))
+        return batch
+
+    def estimate(self) -> QueryEstimate:
+        """
+        Estimate the cost of the (optimized) query before sending it: the grid cells it scans along
+        every axis, the cells and bytes of its response in every encoding, and its number of round trips.
+        The counts come from the coverage's grid, described once by the server (see
+        DatabaseConnectionObject.coverage_grid), and are None if it can't be described.
+
+        Example usage:
+        datacube.subset("Lat", "0:10").timerange("2012-01", "2012-12").estimate().output_bytes
+
+        :return the QueryEstimate. If a clamped range fell outside the coverage's extent, nothing is scanned.
+        """
+        plan = self.plan(optimize=True)
+        encoding = self.__encoding(plan)
+        if self.empty_result:
+            return QueryEstimate({}, 0, encoding, round_trips=0)
+        try:
+            grid = self.dbc.coverage_grid(self.coverage_name)
+        except Exception:
+            return QueryEstimate(None, None, encoding)
+        axes = count_cells(grid, plan.operations)
+        estimate = QueryEstimate(axes, 1 if plan.aggregate_function else math.prod(axes.values()), encoding)
+        #a query above a tiling guardrail is fetched by execute_tiled, one round trip per tile
+        if self.guardrail is not None and self.guardrail.action == "tile" and self.guardrail.exceeded(estimate):
+            try:
+                estimate.round_trips = len(self.tile_queries(self.guardrail.tile_bytes(), BYTES_PER_CELL["netcdf"])[0])
+            except ValueError:
+                pass
+        return estimate
+
+    def __check_guardrail(self, estimate: QueryEstimate = None) -> None:
+        """
+        Checks the query's estimate (worked out if not given) against the guardrail, before execute sends it.
+
+        :raises ValueError if the query goes over it, pointing to fetch / execute_tiled if the guardrail
+            tiles the queries and this one can be split into tiles.
+        """
+        if estimate is None:
+            estimate = self.estimate()
+        if not self.guardrail.exceeded(estimate):
+            return
+        message = f"The query goes over the guardrail: {estimate} for {self.guardrail}."
+        if self.guardrail.action == "tile" and self.__tileable(self.plan(optimize=True)):
+            message += " Use fetch or execute_tiled to fetch it as tiles."
+        raise ValueError(message)
+
+    @staticmethod
+    def __tileable(plan: QueryPlan) -> bool:
+        """Checks whether a plan can be split into tiles: not aggregated, clipped nor color switched."""
+        return not (plan.aggregate_function or plan.color_cases or plan.polygon
+                    or plan.encode_type not in (None, "csv", "netcdf"))
+
+    def _async_dbc(self):
+        """
+        Returns the datacube's dbc, making sure it supports asynchronous queries.
+
+        :raises TypeError if the dbc is not an AsyncDatabaseConnectionObject.
+        """
+        #imported here, so that the library works without aiohttp as long as nothing runs asynchronously
+        try:
+            from .async_database_connection import AsyncDatabaseConnectionObject
+        except ImportError:
+            raise TypeError("asynchronous execution requires aiohttp, and a dbc of type AsyncDatabaseConnectionObject.") from None
+        if not isinstance(self.dbc, AsyncDatabaseConnectionObject):
+            raise TypeError("invalid dbc type for asynchronous execution, expected type: AsyncDatabaseConnectionObject.")
+        return self.dbc
+
+    def plan(self, optimize: bool = False) -> QueryPlan:
+        """
+        Freeze the accumulated operations into an immutable QueryPlan.
+
+        :param optimize (bool): If True, the repeated axis subsets are intersected and the constant
+            arithmetic is folded (see query_optimizer.optimize).
+
+        :return the datacube's QueryPlan.
+        """
+        plan = QueryPlan(self.coverage_name, self.operations, self.extras, self.aggregate_function, self.encode_type,
+                         self.polygon_set, zip(self.color_cases, self.color_returns))
+        return optimize_plan(plan) if optimize else plan
+
+    def prepare(self, **placeholders) -> QueryTemplate:
+        """
+        Compile the datacube's query into a QueryTemplate for parameter sweeps: an axis subset
+        with a named placeholder is added for every keyword, and the template then renders,
+        validates and executes many parameter sets at once.
+
+        Example usage:
+        template = datacube.aggregate("avg").prepare(lat="Lat", lon="Long", date="ansi")
+        template.execute_many({"lat": [53.08, 40], "lon": [8.8, 12], "date": ["2014-01", "2014-02"]})
+
+        :param placeholders (str): The axis ('Lat', 'Long' or 'ansi') each placeholder subsets.
+
+        :return the QueryTemplate.
+
+        :raises ValueError if an axis is not one of 'Lat', 'Long' and 'ansi', is subset by more than
+            one placeholder, or is already subset by the datacube's operations.
+        """
+        if any(axis not in TEMPLATE_AXES for axis in placeholders.values()):
+            raise ValueError(f"The placeholders can only subset the axes {TEMPLATE_AXES}.")
+        if len(set(placeholders.values())) != len(placeholders):
+            raise ValueError("An axis can only be subset by one placeholder.")
+        plan = self.plan()
+        #the placeholders' subsets would be appended to the datacube's ones, not merged with them
+        subset = {parsed[0] for parsed in map(parse_subset, plan.operations) if parsed is not None}
+        overlapping = sorted(subset.intersection(placeholders.values()))
+        if overlapping:
+            raise ValueError(f"The datacube already subsets the axes {overlapping}.")
+        operations = plan.operations + tuple(f"{axis}({{{name}}})" for name, axis in placeholders.items())
+        plan = QueryPlan(plan.coverage_name, operations, plan.extras, plan.aggregate_function, plan.encode_type,
+                         plan.polygon, plan.color_cases)
+        return QueryTemplate(optimize_plan(plan).render(), self.dbc, self.coverage_name, placeholders)
+
+    def sample_points(self, points, time_range=None, max_query_length: int = MAX_QUERY_LENGTH,
+                      max_workers: int = 8, as_xarray: bool = False):
+        """
+        Sample the coverage at many (lat, lon) points in as few round trips as possible: the points
+        are validated at once against the coverage's cached bounds, then packed as the bands of
+        csv encoded structs, as many per query as max_query_length allows, and the queries are sent
+        as one batch through the dbc's execute_many. The datacube's filtering extras (e.g. to_Kelvin)
+        are applied to every sample; its axis operations are not, the points being the subset.
+
+        Example usage:
+        datacube.sample_points([(53.08, 8.8), (40, 12)], time_range="2014-01")
+
+        :param points (array-like): (lat, lon) pairs.
+        :param time_range (str, tuple): A date, or a (start, end) pair of dates, every point is sampled at.
+            If None, the whole time axis is sampled, if the coverage has one.
+        :param max_query_length (int): The maximum length of a query's text.
+        :param max_workers (int): number of worker threads sending queries.
+        :param as_xarray (bool): If True, the samples are returned as an xarray DataArray
+            with the points' latitudes and longitudes as coordinates.
+
+        :return a (n,) array of the samples, or a (n, steps) array of time series, in the same order as points.
+            With clamp set, the points outside the coverage's extent get NaN instead of raising.
+
+        :raises TypeError if the points or the dates have invalid types.
+        :raises ValueError if the points are not (lat, lon) pairs or out of the coverage's bounds,
+            or if the dates are invalid.
+        :raises Exception if the bounds are unavailable, or the first error of the failing queries.
+        """
+        points = np.asarray(points)
+        if points.size == 0:
+            points = points.reshape(0, 2)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError("points gotta be a sequence of (lat, lon) pairs.")
+        if points.dtype.kind not in "iuf":
+            raise TypeError("invalid points type, expected type: int or float.")
+        points = points.astype(float)
+
+        #validate everything before sending anything
+        validator = self.dbc.bounds_validator(self.coverage_name)
+        if self.clamp:
+            inside = validator.points_mask(points)
         else:
-            extras_str = ' '.join(self.extras)
-
-        #Constructs specific queries depending on the applied functions
-        if self.operations != []:
-            if self.aggregate_function:
-                query = f'''for $c in ({self.coverage_name}) return {self.aggregate_function}($c[{operations_str}]{extras_str})'''
-            elif self.encode_type:
-                query = f'''for $c in ({self.coverage_name}) return encode($c[{operations_str}]{extras_str}, "{self.encode_type}")'''
-            elif self.color_cases != []:
-                query = f'''for $c in ({self.coverage_name}) \nreturn encode(\n\tswitch
-                    case $c[{operations_str}] = 99999 return {{red: 255; green: 255; blue: 255}}\n'''    
-                query += f'''\t\t{self.color_cases[0]} > $c[{operations_str}] {self.color_returns[0]}\n'''
-                for i in range(1, len(self.color_cases)):
-                    query += f'''\t\t{self.color_cases[i]} > $c[{operations_str}] {self.color_returns[i]}\n'''
-                query += '''\t\tdefault return {red: 255; green: 0; blue: 0}, "image/png")'''
+            validator.check_points(points)
+            inside = np.ones(len(points), dtype=bool)
+        time_slice = ""
+        if time_range is not None:
+            if isinstance(time_range, str):
+                start, end = time_range, None
+            elif isinstance(time_range, (tuple, list)) and len(time_range) == 2:
+                start, end = time_range
             else:
-                query = f'''for $c in ({self.coverage_name}) return encode($c[{operations_str}]{extras_str}, "csv")'''
+                raise TypeError("invalid time_range type, expected type: str or (str, str) tuple.")
+            validator.check_years(start, end)
+            time_slice = f',ansi("{start}")' if end is None else f',ansi("{start}":"{end}")'
+
+        terms = point_terms(points[inside], time_slice, ' '.join(fold_arithmetic(self.extras)))
+        queries = pack_queries(self.coverage_name, terms, max_query_length)
+        results = self.dbc.execute_many([query for query, _ in queries], max_workers)
+        for _, error in results:
+            if error is not None:
+                raise error
+        samples = [parse_samples(response, count) for (_, count), (response, _) in zip(queries, results)]
+
+        steps = samples[0].shape[1:] if samples else ()
+        values = np.full((len(points),) + steps, np.nan)
+        if samples:
+            values[inside] = np.concatenate(samples)
+        if not as_xarray:
+            return values
+        return xr.DataArray(values, dims=("point", "ansi")[:values.ndim], name=self.coverage_name,
+                            coords={"lat": ("point", points[:, 0]), "lon": ("point", points[:, 1])})
+
+    def execute_chunked(self, steps_per_chunk: int = None, max_bytes: int = None, bytes_per_step: int = None,
+                        unit: str = "M", time_axis: int = 0, max_workers: int = 8, retries: int = 2):
+        """
+        Execute a query over a long ansi range as consecutive time chunks: the range set with timerange
+        is split into chunks of steps_per_chunk time steps (or as many as max_bytes holds, at bytes_per_step
+        each), the chunks are sent concurrently through the dbc's execute_many, the failing ones are
+        sent again, and the csv responses are stitched back into one time ordered array.
+        The steps are the coverage's own ones when its grid lists them (see DatabaseConnectionObject.coverage_grid),
+        units of time otherwise.
+
+        Example usage:
+        datacube.subset("Lat", "40:60").timerange("1950-01", "2020-12").execute_chunked(steps_per_chunk=120)
+
+        :param steps_per_chunk (int): The number of time steps of a chunk.
+        :param max_bytes (int): The maximum size of a chunk's response, instead of steps_per_chunk.
+        :param bytes_per_step (int): The (estimated) size of one time step of the response, needed with max_bytes.
+        :param unit (str): The unit the steps are counted in, one of 'Y', 'M' and 'D', if the coverage's grid
+            doesn't list its time steps. It can't be finer than the time steps' resolution.
+        :param time_axis (int): The position of the ansi axis among the result's axes.
+        :param max_workers (int): number of worker threads sending queries.
+        :param retries (int): how many more times a failing chunk is sent.
+
+        :return a (stitched array, chunks' queries) tuple.
+            If a clamped range fell outside the coverage's extent, nothing is sent and (empty array, []) is returned.
+
+        :raises ValueError if the query has no ansi range, is aggregated or not csv encoded,
+            or if the chunks' sizes or unit are invalid.
+        :raises Exception the error of the first chunk still failing after its retries.
+        """
+        if (steps_per_chunk is None) == (max_bytes is None):
+            raise ValueError("Exactly one of steps_per_chunk and max_bytes gotta be given.")
+        if max_bytes is not None:
+            steps_per_chunk = steps_for_budget(max_bytes, bytes_per_step)
+        if unit not in CHUNK_UNITS:
+            raise ValueError(f"unit gotta be one of {CHUNK_UNITS}.")
+        if self.empty_result:
+            return np.empty(0), []
+
+        plan = self.plan(optimize=True)
+        if plan.aggregate_function or plan.color_cases or plan.polygon or plan.encode_type not in (None, "csv"):
+            raise ValueError("Only csv encoded queries without aggregation can be split into time chunks.")
+        #the optimizer merged the ansi subsets, if there were several
+        ranges = [(index, parse_subset(operation)) for index, operation in enumerate(plan.operations)]
+        ranges = [(index, parsed) for index, parsed in ranges if parsed is not None and parsed[0] == "ansi" and not parsed[3]]
+        if len(ranges) != 1:
+            raise ValueError("The query needs a single ansi range, set with timerange, to be split into time chunks.")
+        index, (_, low, high, _) = ranges[0]
+        start, end = low[1].strip('"'), high[1].strip('"')
+
+        #the chunks follow the coverage's own time steps when its grid lists them,
+        #the units of time being checked against their resolution otherwise
+        try:
+            grid = self.dbc.coverage_grid(self.coverage_name)
+        except Exception:
+            grid = None
+        if grid is not None and grid.points.get("ansi"):
+            chunks = chunk_points(start, end, grid.points["ansi"], steps_per_chunk)
         else:
-            if self.polygon_set:
-                query = f'''for $c in ({self.coverage_name}) {self.polygon_set[0]} return encode (clip($c, $polygon), "{self.polygon_set[1]}")'''
+            resolution = grid.resolution("ansi") if grid is not None and "ansi" in grid.axis_labels else None
+            chunks = chunk_ranges(start, end, steps_per_chunk, unit, resolution)
+
+        queries = []
+        for start, end in chunks:
+            operations = list(plan.operations)
+            operations[index] = f'ansi("{start}":"{end}")'
+            queries.append(QueryPlan(plan.coverage_name, operations, plan.extras).render())
+        responses = execute_chunks(self.dbc, queries, max_workers, retries)
+        return stitch(responses, time_axis), queries
+
+    def tile_queries(self, max_bytes: int = MAX_TILE_BYTES, bytes_per_cell: int = 4):
+        """
+        Split the query's Lat / Long bounding box into a grid of tiles whose responses fit in max_bytes:
+        the coverage's grid (see DatabaseConnectionObject.coverage_grid) gives the number of cells of
+        the box, and of the ansi range if any, from which the tiles' sizes are derived. An axis without
+        subset is tiled over the coverage's whole extent, a sliced axis isn't tiled.
 
-        response = self.dbc.execute_query(query)
-        return response, query
+        :param max_bytes (int): The maximum size of a tile's response.
+        :param bytes_per_cell (int): The size of one cell of the response.
+
+        :return a (tiles' netcdf queries, latitude edges, longitude edges) tuple, the queries in row-major order.
+
+        :raises ValueError if the sizes are not positive integers, if the query is aggregated, clipped or
+            color switched, or if the coverage has no Lat / Long axes.
+        :raises Exception if the coverage's grid can't be described by the server.
+        """
+        for name, value in (("max_bytes", max_bytes), ("bytes_per_cell", bytes_per_cell)):
+            if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+                raise ValueError(f"{name} gotta be a positive integer.")
+        plan = self.plan(optimize=True)
+        if not self.__tileable(plan):
+            raise ValueError("Only queries without aggregation, clipping nor color switching can be split into tiles.")
+        grid = self.dbc.coverage_grid(self.coverage_name)
+
+        #the box (and the time steps) the query covers, the axes without subset spanning the whole extent
+        resolutions = (grid.resolution("Lat"), grid.resolution("Long"))
+        ranges, positions = {}, {}
+        steps = grid.cells_within("ansi") if "ansi" in grid.axis_labels else 1
+        for index, operation in enumerate(plan.operations):
+            parsed = parse_subset(operation)
+            if parsed is None:
+                continue
+            axis, low, high, _ = parsed
+            if axis in ("Lat", "Long"):
+                ranges[axis] = (low[0], high[0])
+                positions[axis] = index
+            elif axis == "ansi":
+                steps = grid.cells_within(axis, low[0], high[0])
+        for axis in ("Lat", "Long"):
+            if axis not in ranges:
+                index = grid.axis_labels.index(axis)
+                ranges[axis] = (grid.lower[index], grid.upper[index])
+
+        max_cells = max(1, max_bytes // (bytes_per_cell * max(steps, 1)))
+        lat_edges, lon_edges = plan_tiles(ranges["Lat"], ranges["Long"], resolutions, max_cells)
+        queries = []
+        for lat_low, lat_high in zip(lat_edges[:-1], lat_edges[1:]):
+            for lon_low, lon_high in zip(lon_edges[:-1], lon_edges[1:]):
+                operations = list(plan.operations)
+                for axis, low, high in (("Lat", lat_low, lat_high), ("Long", lon_low, lon_high)):
+                    #a sliced axis keeps its slice
+                    range_str = _format_bound(low) if low == high else f"{_format_bound(low)}:{_format_bound(high)}"
+                    if axis in positions:
+                        operations[positions[axis]] = f"{axis}({range_str})"
+                    else:
+                        operations.append(f"{axis}({range_str})")
+                queries.append(QueryPlan(plan.coverage_name, operations, plan.extras, encode_type="netcdf").render())
+        return queries, lat_edges, lon_edges
+
+    def execute_tiled(self, max_bytes: int = None, bytes_per_cell: int = 4, max_workers: int = 8,
+                      retries: int = 2):
+        """
+        Execute a large Lat / Long subset as a grid of tiles (see tile_queries) fetched in parallel
+        through the dbc's execute_many, the failing tiles being sent again, and mosaic them into one
+        xarray Dataset. Every tile is trimmed to its half-open share of the box first, so the rows and
+        columns on the tiles' edges are neither repeated nor left out.
+
+        Example usage:
+        dataset, queries = datacube.subset("Lat", "-60:60").subset("Long", "-120:120").execute_tiled(16 << 20)
+
+        :param max_bytes (int): The maximum size of a tile's response, defaults to the budget of the
+            datacube's guardrail if its action is 'tile' (see Guardrail.tile_bytes), to MAX_TILE_BYTES otherwise.
+        :param bytes_per_cell (int): The size of one cell of the response.
+        :param max_workers (int): number of worker threads sending queries.
+        :param retries (int): how many more times a failing tile is sent.
+
+        :return a (mosaic Dataset, tiles' queries) tuple.
+            If a clamped range fell outside the coverage's extent, nothing is sent and (empty Dataset, []) is returned.
+
+        :raises ValueError if the query can't be split into tiles (see tile_queries).
+        :raises Exception the error of the first tile still failing after its retries.
+        """
+        if max_bytes is None:
+            tiling = self.guardrail is not None and self.guardrail.action == "tile"
+            max_bytes = self.guardrail.tile_bytes() if tiling else MAX_TILE_BYTES
+        if self.empty_result:
+            return xr.Dataset(), []
+        queries, lat_edges, lon_edges = self.tile_queries(max_bytes, bytes_per_cell)
+        responses = execute_chunks(self.dbc, queries, max_workers, retries)
+        return mosaic([open_tile(response) for response in responses], lat_edges, lon_edges), queries
+
+    def fetch(self, bytes_per_cell: int = 4, max_workers: int = 8, retries: int = 2):
+        """
+        Fetch the query's result as an xarray Dataset, applying the guardrail: a query within it is sent
+        as one netcdf query, a query above a tiling guardrail is split into tiles sized after its budget
+        and mosaicked (see execute_tiled), and a query above a refusing guardrail is refused.
+
+        Example usage:
+        datacube = DatacubeObject(dbc, "AvgLandTemp", guardrail=Guardrail(max_bytes=64 << 20, action="tile"))
+        dataset, queries = datacube.subset("Lat", "-60:60").subset("Long", "-120:120").fetch()
+
+        :param bytes_per_cell (int): The size of one cell of the tiles' responses.
+        :param max_workers (int): number of worker threads sending the tiles' queries.
+        :param retries (int): how many more times a failing tile is sent.
+
+        :return a (Dataset, sent queries) tuple, with a single query if the query wasn't tiled.
+            If a clamped range fell outside the coverage's extent, nothing is sent and (empty Dataset, []) is returned.
+
+        :raises ValueError if the query is aggregated, clipped or color switched, or if it goes over
+            a guardrail whose action is 'refuse'.
+        :raises Exception the error of the query, or of the first tile still failing after its retries.
+        """
+        if self.empty_result:
+            return xr.Dataset(), []
+        plan = self.plan(optimize=True)
+        if not self.__tileable(plan):
+            raise ValueError("Only queries without aggregation, clipping nor color switching can be fetched as a Dataset.")
+        if self.guardrail is not None:
+            estimate = self.estimate()
+            #the guardrail is checked against the size of the netcdf response fetch asks for
+            estimate.encoding = "netcdf"
+            if self.guardrail.action == "tile" and self.guardrail.exceeded(estimate):
+                return self.execute_tiled(self.guardrail.tile_bytes(), bytes_per_cell, max_workers, retries)
+            self.__check_guardrail(estimate)
+        plan = QueryPlan(plan.coverage_name, plan.operations, plan.extras, encode_type="netcdf")
+        canonical = plan.canonical() if self.dbc.cache is not None else None
+        response = self.dbc.execute_query(plan.render(), canonical=canonical)
+        return open_tile(response), [plan.render()]
+
+    def build_query(self, optimize: bool = False):
+        """
+        Generate the WCPS query based on accumulated operations, without executing it.
+
+        :param optimize (bool): If True, the query is optimized first, as execute does.
+
+        :return the WCPS query as a string.
+        """
+        return self.plan(optimize).render()
     
     def add_condition(self, operator:str, arg):
         '''
@@ -363,6 +842,9 @@ class DatacubeObject:
         :param start (str): The start date of the time range.
         :param end (str): The end date of the time range.
         
+        With clamp set, the period is intersected with the coverage's extent; a period entirely outside
+        of it marks the datacube as empty (see empty_result) instead of raising.
+
         :return self to allow for method chaining
 
         :raises ValueError if start and end are invalid or out of bounds
@@ -374,6 +856,20 @@ class DatacubeObject:
         if end and not isinstance(end, str):
             raise TypeError("invalid end type, expected type: str.")
 
+        #With clamp set, the period is intersected with the coverage's extent
+        if self.clamp:
+            interval = self.dbc.bounds_validator(self.coverage_name).clamp_years(start, end)
+            if interval is None:
+                self.empty_result = True
+                return self
+            #the dates are only rewritten if the extent actually cut the period
+            if interval[0] != parse_date(start):
+                start = interval[0].isoformat()
+            if end and interval[1] != parse_date(end):
+                end = interval[1].isoformat()
+            self.operations.append(f"ansi(\"{start}\":\"{end}\")" if end else f"ansi(\"{start}\")")
+            return self
+
         #Check the dates and if applicable add them to the operations list
         if start and end:
             self.check_years(start, end)
@@ -401,17 +897,20 @@ class DatacubeObject:
         return self
     
 
-    def polygon(self, coordinates: list):
+    def polygon(self, coordinates: list, tolerance: float = None):
         '''
         Clips data within a polygonal area and creates either a csv or an image response based on its dimensions.
 
         :param coordinates (list): A list of tuples of coordinates that define the polygon - tuples of size as big as the axis' number of the coverage.
+        :param tolerance (float): If given, the polygon is simplified (Douglas-Peucker) before being embedded in the query:
+            vertices closer than tolerance (in degrees) to the simplified outline are dropped,
+            but for the dated vertices whose date differs from one of their neighbours'.
 
         :return self to allow for method chaining
 
         raises ValueError if the coordinates list and its elements are invalid or out of order.
         raises TypeError if the provided parameters are of invalid data types.
-        raises NotImplemented if a tuple of 1 pair or more than 3 is given.
+        raises NotImplementedError if tuples of 1 or more than 3 coordinates are given.
         '''
 
         #Check the parameters' data types
@@ -422,24 +921,23 @@ class DatacubeObject:
         if len(coordinates) < 3:
             raise ValueError("Polygon must have at least 3 coordinates")
 
-        #Check the latitudes and longitudes
-        if len(coordinates[0]) == 2:
-            for lat, lon in coordinates:
-                self.check_lat(lat)
-                self.check_lon(lon)
-            #Prepare a string to be used when building the query
+        #Check the latitudes, longitudes (and dates) of all the vertices at once
+        points, dates = vertices_array(coordinates)
+        validator = self.dbc.bounds_validator(self.coverage_name)
+        validator.check_points(points)
+        if dates is not None:
+            validator.check_years_array(dates)
+
+        if tolerance is not None:
+            coordinates = [coordinates[i] for i in simplify(points, tolerance, dates)]
+
+        #Prepare a string to be used when building the query
+        if dates is None:
             polygon_string = ", ".join([f"{lat} {lon}" for lat, lon in coordinates])
             self.polygon_set = f"let $polygon := POLYGON(({polygon_string}))", "image/png"
-        elif len(coordinates[0]) == 3:
-            for lat, lon, date in coordinates:
-                self.check_lat(lat)
-                self.check_lon(lon)
-                self.check_years(date)
-            #Prepare a string to be used when building the query
+        else:
             polygon_string = ", ".join([f"\"{date}\" {lat} {lon}" for lat, lon, date in coordinates])
             self.polygon_set = f"let $polygon := POLYGON(({polygon_string}))", "csv"
-        else:
-            raise NotImplemented
 
         return self
     
@@ -518,6 +1016,49 @@ class DatacubeObject:
     ########Adding more dynamic functionality which allows for combining different results and even data from different coverages.########
     '''
 
+    @property
+    def d_query_vars(self) -> list:
+        """The initialized variables, in initialization order (a copy: use init_var / clear_var_data to change them)."""
+        return list(self.__variables)
+
+    @d_query_vars.setter
+    def d_query_vars(self, variables: list) -> None:
+        """Replaces the variables, the ones already initialized keeping their coverage and main operation."""
+        self.__variables = {variable: self.__variables.get(variable, (None, None)) for variable in variables}
+
+    @property
+    def d_coverages(self) -> list:
+        """The coverage of each variable, in the same order as d_query_vars."""
+        return [cov for cov, _ in self.__variables.values()]
+
+    @d_coverages.setter
+    def d_coverages(self, coverages: list) -> None:
+        """Sets the coverages of the first len(coverages) variables."""
+        self.__set_column(0, coverages)
+
+    @property
+    def d_main_operations(self) -> list:
+        """The main operation of each variable (None if unset), in the same order as d_query_vars."""
+        return [com for _, com in self.__variables.values()]
+
+    @d_main_operations.setter
+    def d_main_operations(self, operations: list) -> None:
+        """Sets the main operations of the first len(operations) variables."""
+        self.__set_column(1, operations)
+
+    def __set_column(self, column: int, values: list) -> None:
+        """
+        Sets one field of the registry's entries, in variable order.
+
+        :raises ValueError if there are more values than variables.
+        """
+        if len(values) > len(self.__variables):
+            raise ValueError("There can only be one value per variable.")
+        for variable, value in zip(list(self.__variables), values):
+            entry = list(self.__variables[variable])
+            entry[column] = value
+            self.__variables[variable] = tuple(entry)
+
     def extract_variables(self, command:str):
         '''
         Extract variables from a command string.
@@ -555,7 +1096,7 @@ class DatacubeObject:
         temp = self.extract_variables(command)
         #remove the repetitions and check if the variable has already been stored
         temp = set(temp)
-        if temp.issubset(set(self.d_query_vars)):
+        if temp.issubset(self.__variables.keys()):
             return True
         else:
             raise ValueError("The variables do not exist")
@@ -580,13 +1121,8 @@ class DatacubeObject:
             raise TypeError("Invalid variable type, expected type: str.")
         
         variable = "$" + variable
-        self.d_query_vars.append(variable)
-
-        while len(self.d_coverages) < len(self.d_query_vars):
-            self.d_coverages.append(None)
-        idx = self.d_query_vars.index(variable)
-        self.d_coverages[idx] = coverage_name
-        
+        #an already initialized variable keeps its place and main operation
+        self.__variables[variable] = (coverage_name, self.__variables.get(variable, (None, None))[1])
         return self
     
     def main_subset(self, var, command):
@@ -615,10 +1151,9 @@ class DatacubeObject:
         if not re.match(r"\$[a-zA-Z_]\w*", var):
             raise ValueError("Invalid var format, expected pattern: '$*'.")
 
-        while len(self.d_main_operations) < len(self.d_query_vars):
-                self.d_main_operations.append(None)
-        idx = self.d_query_vars.index(var)
-        self.d_main_operations[idx] = command
+        if var not in self.__variables:
+            raise ValueError("The variable does not exist")
+        self.__variables[var] = (self.__variables[var][0], command)
         return self
     
     def reset(self):
@@ -627,9 +1162,7 @@ class DatacubeObject:
 
         :return self: The instance of the class for method chaining.
         '''
-        self.d_main_operations = []
-        self.d_query_vars = []
-        self.d_coverages = []
+        self.__variables = {}
         self.d_agg_func = None
         self.d_encoding_type = ''
         return self
@@ -649,12 +1182,9 @@ class DatacubeObject:
             raise TypeError("Invalid var type, expected type: str.")
         if not re.match(r"\$[a-zA-Z_]\w*", var):
             raise ValueError("Invalid var format, expected pattern: '$*'.")
-        if var not in self.d_query_vars:
+        if var not in self.__variables:
             raise ValueError("The variable does not exist")
-        idx = self.d_query_vars.index(var)
-        del self.d_coverages[idx]
-        del self.d_main_operations[idx]
-        del self.d_query_vars[idx]
+        del self.__variables[var]
         return self
 
     def d_encoding(self, type):
@@ -753,9 +1283,29 @@ class DatacubeObject:
         self.d_combination_query = complex_command
         return self
 
+    def shared_variables(self):
+        '''
+        Map every variable to the first variable bound to the same coverage with the same main subset
+        (compared in their normalized form), so that identical variables are iterated over only once.
+
+        Example usage:
+        datacube.init_var("AvgLandTemp", "c").main_subset('$c', 'Lat(53), ansi("2014-01")')
+        datacube.init_var("AvgLandTemp", "d").main_subset('$d', 'Lat(53),ansi("2014-01")')
+        datacube.shared_variables() - {'$c': '$c', '$d': '$c'}
+
+        :return dict: The representative variable of each variable.
+        '''
+        first, aliases = {}, {}
+        for variable, (cov, com) in self.__variables.items():
+            key = (cov, normalize_query(com) if com is not None else None)
+            aliases[variable] = first.setdefault(key, variable)
+        return aliases
+
     def replace_vars(self, command_used=None, specify_var=None):
         '''
         Replace variables in a command with their corresponding subsets.
+        Variables sharing their coverage and main subset with a previous one (see shared_variables)
+        are replaced by that variable, and only the remaining ones are iterated over.
 
         :param command_used (str, optional): The command string to use for replacing variables.
         :param specify_var (str, optional): The variable to specifically replace.
@@ -771,48 +1321,26 @@ class DatacubeObject:
             raise TypeError("Invalid command type. Expected type: str")
         if specify_var and not isinstance(specify_var, str):
             raise TypeError("Invalid variable type. Expected type: str")
+
+        #a specified variable is iterated over on its own, otherwise the shared variables are collapsed
+        aliases = {specify_var: specify_var} if specify_var else self.shared_variables()
+        iterated = [(variable, com, cov) for variable, (cov, com) in self.__variables.items()
+                    if aliases.get(variable) == variable]
+        expression1 = ', '.join(f'{variable} in ({cov})' for variable, _, cov in iterated)
+
         if command_used is not None:
             self.var_existence(command_used)
-            expression2 = command_used
-            #iterate over tuples of variables and corresponding subsets
-            for i, (variable, com, cov) in enumerate(zip(self.d_query_vars, self.d_main_operations, self.d_coverages)):
-                if specify_var and variable == specify_var:
-                    expression1 += f'{variable} in ({cov})'
-                    if com is not None:
-                        #replace the variable in the expression with its subset
-                        expression2 = expression2.replace(variable, f'{variable}[{com}]')
-                elif not specify_var:
-                    expression1 += f'{variable} in ({cov})'
-                    if i < len(self.d_query_vars) - 1:  #Check if it's not the last iteration
-                        expression1 += ', '
-                    if com is not None:
-                        #replace the variable in the expression with its subset
-                        expression2 = expression2.replace(variable, f'{variable}[{com}]')
-        else:
-            for i, (variable, com, cov) in enumerate(zip(self.d_query_vars, self.d_main_operations, self.d_coverages)):
-                if specify_var and variable == specify_var:
-                    expression1 += f'{variable} in ({cov})'
-                    if com is not None:
-                        #replace the variable in the expression with its subset
-                        expression2 = f'{variable} [{com}]'
-                    else:
-                        #if no subset exists, simply append the variable
-                        expression2 += f'''{variable}'''
-                    
-                elif not specify_var:
-                    expression1 += f'{variable} in ({cov})'
-                    if i < len(self.d_query_vars) - 1:
-                        expression1 += ', '
-                    if com is not None:
-                        #replace the variable in the expression with its subset
-                        expression2 = f'{variable} [{com}]'
-                    else:
-                        #if no subset exists, simply append the variable
-                        expression2 += f'''{variable}'''
+            subsets = {variable: f'{variable}[{com}]' if com is not None else variable for variable, com, _ in iterated}
+            #replace every variable in the expression with its subset, in a single pass
+            expression2 = _VARIABLE.sub(lambda match: subsets.get(aliases.get(match.group(0)), match.group(0)), command_used)
+        elif iterated:
+            #without a command, the expression is the (last) iterated variable, with its subset if it has one
+            variable, com, _ = iterated[-1]
+            expression2 = f'{variable} [{com}]' if com is not None else variable
 
         return expression1, expression2
         
-    def d_execute(self, specify_var=None):
+    def d_execute(self, specify_var=None, decode: bool = False):
         '''
         Execute the data cube operation and return the result.
         
@@ -820,9 +1348,68 @@ class DatacubeObject:
         datacube.d_execute("$c")
 
         :param specify_var (str, optional): The variable to specifically execute the operation on.
+        :param decode (bool): If True, the csv response is decoded into a NumPy array shaped after
+            its {} nesting (see csv_decoder.decode_csv), an aggregate's into a 0-d array.
+
+        :return tuple: A tuple containing the response from the database and the executed WCPS query.
+
+        :raises TypeError: If specify_var is provided but not a string.
+        :raises ValueError: If decode is set for a query that is not csv encoded,
+            or the response is not a regular csv array of numbers.
+        '''
+        self.d_check_decode(decode)
+        wcps_query = self.d_build_query(specify_var)
+        response = self.dbc.execute_query(wcps_query)
+        return (self.d_decode(response) if decode else response), wcps_query
+
+    async def d_execute_async(self, specify_var=None, decode: bool = False):
+        '''
+        Awaitable counterpart of d_execute, for a datacube whose dbc is an AsyncDatabaseConnectionObject.
+
+        :param specify_var (str, optional): The variable to specifically execute the operation on.
+        :param decode (bool): If True, the csv response is decoded (see d_execute).
 
         :return tuple: A tuple containing the response from the database and the executed WCPS query.
 
+        :raises TypeError: If specify_var is provided but not a string, or the dbc does not support asynchronous queries.
+        :raises ValueError: If the response can't be decoded (see d_execute).
+        '''
+        dbc = self._async_dbc()
+        self.d_check_decode(decode)
+        wcps_query = self.d_build_query(specify_var)
+        response = await dbc.execute_query_async(wcps_query)
+        return (self.d_decode(response) if decode else response), wcps_query
+
+    def d_check_decode(self, decode):
+        '''
+        Check that the dynamic query's response can be decoded if decode is set.
+
+        :raises ValueError: If decode is not a bool, or the query is not csv encoded.
+        '''
+        if not isinstance(decode, bool):
+            raise ValueError("decode gotta be True or False.")
+        if decode and not self.d_agg_func and self.d_encoding_type not in ('', 'csv'):
+            raise ValueError("Only the csv encoded responses can be decoded.")
+
+    def d_decode(self, response):
+        '''
+        Decode the dynamic query's csv response into a NumPy array, an aggregate's into a 0-d array.
+
+        :raises ValueError: If the response is not a regular csv array of numbers.
+        '''
+        array = decode_csv(response)
+        if self.d_agg_func and array.size == 1:
+            array = array.reshape(())
+        return array
+
+    def d_build_query(self, specify_var=None):
+        '''
+        Generate the dynamic WCPS query used by d_execute, without executing it.
+
+        :param specify_var (str, optional): The variable to specifically execute the operation on.
+
+        :return str: The WCPS query.
+
         :raises TypeError: If specify_var is provided but not a string.
         '''
         if specify_var and not isinstance(specify_var, str):
@@ -837,8 +1424,6 @@ class DatacubeObject:
         wcps_query += " return "
         if self.d_agg_func:
             wcps_query += self.d_agg_func
-            response = self.dbc.execute_query(wcps_query)
-            return response, wcps_query    
         else:
             temp_query = ''
             if self.d_combination_query:
@@ -850,8 +1435,7 @@ class DatacubeObject:
                 wcps_query += f'''encode ({temp_query}, "{self.d_encoding_type}")'''
             else:
                 wcps_query += f'''encode ({temp_query}, "csv")'''
-            response = self.dbc.execute_query(wcps_query)
-            return response, wcps_query
+        return wcps_query
         
     def sobel_edge_detection_query(self, coverage_var, band="red", x_range=(-1, 1), y_range=(-1, 1), cut_out=None, encoding="image/jpeg"):
         """
@@ -932,6 +1516,18 @@ class DatacubeObject:
         
         return response, query
 
+    async def d_execute_sobel_async(self, coverage_var, band="red", x_range=(-1, 1), y_range=(-1, 1), cut_out=None, encoding="image/jpeg"):
+        """
+        Awaitable counterpart of d_execute_sobel, for a datacube whose dbc is an AsyncDatabaseConnectionObject.
+
+        Returns:
+            tuple: A tuple containing the response from the query execution and the query itself.
+        """
+        dbc = self._async_dbc()
+        query = self.sobel_edge_detection_query(coverage_var, band, x_range, y_range, cut_out, encoding)
+        response = await dbc.execute_query_async(query)
+        return response, query
+
 
     def  nir_green_red_ratio(self, coverage_var, red_band="red", green_band="green", threshold=0, encoding="jpeg"):
         """
@@ -978,3 +1574,15 @@ class DatacubeObject:
         query = self.nir_green_red_ratio(coverage_var, red_band, green_band, threshold, encoding)
         response = self.dbc.execute_query(query)
         return response, query
+
+    async def d_execute_nir_green_red_ratio_async(self, coverage_var, red_band="red", green_band="green", threshold=0, encoding="jpeg"):
+        """
+        Awaitable counterpart of d_execute_nir_green_red_ratio, for a datacube whose dbc is an AsyncDatabaseConnectionObject.
+
+        Returns:
+            tuple: A tuple containing the response from the query execution and the query itself.
+        """
+        dbc = self._async_dbc()
+        query = self.nir_green_red_ratio(coverage_var, red_band, green_band, threshold, encoding)
+        response = await dbc.execute_query_async(query)
+        return response, query
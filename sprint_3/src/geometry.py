@@ -0,0 +1,111 @@
+import numpy as np
+
+def vertices_array(coordinates: list) -> tuple:
+    """
+    Converts a polygon's vertices to a NumPy array in one pass.
+
+    :param coordinates: list of (lat, lon) or (lat, lon, date) tuples, all of the same size.
+    :return: a (points, dates) pair: points is an (n, 2) float array of the
+        latitudes and longitudes, dates the list of dates (None for 2D vertices).
+
+    :raises TypeError if a vertex is not a tuple / list, or a coordinate is not a number.
+    :raises ValueError if the vertices don't all have the same size.
+    :raises NotImplementedError if the vertices have another size than 2 or 3.
+    """
+    if not all(isinstance(vertex, (tuple, list)) for vertex in coordinates):
+        raise TypeError("invalid vertex type, expected type: tuple.")
+    sizes = {len(vertex) for vertex in coordinates}
+    if len(sizes) != 1:
+        raise ValueError("All the polygon's vertices must have the same size.")
+    size = sizes.pop()
+    if size not in (2, 3):
+        raise NotImplementedError("Only (lat, lon) and (lat, lon, date) vertices are supported.")
+
+    columns = list(zip(*coordinates))
+    lat, lon = np.asarray(columns[0]), np.asarray(columns[1])
+    # integer and float columns only, anything else (strings, None, bools, ...) gives another dtype
+    if lat.dtype.kind not in "iuf" or lon.dtype.kind not in "iuf":
+        raise TypeError("invalid lat / lon type, expected type: int or float.")
+    return np.column_stack((lat, lon)).astype(float), (list(columns[2]) if size == 3 else None)
+
+def _line_distances(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Distances of points to the line through start and end (to start itself if they coincide)."""
+    offsets = points - start
+    segment = end - start
+    length = np.hypot(*segment)
+    if length == 0:
+        return np.hypot(*offsets.T)
+    # perpendicular distance, through the 2D cross product
+    return np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+
+def _douglas_peucker(points: np.ndarray, start: int, end: int, tolerance: float, keep: np.ndarray) -> None:
+    """Marks in keep the vertices of the chain start..end the simplification retains."""
+    stack = [(start, end)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        distances = _line_distances(points[start + 1:end], points[start], points[end])
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            farthest += start + 1
+            keep[farthest] = True
+            stack.append((start, farthest))
+            stack.append((farthest, end))
+
+def simplify(points: np.ndarray, tolerance: float, dates: list = None) -> np.ndarray:
+    """
+    Simplifies a polygon's ring with the Douglas-Peucker algorithm: vertices
+    closer than tolerance to the simplified outline are dropped.
+    The ring is split between its first vertex and the vertex farthest from
+    it, so both halves are simplified as open chains and at least 3
+    vertices are kept. For dated vertices, a vertex whose date differs from
+    one of its neighbours' is always kept, and splits the chains as well,
+    so the polygon's temporal footprint is left unchanged.
+
+    :param points: (n, 2) array of the ring's vertices. The ring is closed
+        implicitly, or explicitly by repeating the first vertex at the end.
+    :param tolerance: maximum distance, in the coordinates' unit, between a
+        dropped vertex and the simplified outline.
+    :param dates: optional list of the vertices' dates, one per point.
+    :return: sorted array of the indices of the kept vertices.
+
+    :raises ValueError if tolerance is not a non negative number.
+    """
+    if isinstance(tolerance, bool) or not isinstance(tolerance, (int, float)) or tolerance < 0:
+        raise ValueError("tolerance gotta be a non negative number.")
+    count = len(points)
+    if count <= 3:
+        return np.arange(count)
+
+    # a closing vertex repeating the first one is kept as it is
+    closed = bool(np.all(points[0] == points[-1]))
+    ring = points[:-1] if closed else points
+    size = len(ring)
+    # the ring's chain goes back to its first vertex, repeated at index size
+    chain = np.vstack((ring, ring[:1]))
+
+    keep = np.zeros(size + 1, dtype=bool)
+    keep[0] = keep[size] = True
+    split = int(np.argmax(np.hypot(*(ring - ring[0]).T)))
+    keep[split] = True
+    if dates is not None:
+        # the vertices where the date changes, on either side
+        ring_dates = np.asarray(dates[:size], dtype=object)
+        changes = (ring_dates != np.roll(ring_dates, 1)).astype(bool)
+        keep[:size] |= changes | np.roll(changes, -1)
+    anchors = np.flatnonzero(keep)
+    for start, end in zip(anchors[:-1], anchors[1:]):
+        _douglas_peucker(chain, int(start), int(end), tolerance, keep)
+    keep = keep[:size]
+
+    if np.count_nonzero(keep) < 3:
+        # a flat ring still needs a third vertex: the one farthest from the kept chord
+        distances = _line_distances(ring, ring[0], ring[split])
+        distances[keep] = -1
+        keep[int(np.argmax(distances))] = True
+
+    kept = np.flatnonzero(keep)
+    if closed:
+        kept = np.append(kept, count - 1)
+    return kept
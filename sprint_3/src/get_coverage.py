@@ -1,6 +1,9 @@
+import os
+import tempfile
 import xml.etree.ElementTree as ET
 import requests
 from .type_request import type_request
+from .coverage_catalog import CoverageCatalogBuilder
 
 def formatText(string: str) -> str:
     """
@@ -40,115 +43,259 @@ def isBlank(string : str) -> bool:
     else:
         raise ValueError("Expected str type variable.")
 
-def getAvailableRequests(
-        url : str ="https://ows.rasdaman.org/rasdaman/ows?&SERVICE=WCS&ACCEPTVERSIONS=2.1.0&REQUEST=GetCapabilities",
-        statusUpdates: bool = False) -> list:
+def checkRequestParameters(url, statusUpdates, session, debugDir) -> None:
     """
-    Makes a get request to the provided url, expecting an xml response.
-    Creates a .debug.xml file to store server's response if the
-    status_code == 200 in order to be able to trace back any errors.
-    Afterwards, the response's content will further more be processed
-    into a list of lists which will be the value returned.
-    
-    :param url: server's url from where to request coverages using a get request.
-    :param statusUpdates: boolean variable based on which extra status updates
-        on the standard output will be shared.
-    :return: processed server's response into a list of lists or
-        an empty list if anything went wrong.
-    
-    :raise: ValueError if another type than str is given for url.
-    :raise: ValueError if another type than bool is given for statusUpdates.
+    Checks the types of the parameters shared by the coverage requesting functions.
+
+    :raise: ValueError if any of the parameter's type are wrongfully given.
     """
     if not isinstance(url, str):
         raise ValueError("Expected str type variable for url.")
     if not isinstance(statusUpdates, bool):
         raise ValueError("Expected bool, int type variable for statusUpdates.")
+    if session is not None and not isinstance(session, requests.Session):
+        raise ValueError("Expected requests.Session type variable for session.")
+    if debugDir is not None and not isinstance(debugDir, str):
+        raise ValueError("Expected str type variable for debugDir.")
+
+def formatCoverageSummary(summary: ET.Element) -> list:
+    """
+    Formats one child of the capabilities' Contents element (a CoverageSummary)
+    into a list: the non blank texts of its children, each followed by the list
+    of texts of that child's own children (the grand-children's texts for the
+    AdditionalParameters child).
+
+    :param summary: the CoverageSummary element.
+
+    :return: the formatted list.
+    """
+    data_sub = []
+    for tag in summary:
+        if tag.text is not None and isBlank(tag.text) == False:
+            data_sub.append(tag.text)
+        if len(tag):
+            temp = []
+            if ("AdditionalParameters" not in tag.tag):
+                for info in tag:
+                    temp.append(info.text)
+            else:
+                for additional in tag:
+                    for info in additional:
+                        temp.append(info.text)
+            data_sub.append(temp)
+    return data_sub
+
+def iterCapabilities(source, statusUpdates: bool = False):
+    """
+    Incrementally parses a GetCapabilities xml document, yielding every
+    formatted CoverageSummary (see formatCoverageSummary) as soon as it was
+    read. Processed elements are dropped right away, so the memory used
+    doesn't grow with the number of coverages.
+
+    :param source: binary file-like object (or path) containing the xml document.
+    :param statusUpdates: boolean variable based on which extra status updates
+        on the standard output will be shared.
+
+    :return: generator of formatted coverages.
 
+    :raise: xml.etree.ElementTree.ParseError if the document is malformed.
+    """
+    stack = []
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        depth = len(stack)
+        if depth == 2 and "Contents" in stack[1].tag:
+            yield formatCoverageSummary(element)
+            stack[1].remove(element)
+        elif depth == 1:
+            element.clear()
+            stack[0].remove(element)
+    if statusUpdates:
+        print("Done processing!")
+
+class ResponseStream:
+    """
+    A file-like view of a streamed response's content, read through iter_content:
+    the content is decoded as the server compressed it, and the errors of a
+    connection dropped midway come as requests exceptions (e.g. ChunkedEncodingError).
+    """
+    def __init__(self, response: requests.Response, chunk_size: int = 1 << 16) -> None:
+        self.chunks = response.iter_content(chunk_size)
+        self.buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+class _DebugTee:
+    """A file-like wrapper copying everything read from a stream into a debug file."""
+    def __init__(self, stream, debug_file) -> None:
+        self.stream = stream
+        self.debug_file = debug_file
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.debug_file.write(data)
+        return data
+
+def iterAvailableRequests(
+        url : str ="https://ows.rasdaman.org/rasdaman/ows?&SERVICE=WCS&ACCEPTVERSIONS=2.1.0&REQUEST=GetCapabilities",
+        statusUpdates: bool = False,
+        session: requests.Session = None,
+        debugDir: str = None):
+    """
+    Makes a streamed get request to the provided url, expecting an xml response,
+    and parses it incrementally while it's being received (see iterCapabilities).
+    If debugDir is given, the server's response is also copied into a
+    uniquely named '.debug_*.xml' file of that directory in order to be able
+    to trace back any errors, without concurrent processes clobbering each other.
+    
+    :param url: server's url from where to request coverages using a get request.
+    :param statusUpdates: boolean variable based on which extra status updates
+        on the standard output will be shared.
+    :param session: optional requests.Session to send the request through,
+        reusing its pooled connections. A plain requests.get is used otherwise.
+    :param debugDir: optional directory where the debug file will be created.
+    :return: generator of formatted coverages, empty if the request failed.
+
+    :raise: xml.etree.ElementTree.ParseError if the response is malformed.
+    :raise: requests.exceptions.RequestException if the connection is lost while the response is read.
+    """
     if statusUpdates:
         print("Requesting data from: '", url, "'", sep='')
 
     try:
-        response = requests.get(url)
+        if session is not None:
+            response = session.get(url, stream=True)
+        else:
+            response = requests.get(url, stream=True)
     except requests.exceptions.RequestException as e:
         if statusUpdates:
             print(f"Request err: {e}")
-        return []
+        return
     
-    if (response.status_code != 200):
-        print("Server Connection Failed:", response.status_code)
-        return []
-    if statusUpdates:
-        print("Request was successful!")
+    with response:
+        if (response.status_code != 200):
+            print("Server Connection Failed:", response.status_code)
+            return
+        if statusUpdates:
+            print("Request was successful!")
+            print("Processing response...")
 
-    if statusUpdates:
-        print("Creating debug file: '.debug.xml'")
-    file = open('.debug.xml', 'w')
-    file.write(response.text)
-    file.close()
-    if statusUpdates:
-        print("'.debug.xml' was successfully created!")
-        print("Processing file...")
+        if debugDir is None:
+            yield from iterCapabilities(ResponseStream(response), statusUpdates)
+            return
 
-    try:
-        tree = ET.parse('.debug.xml')
-        root = tree.getroot()
-        data = []
-        data_sub = []
-        temp = []
-    except Exception as e:
+        descriptor, path = tempfile.mkstemp(prefix=".debug_", suffix=".xml", dir=debugDir)
         if statusUpdates:
-            print("Unexpected file format.")
-        return []
-
+            print(f"Creating debug file: '{path}'")
+        with os.fdopen(descriptor, "wb") as debug_file:
+            yield from iterCapabilities(_DebugTee(ResponseStream(response), debug_file), statusUpdates)
 
-    for content in root:
-        if ("Contents" in content.tag):
-            for tags in content:
-                data_sub = []
-                for tag in tags:
-                    if isBlank(tag.text) == False:
-                        data_sub.append(tag.text)
-                    if tag:
-                        temp = []
-                        if ("AdditionalParameters" not in tag.tag):
-                            for info in tag:
-                                temp.append(info.text)
-                        else:
-                            for additional in tag:
-                                for info in additional:
-                                    temp.append(info.text)
-                        data_sub.append(temp)
-                data.append(data_sub)
+def getAvailableRequests(
+        url : str ="https://ows.rasdaman.org/rasdaman/ows?&SERVICE=WCS&ACCEPTVERSIONS=2.1.0&REQUEST=GetCapabilities",
+        statusUpdates: bool = False,
+        session: requests.Session = None,
+        debugDir: str = None) -> list:
+    """
+    Makes a get request to the provided url, expecting an xml response.
+    The response's content is parsed while it's being streamed
+    (see iterAvailableRequests) into a list of lists which will be
+    the value returned.
     
-    if statusUpdates:
-        print("Done processing!")
+    :param url: server's url from where to request coverages using a get request.
+    :param statusUpdates: boolean variable based on which extra status updates
+        on the standard output will be shared.
+    :param session: optional requests.Session to send the request through,
+        reusing its pooled connections. A plain requests.get is used otherwise.
+    :param debugDir: optional directory where a uniquely named debug file
+        with the server's response will be created.
+    :return: processed server's response into a list of lists or
+        an empty list if anything went wrong.
+    
+    :raise: ValueError if another type than str is given for url.
+    :raise: ValueError if another type than bool is given for statusUpdates.
+    :raise: ValueError if session or debugDir are of wrong types.
+    """
+    checkRequestParameters(url, statusUpdates, session, debugDir)
 
-    return data
+    try:
+        return list(iterAvailableRequests(url, statusUpdates, session, debugDir))
+    except ET.ParseError:
+        if statusUpdates:
+            print("Unexpected file format.")
+        return []
+    except requests.exceptions.RequestException as e:
+        if statusUpdates:
+            print(f"Request err: {e}")
+        return []
 
 def processedDataIntoList(
         url : str ="https://ows.rasdaman.org/rasdaman/ows?&SERVICE=WCS&ACCEPTVERSIONS=2.1.0&REQUEST=GetCapabilities",
-        statusUpdates: bool = False) -> tuple[type_request, int]:
+        statusUpdates: bool = False,
+        session: requests.Session = None,
+        debugDir: str = None,
+        catalog: CoverageCatalogBuilder = None) -> tuple[type_request, int]:
     """
     Requests and formats data into type_request objects
     from a certain url based on its expected incoming format.
+    The type_request objects are created one by one while the
+    server's response is still being streamed and parsed.
 
     :param url: server's url from where to request coverages using a get request.
     :param statusUpdates: boolean variable based on which extra status updates
         on the standard output will be shared.
+    :param session: optional requests.Session to send the request through.
+    :param debugDir: optional directory where a uniquely named debug file
+        with the server's response will be created.
+    :param catalog: optional CoverageCatalogBuilder every processed
+        coverage is added to, as soon as it's created.
     :return: tuple[processedRequests, ignoredRequests]
 
     :raise: ValueError if another type than str is given for url.
-    :raise: ValueError if another type than bool, int is given for statusUpdates.
+    :raise: ValueError if another type than bool is given for statusUpdates.
+    :raise: ValueError if session, debugDir or catalog are of wrong types.
     """
-    if not isinstance(url, str):
-        raise ValueError("Expected str type variable for url.")
-    if not isinstance(statusUpdates, (bool, int)):
-        raise ValueError("Expected bool, int type variable for statusUpdates.")
+    checkRequestParameters(url, statusUpdates, session, debugDir)
+    if catalog is not None and not isinstance(catalog, CoverageCatalogBuilder):
+        raise ValueError("Expected CoverageCatalogBuilder type variable for catalog.")
 
-    # initialising data accordingly to their use case.
-    # *data* will hold the raw response of the server's response.
-    data = []
-    data = getAvailableRequests(url, statusUpdates)
+    # *data* will lazily hold the server's response, one coverage at a time.
+    data = iterAvailableRequests(url, statusUpdates, session, debugDir)
+    try:
+        return processedDataFromRows(data, statusUpdates, catalog)
+    except ET.ParseError:
+        if statusUpdates:
+            print("Unexpected file format.")
+        return [], 0
+    except requests.exceptions.RequestException as e:
+        if statusUpdates:
+            print(f"Request err: {e}")
+        return [], 0
+
+def processedDataFromRows(data, statusUpdates: bool = False,
+                          catalog: CoverageCatalogBuilder = None) -> tuple[type_request, int]:
+    """
+    Formats already parsed coverages (see formatCoverageSummary)
+    into type_request objects.
+
+    :param data: iterable of formatted coverages.
+    :param statusUpdates: boolean variable based on which extra status updates
+        on the standard output will be shared.
+    :param catalog: optional CoverageCatalogBuilder every processed
+        coverage is added to.
+    :return: tuple[processedRequests, ignoredRequests]
+    """
     availableRequsts = []
     ignored = 0
 
@@ -177,6 +324,9 @@ def processedDataIntoList(
                                                 type[3]))
         else:
             ignored += 1
+            continue
+        if catalog is not None:
+            catalog.add(availableRequsts[-1])
     
     if statusUpdates:
         print("Done formatting!")
@@ -0,0 +1,65 @@
+import numpy as np
+from .csv_decoder import decode_csv
+
+# the length of the query text a request can carry, comfortably under the servers' usual POST limits
+MAX_QUERY_LENGTH = 1 << 16
+
+def point_terms(points: np.ndarray, time_slice: str = "", extras: str = "") -> list:
+    """
+    Writes one band of the packed struct per point, e.g. 'p0: $c[Lat(53.08),Long(8.8)] + 273.15'.
+
+    :param points: (n, 2) float array of latitudes and longitudes.
+    :param time_slice: the ansi operation appended to every point's subset, e.g. ',ansi("2014-01")'.
+    :param extras: the filtering operations applied to every point's value.
+    :return: the list of the bands, in the same order as the points.
+    """
+    return [f"p{index}: $c[Lat({lat!r}),Long({lon!r}){time_slice}]{extras}"
+            for index, (lat, lon) in enumerate(points.tolist())]
+
+def pack_queries(coverage_name: str, terms: list, max_query_length: int = MAX_QUERY_LENGTH) -> list:
+    """
+    Packs the points' bands into as few csv encoded struct queries as max_query_length allows,
+    keeping their order.
+
+    :param coverage_name: the coverage the points are sampled from.
+    :param terms: the points' bands (see point_terms).
+    :param max_query_length: the maximum length of a query's text.
+    :return: a list of (query, number of points) pairs.
+
+    :raise: ValueError if max_query_length can't hold the query of a single point.
+    """
+    head = f"for $c in ({coverage_name}) return encode({{"
+    tail = '}, "csv")'
+    queries = []
+    batch, length = [], len(head) + len(tail)
+    for term in terms:
+        extra = len(term) + (2 if batch else 0)
+        if batch and length + extra > max_query_length:
+            queries.append((head + "; ".join(batch) + tail, len(batch)))
+            batch, length = [], len(head) + len(tail)
+            extra = len(term)
+        if length + extra > max_query_length:
+            raise ValueError("max_query_length gotta hold the query of at least one point.")
+        batch.append(term)
+        length += extra
+    if batch:
+        queries.append((head + "; ".join(batch) + tail, len(batch)))
+    return queries
+
+def parse_samples(response: bytes, count: int) -> np.ndarray:
+    """
+    Reads the values of a packed query's csv response. The struct's bands come cell
+    after cell, so the values are the points' samples, interleaved over the time steps.
+
+    :param response: the csv response.
+    :param count: the number of points packed in the query.
+    :return: (count,) float array of the samples, or (count, steps) array for time series.
+
+    :raise: ValueError if the response doesn't hold the same number of values for every point,
+        or isn't a regular csv array of numbers.
+    """
+    values = decode_csv(response, dtype=float).ravel()
+    if count == 0 or len(values) == 0 or len(values) % count:
+        raise ValueError(f"The response holds {len(values)} values for {count} points.")
+    samples = values.reshape(-1, count).T
+    return samples[:, 0] if samples.shape[1] == 1 else samples
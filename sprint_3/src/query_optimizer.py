@@ -0,0 +1,192 @@
+import re
+from decimal import Decimal, DecimalException, InvalidOperation, DivisionByZero, Inexact, localcontext
+from .bounds_validator import parse_date
+from .query_plan import QueryPlan
+
+_AXIS_OPERATION = re.compile(r'^\s*(\w+)\((.*)\)\s*$')
+_EXTRA = re.compile(r'^\s*([-+*/])\s*(\S+)\s*$')
+
+def _parse_bound(text: str):
+    """
+    Parses one end of an axis subset: a number, or a quoted date.
+
+    :return: a (comparable value, original text) pair.
+    :raise: ValueError if the end is neither.
+    """
+    text = text.strip()
+    if text.startswith('"') and text.endswith('"') and len(text) > 1:
+        return parse_date(text[1:-1]), text
+    return float(text), text
+
+def parse_subset(operation: str):
+    """
+    Parses an axis operation such as 'Lat(0:20)', 'Lat(53)' or 'ansi("2012-01":"2014-01")'.
+
+    :return: an (axis, low, high, is_slice) tuple, low and high as (value, text)
+        pairs, or None if the operation isn't a plain subset of one axis.
+    """
+    match = _AXIS_OPERATION.match(operation)
+    if match is None:
+        return None
+    axis, ranges = match.groups()
+    # the quoted dates' own colons aren't range separators
+    ends = re.findall(r'"[^"]*"|[^:]+', ranges)
+    try:
+        if len(ends) == 1:
+            bound = _parse_bound(ends[0])
+            return axis, bound, bound, True
+        if len(ends) == 2:
+            low, high = sorted((_parse_bound(ends[0]), _parse_bound(ends[1])), key=lambda bound: bound[0])
+            return axis, low, high, False
+    except (ValueError, TypeError):
+        return None
+    return None
+
+def merge_subsets(operations: tuple) -> tuple:
+    """
+    Intersects the subsets applied more than once to the same axis, e.g.
+    ('Lat(0:20)', 'Long(5)', 'Lat(5:10)') becomes ('Lat(5:10)', 'Long(5)').
+    The merged subset takes the place of the axis' first one, and is a slice
+    if any of the merged ones is. Subsets whose intersection is empty, or that
+    can't be parsed, are left as they are for the server to report.
+
+    :param operations: the plan's axis operations.
+    :return: the operations without the redundant subsets.
+    """
+    groups = {}
+    for index, operation in enumerate(operations):
+        parsed = parse_subset(operation)
+        key = parsed[0] if parsed is not None else index
+        groups.setdefault(key, []).append((index, parsed))
+
+    merged = {}
+    for key, group in groups.items():
+        if len(group) < 2 or any(parsed is None for _, parsed in group):
+            continue
+        try:
+            low = max((parsed[1] for _, parsed in group), key=lambda bound: bound[0])
+            high = min((parsed[2] for _, parsed in group), key=lambda bound: bound[0])
+            is_slice = any(parsed[3] for _, parsed in group)
+            if low[0] > high[0] or (is_slice and low[0] != high[0]):
+                continue
+        except TypeError:
+            # numbers and dates mixed on one axis
+            continue
+        range_str = low[1] if is_slice else f"{low[1]}:{high[1]}"
+        merged[group[0][0]] = f"{key}({range_str})"
+        for index, _ in group[1:]:
+            merged[index] = None
+
+    if not merged:
+        return tuple(operations)
+    return tuple(merged.get(index, operation) for index, operation in enumerate(operations)
+                 if merged.get(index, operation) is not None)
+
+def _format_constant(value: Decimal, as_float: bool) -> str:
+    """Writes a folded constant without exponent nor trailing zeros, with a decimal point if as_float."""
+    text = format(value.normalize(), 'f')
+    return text + ".0" if as_float and "." not in text else text
+
+def _promotes(operator: str, text: str) -> bool:
+    """Checks whether a step turns an integer coverage's cells into floats."""
+    return operator == '/' or any(character in text for character in ".eE")
+
+def fold_arithmetic(extras: tuple) -> tuple:
+    """
+    Folds the constant arithmetic at the start of the extras, e.g.
+    ('+ 273.15', '+ 1', '> 300') becomes ('+ 274.15', '> 300'). As the extras
+    are written one after the other behind the subset, the usual precedence
+    applies: the multiplications / divisions right behind the subset are folded
+    into one factor, every following term into one constant added to it, and
+    the no-op steps (+ 0, * 1, ...) are dropped. Folding stops at the first
+    comparison, modulo or step that isn't an operator followed by a number.
+    The constants are folded exactly, in decimal arithmetic, and steps turning
+    integers into floats (divisions, decimal constants) keep doing so.
+
+    :param extras: the plan's filtering operations.
+    :return: the folded extras.
+    """
+    steps = []
+    for extra in extras:
+        match = _EXTRA.match(extra)
+        if match is None:
+            break
+        try:
+            value = Decimal(match.group(2))
+        except InvalidOperation:
+            break
+        if not value.is_finite():
+            break
+        steps.append((match.group(1), value, _promotes(*match.groups())))
+    if not steps:
+        return tuple(extras)
+
+    # the multiplications / divisions applied to the subset itself
+    count = 0
+    while count < len(steps) and steps[count][0] in '*/':
+        count += 1
+    factors, terms = steps[:count], steps[count:]
+
+    # a fold that would round a constant is given up, as is a division by zero
+    with localcontext() as context:
+        context.traps[DivisionByZero] = context.traps[Inexact] = True
+        try:
+            factor = Decimal(1)
+            if all(operator == '/' for operator, _, _ in factors):
+                # successive divisions fold into one divisor
+                for _, value, _ in factors:
+                    factor *= value
+            else:
+                for operator, value, _ in factors:
+                    factor = factor * value if operator == '*' else factor / value
+        except DecimalException:
+            factor = None
+        try:
+            # the sum of the constant terms, each one a product of constants
+            constant, term = Decimal(0), Decimal(0)
+            for operator, value, _ in terms:
+                if operator in '+-':
+                    constant += term
+                    term = value if operator == '+' else -value
+                else:
+                    term = term * value if operator == '*' else term / value
+            constant += term
+        except DecimalException:
+            return tuple(extras)
+
+    folded = []
+    factor_promotes = any(promotes for _, _, promotes in factors)
+    if factor is None or len(factors) == 1 and (factor != 1 or factor_promotes):
+        # the factors are kept as written
+        folded.extend(extra.strip() for extra in extras[:len(factors)])
+    elif factors and all(operator == '/' for operator, _, _ in factors):
+        folded.append(f"/ {_format_constant(factor, False)}")
+    elif factors and (factor != 1 or factor_promotes):
+        folded.append(f"* {_format_constant(factor, factor_promotes)}")
+
+    terms_promote = any(promotes for _, _, promotes in terms)
+    if constant > 0 or (constant == 0 and terms_promote):
+        folded.append(f"+ {_format_constant(constant, terms_promote)}")
+    elif constant < 0:
+        folded.append(f"- {_format_constant(-constant, terms_promote)}")
+    return tuple(folded) + tuple(extras[len(steps):])
+
+def optimize(plan: QueryPlan) -> QueryPlan:
+    """
+    Rewrites a plan so that the server does less work per cell: the repeated
+    subsets of an axis are intersected (see merge_subsets) and the constant
+    arithmetic is folded (see fold_arithmetic). The result is the same.
+
+    :param plan: the QueryPlan to optimize.
+    :return: the optimized QueryPlan, plan itself if there was nothing to optimize.
+
+    :raise: ValueError if plan is not a QueryPlan.
+    """
+    if not isinstance(plan, QueryPlan):
+        raise ValueError("plan gotta be a QueryPlan.")
+    operations = merge_subsets(plan.operations)
+    extras = fold_arithmetic(plan.extras)
+    if operations == plan.operations and extras == plan.extras:
+        return plan
+    return QueryPlan(plan.coverage_name, operations, extras, plan.aggregate_function,
+                     plan.encode_type, plan.polygon, plan.color_cases)
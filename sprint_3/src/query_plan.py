@@ -0,0 +1,89 @@
+from .response_cache import normalize_query
+
+class QueryPlan:
+    """
+    An immutable description of a DatacubeObject's query: the coverage, the
+    axis operations, the filtering extras, the aggregate / encoding / color
+    switching applied to it and the polygon it is clipped to. render() writes
+    it as WCPS text, always in the same way for the same plan, and canonical()
+    gives its normalized form (see response_cache.normalize_query), which the
+    cache and the batching layers use as the query's identity.
+
+    :param coverage_name: the coverage the query iterates over.
+    :param operations: the axis operations, e.g. ('Lat(53)', 'ansi("2012-03")').
+    :param extras: the filtering operations appended to the subset, e.g. ('+ 273.15',).
+    :param aggregate_function: the aggregate function applied to the subset, if any.
+    :param encode_type: the encoding of the result, if any.
+    :param polygon: optional (let clause, encoding) pair the subset is clipped with.
+    :param color_cases: (case, return) pairs of a color switching, if any.
+    """
+    __slots__ = ("coverage_name", "operations", "extras", "aggregate_function",
+                 "encode_type", "polygon", "color_cases", "__rendered", "__canonical")
+
+    def __init__(self, coverage_name: str, operations=(), extras=(), aggregate_function: str = None,
+                 encode_type: str = None, polygon: tuple = None, color_cases=()) -> None:
+        """Initializes the object"""
+        for name, value in (("coverage_name", coverage_name),
+                            ("operations", tuple(operations)),
+                            ("extras", tuple(extras)),
+                            ("aggregate_function", aggregate_function),
+                            ("encode_type", encode_type),
+                            ("polygon", tuple(polygon) if polygon else None),
+                            ("color_cases", tuple(tuple(case) for case in color_cases)),
+                            ("_QueryPlan__rendered", None),
+                            ("_QueryPlan__canonical", None)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value) -> None:
+        raise AttributeError("QueryPlan objects are immutable.")
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, QueryPlan) and self.canonical() == other.canonical()
+
+    def __hash__(self) -> int:
+        return hash(self.canonical())
+
+    def __repr__(self) -> str:
+        return f"QueryPlan({self.render()!r})"
+
+    def render(self) -> str:
+        """
+        Writes the plan as a WCPS query. The text is computed once, on the first call.
+
+        :return: the WCPS query as a string.
+        """
+        if self.__rendered is None:
+            object.__setattr__(self, "_QueryPlan__rendered", self.__render())
+        return self.__rendered
+
+    def canonical(self) -> str:
+        """
+        Returns the normalized form of the rendered query, computed once:
+        two plans with the same canonical form are the same query.
+        """
+        if self.__canonical is None:
+            object.__setattr__(self, "_QueryPlan__canonical", normalize_query(self.render()))
+        return self.__canonical
+
+    def __render(self) -> str:
+        """Builds the query's text out of the plan's parts."""
+        #the subset of the coverage the query works on, clipped to the polygon if any
+        subset = f"$c[{','.join(self.operations)}]" if self.operations else "$c"
+        head = f"for $c in ({self.coverage_name}) "
+        if self.polygon:
+            subset = f"clip({subset}, $polygon)"
+            head += f"{self.polygon[0]} "
+        extras = ' '.join(self.extras)
+
+        if self.aggregate_function:
+            return f'''{head}return {self.aggregate_function}({subset}{extras})'''
+        if self.encode_type:
+            return f'''{head}return encode({subset}{extras}, "{self.encode_type}")'''
+        if self.color_cases:
+            query = f'''{head}\nreturn encode(\n\tswitch
+                    case {subset} = 99999 return {{red: 255; green: 255; blue: 255}}\n'''
+            query += ''.join(f'''\t\t{case} > {subset} {color}\n''' for case, color in self.color_cases)
+            return query + '''\t\tdefault return {red: 255; green: 0; blue: 0}, "image/png")'''
+        if self.polygon:
+            return f'''{head}return encode ({subset}{extras}, "{self.polygon[1]}")'''
+        return f'''{head}return encode({subset}{extras}, "csv")'''
@@ -0,0 +1,202 @@
+import re
+import numpy as np
+from .bounds_validator import dates_array
+
+_PLACEHOLDER = re.compile(r'\{([A-Za-z_]\w*)\}')
+
+# the axes whose placeholders are formatted and validated against the coverage's bounds
+TEMPLATE_AXES = ("Lat", "Long", "ansi")
+
+def _format_number(value) -> str:
+    """Writes a Lat / Long value, or a (start, end) pair as a 'start:end' range."""
+    if isinstance(value, (tuple, list, np.ndarray)):
+        return f"{value[0]}:{value[1]}"
+    return str(value)
+
+def _format_date(value) -> str:
+    """Writes an ansi value quoted, or a (start, end) pair as a '"start":"end"' range."""
+    if isinstance(value, (tuple, list, np.ndarray)):
+        return f'"{value[0]}":"{value[1]}"'
+    return f'"{value}"'
+
+def _flatten(values) -> list:
+    """Lists the values of a placeholder's column, the ends of the (start, end) pairs included."""
+    flat = []
+    for value in values:
+        if isinstance(value, (tuple, list, np.ndarray)):
+            flat.extend(value)
+        else:
+            flat.append(value)
+    return flat
+
+def _pairs(values) -> list:
+    """Lists the (start, end) pairs of a placeholder's column."""
+    return [value for value in values if isinstance(value, (tuple, list, np.ndarray))]
+
+_FORMATTERS = {"Lat": _format_number, "Long": _format_number, "ansi": _format_date}
+
+class QueryTemplate:
+    """
+    A query shape compiled once, with named placeholders written as {name},
+    for parameter sweeps: the template is split into its literal parts a
+    single time, the parameters are validated column by column against the
+    coverage's cached bounds, and every parameter set is then rendered with
+    one join. Placeholders bound to an axis are formatted for it (numbers for
+    Lat / Long, quoted dates for ansi, (start, end) pairs as ranges); the
+    other ones are written as they are given.
+
+    Any query text can be a template, e.g. the one of a DatacubeObject
+    (see DatacubeObject.prepare) or of sobel_edge_detection_query called with
+    cut_out=["{i_min}", "{i_max}", "{j_min}", "{j_max}"].
+
+    :param template: the query's text, with its placeholders.
+    :param dbc: the DatabaseConnectionObject the queries are validated and sent through.
+    :param coverage_name: the coverage the axes' bounds are taken from.
+    :param axes: dictionary binding placeholder names to one of the axes 'Lat', 'Long' and 'ansi'.
+
+    :raise: ValueError if any of the parameter's type are wrongfully given,
+        or if an axis is bound to an unknown placeholder.
+    """
+    template: str
+    placeholders: tuple
+    axes: dict
+
+    def __init__(self, template: str, dbc=None, coverage_name: str = None, axes: dict = None) -> None:
+        """Initializes the object"""
+        if not isinstance(template, str):
+            raise ValueError("template gotta be a string.")
+        axes = dict(axes) if axes is not None else {}
+        if any(axis not in TEMPLATE_AXES for axis in axes.values()):
+            raise ValueError(f"axes gotta bind placeholders to one of {TEMPLATE_AXES}.")
+        if axes and (dbc is None or not isinstance(coverage_name, str)):
+            raise ValueError("a dbc and a coverage_name are needed to validate the axes.")
+
+        # split puts the placeholders' names on the odd positions
+        parts = _PLACEHOLDER.split(template)
+        self.template = template
+        self.placeholders = tuple(dict.fromkeys(parts[1::2]))
+        unknown = set(axes) - set(self.placeholders)
+        if unknown:
+            raise ValueError(f"axes bound to unknown placeholders: {sorted(unknown)}.")
+        self.axes = axes
+        self.dbc = dbc
+        self.coverage_name = coverage_name
+        self.__literals = parts[0::2]
+        self.__slots = parts[1::2]
+
+    def __columns(self, parameters) -> tuple:
+        """
+        Brings parameter sets given as a list of dictionaries (rows) or as a
+        dictionary of equal length sequences (columns) to columns.
+
+        :return: a (columns dictionary, number of sets) pair.
+        :raise: ValueError if a placeholder is missing or the columns' lengths differ.
+        """
+        if isinstance(parameters, dict):
+            columns = parameters
+        elif isinstance(parameters, (list, tuple)) and all(isinstance(row, dict) for row in parameters):
+            if not parameters:
+                return {name: [] for name in self.placeholders}, 0
+            columns = {name: [row[name] for row in parameters] for name in self.placeholders
+                       if all(name in row for row in parameters)}
+        else:
+            raise ValueError("parameters gotta be a dictionary of sequences or a list of dictionaries.")
+        missing = [name for name in self.placeholders if name not in columns]
+        if missing:
+            raise ValueError(f"missing values for the placeholders: {missing}.")
+        lengths = {len(columns[name]) for name in self.placeholders}
+        if len(lengths) > 1:
+            raise ValueError("every placeholder gotta have the same number of values.")
+        return columns, lengths.pop() if lengths else 1
+
+    def validate(self, parameters) -> None:
+        """
+        Checks all the values of the axes' placeholders against the coverage's bounds,
+        one vectorized check per placeholder, and that their (start, end) pairs are ordered.
+
+        :param parameters: dictionary of equal length sequences, or list of dictionaries,
+            with a value for every placeholder.
+
+        :raise: ValueError if a placeholder is missing, a value is out of the coverage's bounds
+            or a pair isn't an ordered (start, end) one, TypeError if a value has the wrong type,
+            Exception if the bounds are unavailable.
+        """
+        columns, _ = self.__columns(parameters)
+        if not self.axes:
+            return
+        validator = self.dbc.bounds_validator(self.coverage_name)
+        for name, axis in self.axes.items():
+            values = np.asarray(_flatten(columns[name]), dtype=object if axis == "ansi" else None)
+            if len(values) == 0:
+                continue
+            if axis == "ansi":
+                validator.check_years_array(values.astype(str))
+            elif values.dtype.kind not in "iuf":
+                raise TypeError(f"invalid {name} type, expected type: int or float.")
+            elif axis == "Lat":
+                validator.check_lat(float(values.min()), float(values.max()))
+            else:
+                validator.check_lon(float(values.min()), float(values.max()))
+
+            pairs = _pairs(columns[name])
+            if not pairs:
+                continue
+            if any(len(pair) != 2 for pair in pairs):
+                raise ValueError(f"the ranges of {name} gotta be (start, end) pairs.")
+            if axis == "ansi":
+                ends = dates_array(np.asarray(pairs, dtype=object).astype(str))
+            else:
+                ends = np.asarray(pairs, dtype=float)
+            if (ends[:, 0] > ends[:, 1]).any():
+                raise ValueError(f"the ranges of {name} gotta have their start before their end.")
+
+    def render(self, **values) -> str:
+        """
+        Renders one parameter set, e.g. template.render(lat=53.08, date="2014-01").
+
+        :raise: ValueError if a placeholder has no value.
+        """
+        return self.render_many({name: [value] for name, value in values.items()})[0]
+
+    def render_many(self, parameters, validate: bool = True) -> list:
+        """
+        Renders many parameter sets, each placeholder's values being formatted once.
+
+        :param parameters: dictionary of equal length sequences, or list of dictionaries,
+            with a value for every placeholder.
+        :param validate: if True, the parameters are validated first (see validate).
+        :return: the list of the queries, in the same order as the parameter sets.
+        """
+        if validate:
+            self.validate(parameters)
+        columns, count = self.__columns(parameters)
+        formatted = {name: [_FORMATTERS.get(self.axes.get(name), str)(value) for value in columns[name]]
+                     for name in self.placeholders}
+        queries = []
+        for index in range(count):
+            pieces = [self.__literals[0]]
+            for slot, literal in zip(self.__slots, self.__literals[1:]):
+                pieces.append(formatted[slot][index])
+                pieces.append(literal)
+            queries.append(''.join(pieces))
+        return queries
+
+    def execute_many(self, parameters, max_workers: int = 8, max_in_flight: int = None) -> list:
+        """
+        Validates and renders many parameter sets, and sends them as one batch
+        through the dbc's execute_many. Identical queries are sent once.
+
+        :param parameters: dictionary of equal length sequences, or list of dictionaries,
+            with a value for every placeholder.
+        :param max_workers: number of worker threads sending queries.
+        :param max_in_flight: maximum number of queries submitted at once.
+        :return: a list of (response, query, error) tuples, in the same order as the parameter sets.
+
+        :raise: ValueError if the template has no dbc, or for invalid parameters (see validate).
+        """
+        if self.dbc is None:
+            raise ValueError("a dbc is needed to execute the template.")
+        queries = self.render_many(parameters)
+        unique = list(dict.fromkeys(queries))
+        results = dict(zip(unique, self.dbc.execute_many(unique, max_workers, max_in_flight)))
+        return [(results[query][0], query, results[query][1]) for query in queries]
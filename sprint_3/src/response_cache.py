@@ -0,0 +1,329 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_QUOTED = re.compile(r'("[^"]*")')
+_WHITESPACE = re.compile(r'\s+')
+_PUNCTUATION_SPACES = re.compile(r' ?([()\[\]{},:;]) ?')
+_COVERAGE_CLAUSE = re.compile(r'\$\w+\s+in\s*\(([^)]*)\)')
+
+logger = logging.getLogger(__name__)
+
+def normalize_query(query: str) -> str:
+    """
+    Brings a WCPS query to a normalized form, so that queries differing only
+    by whitespace (indentation, line breaks, spaces around brackets and commas)
+    share the same cache entry. Quoted strings are left untouched.
+
+    :param query: the WCPS query.
+    :return: the normalized query.
+
+    :raise: ValueError if another type than str is given.
+    """
+    if not isinstance(query, str):
+        raise ValueError("Expected str type variable.")
+
+    parts = _QUOTED.split(query)
+    # split with a capturing group puts the quoted strings on the odd positions
+    for i in range(0, len(parts), 2):
+        parts[i] = _PUNCTUATION_SPACES.sub(r'\1', _WHITESPACE.sub(' ', parts[i]))
+    return ''.join(parts).strip()
+
+def query_coverages(query: str) -> set:
+    """
+    Extracts the coverage names a WCPS query iterates over,
+    from its '$var in (coverage, ...)' clauses.
+
+    :param query: the WCPS query.
+    :return: set of coverage names.
+    """
+    coverages = set()
+    for clause in _COVERAGE_CLAUSE.findall(query):
+        for name in clause.split(','):
+            if name.strip():
+                coverages.add(name.strip())
+    return coverages
+
+class ResponseCache:
+    """
+    An opt-in cache for WCPS responses, keyed by the hash of the endpoint
+    and of the normalized query. It has a least recently used in-memory tier,
+    bounded by the total size of the stored responses, and an optional
+    on-disk tier which survives the process, bounded as well, the oldest
+    written entries being removed first. Entries can expire after a time to
+    live, and can be invalidated per coverage. A failing disk never fails a
+    query: its write errors are logged and the entry is only kept in memory.
+    The disk is read and written without holding the lock; an entry whose
+    coverages were invalidated meanwhile is dropped instead of stored.
+
+    :param max_bytes: maximum total size of the responses kept in memory.
+    :param ttl: default time to live of an entry in seconds, None for no expiry.
+    :param disk_dir: optional directory for the on-disk tier.
+    :param max_disk_bytes: maximum total size of the responses kept on disk.
+
+    :raise: ValueError if any of the parameter's type are wrongfully given.
+    """
+    max_bytes: int
+    ttl: float
+    disk_dir: str
+    max_disk_bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, ttl: float = None,
+                 disk_dir: str = None, max_disk_bytes: int = 1024 * 1024 * 1024) -> None:
+        """Initializes the object"""
+        if isinstance(max_bytes, bool) or not isinstance(max_bytes, int) or max_bytes < 0:
+            raise ValueError("max_bytes gotta be a non negative integer.")
+        if isinstance(max_disk_bytes, bool) or not isinstance(max_disk_bytes, int) or max_disk_bytes < 0:
+            raise ValueError("max_disk_bytes gotta be a non negative integer.")
+        if ttl is not None and (isinstance(ttl, bool) or not isinstance(ttl, (int, float)) or ttl <= 0):
+            raise ValueError("ttl gotta be a positive number.")
+        if disk_dir is not None and not isinstance(disk_dir, str):
+            raise ValueError("disk_dir gotta be a string.")
+
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__entries = OrderedDict() # key -> (content, expires_at, coverages)
+        self.__size = 0
+        self.__generations = dict() # coverage -> number of invalidations, None counting the clears
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(query: str, endpoint: str) -> str:
+        """Returns the content address of a query sent to an endpoint."""
+        return ResponseCache.canonical_key(normalize_query(query), endpoint)
+
+    @staticmethod
+    def canonical_key(canonical: str, endpoint: str) -> str:
+        """Returns the content address of an already normalized query (e.g. a QueryPlan's canonical form)."""
+        return hashlib.sha256((endpoint + '\n' + canonical).encode()).hexdigest()
+
+    def get(self, query: str, endpoint: str, key: str = None):
+        """
+        Looks a response up, first in memory and then on disk.
+
+        :param query: the WCPS query.
+        :param endpoint: the server's url the query is sent to.
+        :param key: optional precomputed key, replacing the query's normalized form.
+        :return: the cached response's content, or None on a miss.
+        """
+        key = key if key is not None else self.key(query, endpoint)
+        now = time.time()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > now:
+                    self.__entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                self.__discard(key)
+            generations = dict(self.__generations)
+
+        # the disk is read without holding the lock, its files being only ever replaced at once
+        entry = self.__read_disk(key, now)
+        with self.__lock:
+            # an entry whose coverages were invalidated during the read is a miss
+            if entry is not None and self.__generation(entry[2]) == self.__generation(entry[2], generations):
+                self.__store(key, *entry)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, query: str, endpoint: str, content: bytes, ttl: float = None, key: str = None) -> None:
+        """
+        Stores a response.
+
+        :param query: the WCPS query.
+        :param endpoint: the server's url the query was sent to.
+        :param content: the response's content.
+        :param ttl: time to live of this entry in seconds, defaults to the cache's ttl.
+        :param key: optional precomputed key, replacing the query's normalized form.
+        """
+        if not isinstance(content, bytes):
+            raise ValueError("Expected bytes type variable for content.")
+        key = key if key is not None else self.key(query, endpoint)
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        coverages = query_coverages(query)
+        with self.__lock:
+            self.__store(key, content, expires_at, coverages)
+            generation = self.__generation(coverages)
+        self.__write_disk(key, content, expires_at, coverages, generation)
+
+    def invalidate_coverage(self, coverage: str) -> int:
+        """
+        Drops every entry whose query iterates over the given coverage.
+
+        :param coverage: the coverage's name.
+        :return: number of dropped entries.
+        """
+        dropped = set()
+        with self.__lock:
+            self.__generations[coverage] = self.__generations.get(coverage, 0) + 1
+            for key, entry in list(self.__entries.items()):
+                if coverage in entry[2]:
+                    self.__discard(key)
+                    dropped.add(key)
+            if self.disk_dir is not None:
+                for key, meta in self.__disk_metas():
+                    if coverage in meta["coverages"]:
+                        self.__remove_disk(key)
+                        dropped.add(key)
+        return len(dropped)
+
+    def clear(self) -> None:
+        """Drops every entry, in memory and on disk."""
+        with self.__lock:
+            self.__generations[None] = self.__generations.get(None, 0) + 1
+            self.__entries.clear()
+            self.__size = 0
+            if self.disk_dir is not None:
+                for key, _ in self.__disk_metas():
+                    self.__remove_disk(key)
+
+    def stats(self) -> dict:
+        """Returns the cache's counters and current memory usage."""
+        with self.__lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.__entries), "bytes": self.__size}
+
+    def __store(self, key: str, content: bytes, expires_at: float, coverages: set) -> None:
+        """Keeps an entry in memory, evicting the least recently used ones if needed."""
+        if key in self.__entries:
+            self.__discard(key)
+        if len(content) > self.max_bytes:
+            return
+        self.__entries[key] = (content, expires_at, coverages)
+        self.__size += len(content)
+        while self.__size > self.max_bytes:
+            oldest = next(iter(self.__entries))
+            self.__discard(oldest)
+            self.evictions += 1
+
+    def __generation(self, coverages: set, generations: dict = None) -> int:
+        """
+        Returns the number of invalidations and clears the entries over these coverages went through,
+        according to generations (defaulting to the current ones), so that a change shows any of them.
+        """
+        generations = self.__generations if generations is None else generations
+        return generations.get(None, 0) + sum(generations.get(coverage, 0) for coverage in coverages)
+
+    def __discard(self, key: str) -> None:
+        self.__size -= len(self.__entries.pop(key)[0])
+
+    def __paths(self, key: str) -> tuple:
+        """Returns the (content, meta) file paths of an entry."""
+        return (os.path.join(self.disk_dir, key + ".bin"),
+                os.path.join(self.disk_dir, key + ".json"))
+
+    def __read_disk(self, key: str, now: float):
+        """Returns a (content, expires_at, coverages) entry from disk, or None."""
+        if self.disk_dir is None:
+            return None
+        content_path, meta_path = self.__paths(key)
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta["expires_at"] is not None and meta["expires_at"] <= now:
+                self.__remove_disk(key)
+                return None
+            with open(content_path, "rb") as f:
+                content = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        return content, meta["expires_at"], set(meta["coverages"])
+
+    def __write_disk(self, key: str, content: bytes, expires_at: float, coverages: set, generation: int) -> None:
+        """
+        Stores an entry on disk, logging instead of raising if the disk fails. The files are written
+        without holding the lock, and only moved into place if the entry's coverages weren't
+        invalidated since its generation was taken.
+        """
+        if self.disk_dir is None or len(content) > self.max_disk_bytes:
+            return
+        content_path, meta_path = self.__paths(key)
+        meta = json.dumps({"expires_at": expires_at, "coverages": sorted(coverages)}).encode()
+        temporaries = []
+        try:
+            temporaries.append(self.__temporary(content))
+            temporaries.append(self.__temporary(meta))
+            with self.__lock:
+                if self.__generation(coverages) != generation:
+                    return
+                # the content is moved into place first, so a readable meta file always has a whole content
+                os.replace(temporaries[0], content_path)
+                os.replace(temporaries[1], meta_path)
+                temporaries.clear()
+            self.__trim_disk()
+        except OSError as e:
+            logger.warning("Couldn't write the cache entry %s to disk: %s", key, e)
+        finally:
+            for temporary in temporaries:
+                try:
+                    os.remove(temporary)
+                except OSError:
+                    pass
+
+    def __temporary(self, data: bytes) -> str:
+        """Writes data into a temporary file of the disk tier, to be moved into place at once, and returns its path."""
+        descriptor, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.disk_dir)
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                f.write(data)
+        except OSError:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+        return temporary
+
+    def __trim_disk(self) -> None:
+        """Removes the oldest written entries on disk until they fit in max_disk_bytes."""
+        contents = []
+        for item in os.scandir(self.disk_dir):
+            if item.name.endswith(".bin"):
+                try:
+                    status = item.stat()
+                except OSError:
+                    continue
+                contents.append((status.st_mtime, status.st_size, item.name[:-len(".bin")]))
+        size = sum(content[1] for content in contents)
+        for _, content_size, key in sorted(contents):
+            if size <= self.max_disk_bytes:
+                break
+            self.__remove_disk(key)
+            size -= content_size
+
+    def __disk_metas(self):
+        """Yields (key, meta) pairs of the entries stored on disk."""
+        for name in os.listdir(self.disk_dir):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.disk_dir, name), "r") as f:
+                        yield name[:-len(".json")], json.load(f)
+                except (OSError, ValueError):
+                    continue
+
+    def __remove_disk(self, key: str) -> None:
+        for path in self.__paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
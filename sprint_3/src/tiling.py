@@ -0,0 +1,95 @@
+import io
+import math
+import numpy as np
+import xarray as xr
+
+# the default size of a tile's response
+MAX_TILE_BYTES = 64 << 20
+
+def tile_edges(low: float, high: float, resolution: float, cells_per_tile: int) -> np.ndarray:
+    """
+    Splits the [low, high] interval of an axis into tiles of cells_per_tile grid cells,
+    the last tile taking what remains.
+
+    :param low: the interval's lower end.
+    :param high: the interval's upper end.
+    :param resolution: the size of the axis' grid cells.
+    :param cells_per_tile: the number of grid cells of a tile.
+    :return: the tiles' edges, from low to high.
+    """
+    width = resolution * cells_per_tile
+    # rounded, so that an interval of exactly n tiles isn't given an extra sliver of a tile
+    count = max(1, math.ceil(round((high - low) / width, 9)))
+    # rounded as well, so that the edges are written in the queries without float errors
+    edges = np.round(low + np.arange(count + 1) * width, 10)
+    edges[-1] = high
+    return edges
+
+def plan_tiles(lat_range: tuple, lon_range: tuple, resolutions: tuple, max_cells: int) -> tuple:
+    """
+    Splits a bounding box into a grid of tiles of at most max_cells grid cells,
+    as square as the box allows.
+
+    :param lat_range: the box's (lower, upper) latitudes.
+    :param lon_range: the box's (lower, upper) longitudes.
+    :param resolutions: the (latitude, longitude) sizes of the grid cells.
+    :param max_cells: the maximum number of grid cells of a tile.
+    :return: a (latitude edges, longitude edges) pair of arrays.
+
+    :raise: ValueError if max_cells isn't a positive integer.
+    """
+    if isinstance(max_cells, bool) or not isinstance(max_cells, int) or max_cells < 1:
+        raise ValueError("max_cells gotta be a positive integer.")
+    lat_cells = max(1, math.ceil(round((lat_range[1] - lat_range[0]) / resolutions[0], 9)))
+    lon_cells = max(1, math.ceil(round((lon_range[1] - lon_range[0]) / resolutions[1], 9)))
+    side = math.isqrt(max_cells)
+    lat_tile = min(lat_cells, side)
+    lon_tile = min(lon_cells, max_cells // lat_tile)
+    # a narrow box gives the budget left by one axis to the other one
+    lat_tile = min(lat_cells, max_cells // lon_tile)
+    return (tile_edges(*lat_range, resolutions[0], lat_tile),
+            tile_edges(*lon_range, resolutions[1], lon_tile))
+
+def open_tile(response: bytes) -> xr.Dataset:
+    """Reads a tile's netcdf response into memory."""
+    with xr.open_dataset(io.BytesIO(response)) as tile:
+        return tile.load()
+
+def _trim(tile: xr.Dataset, name: str, edges: np.ndarray, index: int) -> xr.Dataset:
+    """
+    Keeps the rows of a tile within its half-open [edges[index], edges[index + 1]) interval,
+    the outer sides of the first and last tiles being left as the server returned them.
+    """
+    if name not in tile.coords:
+        return tile
+    coordinates = tile[name].values
+    keep = np.ones(len(coordinates), dtype=bool)
+    if index > 0:
+        keep &= coordinates >= edges[index]
+    if index < len(edges) - 2:
+        keep &= coordinates < edges[index + 1]
+    return tile.isel({name: np.flatnonzero(keep)})
+
+def mosaic(tiles: list, lat_edges: np.ndarray, lon_edges: np.ndarray,
+           lat_name: str = "Lat", lon_name: str = "Long") -> xr.Dataset:
+    """
+    Joins the tiles of plan_tiles' grid into one Dataset. As the server returns the grid
+    cells on a tile's edges with both of the tiles sharing it, every tile is first trimmed
+    to its half-open interval, so that no row nor column is repeated or left out.
+
+    :param tiles: the tiles' Datasets, latitude after latitude and longitude after longitude
+        within a latitude (row-major order).
+    :param lat_edges: the tiles' latitude edges.
+    :param lon_edges: the tiles' longitude edges.
+    :param lat_name: the name of the tiles' latitude coordinate.
+    :param lon_name: the name of the tiles' longitude coordinate.
+    :return: the mosaic, with the tiles' coordinates.
+
+    :raise: ValueError if the number of tiles doesn't match the edges.
+    """
+    columns = len(lon_edges) - 1
+    if len(tiles) != (len(lat_edges) - 1) * columns:
+        raise ValueError(f"{len(tiles)} tiles for a {len(lat_edges) - 1} x {columns} grid.")
+    trimmed = [_trim(_trim(tile, lat_name, lat_edges, index // columns), lon_name, lon_edges, index % columns)
+               for index, tile in enumerate(tiles)]
+    return xr.combine_by_coords(trimmed)
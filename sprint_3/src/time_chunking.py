@@ -0,0 +1,145 @@
+import numpy as np
+from .bounds_validator import parse_date
+from .csv_decoder import decode_csv
+
+# the time units a chunk's number of steps is counted in, and their longest length in days
+CHUNK_UNITS = ("Y", "M", "D")
+_UNIT_DAYS = {"Y": 366, "M": 31, "D": 1}
+
+def steps_for_budget(max_bytes: int, bytes_per_step: int) -> int:
+    """
+    Turns a byte budget into a number of time steps per chunk, at least one.
+
+    :param max_bytes: the maximum size of a chunk's response.
+    :param bytes_per_step: the (estimated) size of one time step of the response.
+
+    :raise: ValueError if either one isn't a positive integer.
+    """
+    for name, value in (("max_bytes", max_bytes), ("bytes_per_step", bytes_per_step)):
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError(f"{name} gotta be a positive integer.")
+    return max(1, max_bytes // bytes_per_step)
+
+def _period(start: str, end: str) -> tuple:
+    """
+    :return: the [start, end] period's first and last days, as datetime64[D].
+    :raise: ValueError if the dates are invalid or out of order.
+    """
+    first, last = np.datetime64(parse_date(start), "D"), np.datetime64(parse_date(end), "D")
+    if first > last:
+        raise ValueError("Start date cannot be greater than end date.")
+    return first, last
+
+def _ranges(first, last, starts) -> list:
+    """Closes the ranges starting at first and at starts, each one ending the day before the next one starts."""
+    starts = np.concatenate(([first], starts))
+    ends = np.concatenate((starts[1:] - 1, [last]))
+    return list(zip(starts.astype(str).tolist(), ends.astype(str).tolist()))
+
+def _check_steps(steps_per_chunk: int) -> None:
+    """
+    :raise: ValueError if steps_per_chunk isn't a positive integer.
+    """
+    if isinstance(steps_per_chunk, bool) or not isinstance(steps_per_chunk, int) or steps_per_chunk <= 0:
+        raise ValueError("steps_per_chunk gotta be a positive integer.")
+
+def chunk_ranges(start: str, end: str, steps_per_chunk: int, unit: str = "M", resolution: float = None) -> list:
+    """
+    Splits the [start, end] period into consecutive ranges of steps_per_chunk units each.
+    The ranges are closed, at the day, and each one starts the day after the previous one
+    ends, so that every time step of the period falls in exactly one of them. The
+    boundaries fall on the units' starts, counted from the one of start, e.g.
+    ('1950-01', '1951-06', 6) gives 1950-01-01..1950-06-30, 1950-07-01..1950-12-31, ...
+
+    :param start: the period's first day, as YYYY-MM or YYYY-MM-DD.
+    :param end: the period's last day, as YYYY-MM or YYYY-MM-DD.
+    :param steps_per_chunk: the number of units of a range.
+    :param unit: the unit the steps are counted in, one of 'Y', 'M' and 'D'.
+    :param resolution: optional distance between two of the coverage's time steps, in days
+        (see CoverageGrid.resolution), for the unit to be checked against it.
+    :return: the list of the (start, end) ranges, as YYYY-MM-DD strings.
+
+    :raise: ValueError if the dates are invalid or out of order, for an invalid
+        steps_per_chunk or unit, or for a unit finer than the resolution, whose
+        chunks could hold no time step at all.
+    """
+    _check_steps(steps_per_chunk)
+    if unit not in CHUNK_UNITS:
+        raise ValueError(f"unit gotta be one of {CHUNK_UNITS}.")
+    if resolution is not None and _UNIT_DAYS[unit] < resolution:
+        raise ValueError(f"unit gotta be at least as long as the coverage's time steps, {resolution:g} days apart.")
+    first, last = _period(start, end)
+
+    # the chunks' first days after the period's one, up to its last day
+    origin = first.astype(f"datetime64[{unit}]")
+    count = int((last.astype(f"datetime64[{unit}]") - origin).astype(int)) // steps_per_chunk
+    starts = (origin + np.arange(1, count + 1) * steps_per_chunk).astype("datetime64[D]")
+    return _ranges(first, last, starts[starts <= last])
+
+def chunk_points(start: str, end: str, points, steps_per_chunk: int) -> list:
+    """
+    Splits the [start, end] period into consecutive ranges of steps_per_chunk of the coverage's
+    own time steps each (see CoverageGrid.points), so that no range is empty whatever the steps'
+    spacing. As for chunk_ranges, the ranges are closed, at the day, and each one starts the day
+    after the previous one ends, e.g. ('2000-02', '2000-12', monthly points, 6) gives
+    2000-02-01..2000-07-31, 2000-08-01..2000-12-01.
+
+    :param start: the period's first day, as YYYY-MM or YYYY-MM-DD.
+    :param end: the period's last day, as YYYY-MM or YYYY-MM-DD.
+    :param points: the sorted dates of the coverage's time steps.
+    :param steps_per_chunk: the number of time steps of a range.
+    :return: the list of the (start, end) ranges, as YYYY-MM-DD strings,
+        a single one if no time step falls within the period.
+
+    :raise: ValueError if the dates are invalid or out of order, or for an invalid steps_per_chunk.
+    """
+    _check_steps(steps_per_chunk)
+    first, last = _period(start, end)
+    points = np.asarray(points, dtype="datetime64[D]")
+    points = points[(points >= first) & (points <= last)]
+    # the chunks after the first one start on every steps_per_chunk-th time step
+    return _ranges(first, last, points[steps_per_chunk::steps_per_chunk])
+
+def execute_chunks(dbc, queries: list, max_workers: int = 8, retries: int = 2) -> list:
+    """
+    Sends the chunks' queries as one batch through the dbc's execute_many, then sends
+    again the ones that failed, and only those, up to retries more times.
+
+    :param dbc: the DatabaseConnectionObject the queries are sent through.
+    :param queries: the chunks' queries.
+    :param max_workers: number of worker threads sending queries.
+    :param retries: how many more times a failing query is sent.
+    :return: the list of the responses, in the same order as the queries.
+
+    :raise: the error of the first chunk still failing after its retries.
+    """
+    responses = [None] * len(queries)
+    pending, errors = list(range(len(queries))), {}
+    for _ in range(retries + 1):
+        if not pending:
+            break
+        results = dbc.execute_many([queries[index] for index in pending], max_workers)
+        failed = []
+        for index, (response, error) in zip(pending, results):
+            if error is None:
+                responses[index] = response
+            else:
+                failed.append(index)
+                errors[index] = error
+        pending = failed
+    if pending:
+        raise errors[pending[0]]
+    return responses
+
+def stitch(responses: list, time_axis: int = 0) -> np.ndarray:
+    """
+    Reads the chunks' csv responses (see csv_decoder.decode_csv) and joins them, in order, along the time axis.
+
+    :param responses: the chunks' responses, in time order.
+    :param time_axis: the position of the time axis among the result's axes.
+    :return: the time ordered array.
+
+    :raise: ValueError if a response isn't a regular array of numbers, or the chunks' shapes differ
+        on the other axes.
+    """
+    return np.concatenate([decode_csv(response) for response in responses], axis=time_axis)
@@ -1,4 +1,55 @@
 import re
+from datetime import date
+
+# compiled once for every coverage instead of once per axis
+_DATE_PATTERN = re.compile("[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+def _extract_bounds(bounds_2: list, parameters: list):
+    """
+    Yields the (key, [lower, upper, axis label]) raw bounds of the axes listed by
+    the 'axisList' parameters, read out of the bounds_2 corners.
+
+    :param bounds_2: the (lower, upper) corners, as space separated strings.
+    :param parameters: the [name, value] pairs of the additional parameters.
+    """
+    for name, value in parameters:
+        # attempting to extract key information to be later on used from
+        # additional parameters information. Targeted info is everything
+        # on the axisList, for example but not limited to: lat, lon, time.
+        if str(name).lower() != "axislist":
+            continue
+        try:
+            temp_bounds_ids = str(value).split(',')
+            temp_bounds_specs_1 = str(bounds_2[0]).split(' ')
+            temp_bounds_specs_2 = str(bounds_2[1]).split(' ')
+
+            # if the lists don't have the same length after splitting,
+            # an unexpected error occured, most likely a server
+            # response formatting error / data corrupution.
+            if len(temp_bounds_ids) != len(temp_bounds_specs_1)\
+                or len(temp_bounds_ids) != len(temp_bounds_specs_2):
+                continue
+            for index in range(0, len(temp_bounds_ids)):
+                temp_id_lower = temp_bounds_ids[index].lower()
+                if "ansi" in temp_id_lower\
+                    or "time" in temp_id_lower:
+                    # using regex expressions to extract dates from a string.
+                    date_low = _DATE_PATTERN.search(temp_bounds_specs_1[index])
+                    date_up  = _DATE_PATTERN.search(temp_bounds_specs_2[index])
+                    if date_low and date_up:
+                        yield 'date', [date_low.group(), date_up.group(), temp_bounds_ids[index]]
+                else:
+                    if "lat" in temp_id_lower or "e" in temp_id_lower:
+                        key = 'coord_1'
+                    elif "lon" in temp_id_lower or "n" in temp_id_lower:
+                        key = 'coord_2'
+                    else:
+                        key = temp_id_lower
+                    yield key, [temp_bounds_specs_1[index], temp_bounds_specs_2[index], temp_bounds_ids[index]]
+        except:
+            # will not actually do anything if something goes wrong
+            # as this is not core for the algorithm to function
+            continue
 
 class type_request:
     """
@@ -8,7 +59,11 @@ class type_request:
     bounds_1, bounds_2, additionalParameters, coverageTypeExtended,
     service_endpoint, serviceType, serviceVersion and request.
     Moreover, it has full comparison support, in order to
-    order a list / lists of multiple type_request objects.
+    order a list / lists of multiple type_request objects,
+    based on a sort key computed at initialization, and again
+    whenever id or coverageType are set.
+    The class uses __slots__, as servers can describe tens of
+    thousands of coverages.
 
     :param id: A string containing the id.
     :param coverageType: A string containing a coverage_type.
@@ -34,6 +89,10 @@ class type_request:
         information of any successfull extracted bounds on the axis_list.
     :param encode_format: A string with the purpose of serving the above mentioned
         functionality of generating the request. Containing a format, ex: "img/png".
+    :param parsed_bounds_dict: A dictionary with the same keys as extracted_bounds_dict,
+        and as values (lower, upper) tuples of floats, or of datetime.date objects
+        for the 'date' key. Bounds that can't be parsed are left out.
+    :param sort_key: The (coverageType, len(id), id) tuple the comparisons are based on.
 
     :raise: ValueError if any of the parameter's type are wrongfully given.
     """
@@ -48,9 +107,14 @@ class type_request:
     serviceType: str # "WCS"
     serviceVersion: str # "2.1.0"
     request: str # "GetCoverage"
-    extracted_bounds_dict: dict[list] # supported types: 'lat', 'lon', 'e', 'n', 'date'
-                                      # and whatever else might be, in raw format
     encode_format: str # "image/png"
+    extracted_bounds_dict: dict[list]
+    parsed_bounds_dict: dict[tuple]
+
+    __slots__ = ("__id", "__coverageType", "coverageTypeExt", "bounds_1", "bounds_2",
+                 "additionalParams", "serverRequest", "service_endpoint", "serviceType",
+                 "serviceVersion", "request", "encode_format", "extracted_bounds_dict",
+                 "parsed_bounds_dict", "__sort_key")
 
     def __init__(self,
                  id: str = "unset",
@@ -77,11 +141,12 @@ class type_request:
            or not isinstance(request, str):
             raise ValueError("wrong parameters' type")
         
-        self.id = id
-        self.coverageType = coverageType
+        self.__id = id
+        self.__coverageType = coverageType
         self.bounds_1 = bounds_1
         self.bounds_2 = bounds_2
         self.extracted_bounds_dict = dict()
+        self.parsed_bounds_dict = dict()
         temp = []
         # checking whether the list of additional parameters is odd by any chance,
         # in which case that would be wrong and a special case to handle this will
@@ -90,56 +155,9 @@ class type_request:
             for i in range(0, len(additionalParameters), 2):
                 # adding additional parameters as key, value pais
                 temp.append([additionalParameters[i], additionalParameters[i + 1]])
-                
-                # attempting to extract key information to be later on used from
-                # additional parameters information. Targeted info is everything
-                # on the axisList, for example but not limited to: lat, lon, time.
-                # 
-                if str(additionalParameters[i]).lower() == "axislist":
-                    try:
-                        temp_bounds_ids = str(additionalParameters[i + 1]).split(',')
-                        temp_bounds_specs_1 = str(self.bounds_2[0]).split(' ')
-                        temp_bounds_specs_2 = str(self.bounds_2[1]).split(' ')
-
-                        # if the lists don't have the same length after splitting,
-                        # an unexpected error occured, most likely a server
-                        # response formatting error / data corrupution.
-                        if len(temp_bounds_ids) != len(temp_bounds_specs_1)\
-                            or len(temp_bounds_ids) != len(temp_bounds_specs_2):
-                            continue
-                        for index in range(0, len(temp_bounds_ids)):
-                            lst = []
-                            temp_id_lower = temp_bounds_ids[index].lower()
-                            if "ansi" in temp_id_lower\
-                                or "time" in temp_id_lower:
-                                # using regex expressions to extract dates from a string.
-                                date_low = re.search("[0-9]{4}-[0-9]{2}-[0-9]{2}", temp_bounds_specs_1[index])
-                                date_up  = re.search("[0-9]{4}-[0-9]{2}-[0-9]{2}", temp_bounds_specs_2[index])
-                                if date_low and date_up:
-                                    lst.append(date_low.string[date_low.start():date_low.end()])
-                                    lst.append(date_up.string[date_up.start():date_up.end()])
-                                    lst.append(temp_bounds_ids[index])
-                                    self.extracted_bounds_dict['date'] = lst
-                            elif "lat" in temp_id_lower or "e" in temp_id_lower:
-                                lst.append(temp_bounds_specs_1[index])
-                                lst.append(temp_bounds_specs_2[index])
-                                lst.append(temp_bounds_ids[index])
-                                self.extracted_bounds_dict['coord_1'] = lst
-                            elif "lon" in temp_id_lower or "n" in temp_id_lower:
-                                lst.append(temp_bounds_specs_1[index])
-                                lst.append(temp_bounds_specs_2[index])
-                                lst.append(temp_bounds_ids[index])
-                                self.extracted_bounds_dict['coord_2'] = lst
-                            else:
-                                lst.append(temp_bounds_specs_1[index])
-                                lst.append(temp_bounds_specs_2[index])
-                                lst.append(temp_bounds_ids[index])
-                                self.extracted_bounds_dict[temp_id_lower] = lst
-                    except:
-                        # will not actually do anything if something goes wrong
-                        # as this is not core for the algorithm to function
-                        # raise(f"in type_req __init_ while extracting bounds: {e}")
-                        continue
+            for key, bounds in _extract_bounds(self.bounds_2, temp):
+                self.extracted_bounds_dict[key] = bounds
+                self.__parse_bounds(key, bounds, date.fromisoformat if key == 'date' else float)
         else:
             for i in range(0, len(additionalParameters) - 1, 2):
                 temp.append([additionalParameters[i], additionalParameters[i + 1]])
@@ -155,6 +173,43 @@ class type_request:
 
         # could be used to store desired format
         self.encode_format = ""
+        self.serverRequest = ""
+        self.__sort_key = (coverageType, len(id), id)
+
+    @property
+    def id(self) -> str:
+        """The coverage's id, setting it updates the sort key."""
+        return self.__id
+
+    @id.setter
+    def id(self, value: str) -> None:
+        self.__id = value
+        self.__sort_key = (self.__coverageType, len(value), value)
+
+    @property
+    def coverageType(self) -> str:
+        """The coverage's type, setting it updates the sort key."""
+        return self.__coverageType
+
+    @coverageType.setter
+    def coverageType(self, value: str) -> None:
+        self.__coverageType = value
+        self.__sort_key = (value, len(self.__id), self.__id)
+
+    @property
+    def sort_key(self) -> tuple:
+        """The (coverageType, len(id), id) tuple the comparisons are based on."""
+        return self.__sort_key
+
+    def __parse_bounds(self, key: str, bounds: list, parse) -> None:
+        """
+        Parses the lower and upper bounds once, so bounds checks
+        don't have to parse the raw strings over and over.
+        """
+        try:
+            self.parsed_bounds_dict[key] = (parse(bounds[0]), parse(bounds[1]))
+        except ValueError:
+            self.parsed_bounds_dict.pop(key, None)
 
     def __str__(self) -> str:
         """Returns what to be printed when trying to print an object of this type"""
@@ -189,70 +244,42 @@ class type_request:
     def __lt__(self, other) -> bool:
         """
         Implementation of comaprison sign: '<'
-        
+
         :raise: ValueError if other is of any other type than type_request.
         """
         if not isinstance(other, type_request):
             raise ValueError("Comparison with other object types, than itself, not supported.")
-
-        if (self.coverageType != other.coverageType):
-            return self.coverageType < other.coverageType
-        else:
-            if len(self.id) != len(other.id):
-                return len(self.id) < len(other.id)
-            else:
-                return self.id < other.id
+        return self.sort_key < other.sort_key
 
     def __le__(self, other)  -> bool:
         """
         Implementation of comaprison sign: '<='
-        
+
         :raise: ValueError if other is of any other type than type_request.
         """
         if not isinstance(other, type_request):
             raise ValueError("Comparison with other object types, than itself, not supported.")
-
-        if (self.coverageType != other.coverageType):
-            return self.coverageType < other.coverageType
-        else:
-            if len(self.id) != len(other.id):
-                return len(self.id) <= len(other.id)
-            else:
-                return self.id <= other.id
+        return self.sort_key <= other.sort_key
 
     def __gt__(self, other) -> bool:
         """
         Implementation of comaprison sign: '>'
-        
+
         :raise: ValueError if other is of any other type than type_request.
         """
         if not isinstance(other, type_request):
             raise ValueError("Comparison with other object types, than itself, not supported.")
-
-        if (self.coverageType != other.coverageType):
-            return self.coverageType > other.coverageType
-        else:
-            if len(self.id) != len(other.id):
-                return len(self.id) > len(other.id)
-            else:
-                return self.id > other.id
+        return self.sort_key > other.sort_key
 
     def __ge__(self, other) -> bool:
         """
         Implementation of comaprison sign: '>='
-        
+
         :raise: ValueError if other is of any other type than type_request.
         """
         if not isinstance(other, type_request):
             raise ValueError("Comparison with other object types, than itself, not supported.")
-
-        if (self.coverageType != other.coverageType):
-            return self.coverageType > other.coverageType
-        else:
-            if len(self.id) != len(other.id):
-                return len(self.id) >= len(other.id)
-            else:
-                return self.id >= other.id
+        return self.sort_key >= other.sort_key
 
     def __eq__(self, other) -> bool:
         """
@@ -0,0 +1,13 @@
+from src.type_request import type_request
+
+"""
+Coverages shared by the tests of the catalog, the index and the bounds
+checks, built out of their axes' bounds instead of a capabilities document.
+"""
+
+
+def coverage(id, axes):
+    """Builds a type_request with the bounds of the given (label, lower, upper) axes."""
+    return type_request(id, "RectifiedGridCoverage", ["unset", "unset"],
+                        [" ".join(str(axis[1]) for axis in axes), " ".join(str(axis[2]) for axis in axes)],
+                        ["axisList", ",".join(axis[0] for axis in axes)])
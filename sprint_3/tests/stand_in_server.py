@@ -0,0 +1,219 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+"""
+A local stand-in for the WCPS server, so the tests can run without
+reaching ows.rasdaman.org. It answers GetCapabilities requests with
+a capabilities document, DescribeCoverage requests with the described
+coverage's grid, other GET requests with a plain "OK" and
+POST requests by echoing the received query back, unless a responder
+is given.
+"""
+
+CAPABILITIES_HEAD = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                     b'<wcs:Capabilities xmlns:wcs="http://www.opengis.net/wcs/2.0" '
+                     b'xmlns:ows="http://www.opengis.net/ows/2.0" version="2.1.0">\n'
+                     b'<ows:ServiceIdentification><ows:Title>stand-in</ows:Title></ows:ServiceIdentification>\n'
+                     b'<wcs:Contents>\n')
+CAPABILITIES_TAIL = b'</wcs:Contents>\n</wcs:Capabilities>\n'
+
+def coverage_summary(coverage_id: str, axes: list, subtype: str = "ReferenceableGridCoverage",
+                     parent: str = None) -> bytes:
+    """
+    Builds the CoverageSummary of one coverage.
+
+    :param coverage_id: the coverage's id.
+    :param axes: list of (label, lower, upper) triples, in the coverage's axis order.
+        Dates are given as 'yyyy-mm-dd' strings.
+    :param subtype: the coverage's subtype.
+    :param parent: optional subtype parent, which makes the summary 6 elements long.
+    """
+    def corner(index):
+        return " ".join(f'"{axis[index]}T00:00:00.000Z"' if isinstance(axis[index], str)
+                        else str(axis[index]) for axis in axes)
+    labels = ",".join(axis[0] for axis in axes)
+    summary = f"<wcs:CoverageSummary><wcs:CoverageId>{coverage_id}</wcs:CoverageId>"
+    summary += f"<wcs:CoverageSubtype>{subtype}</wcs:CoverageSubtype>"
+    if parent:
+        summary += f"<wcs:CoverageSubtypeParent><wcs:CoverageSubtype>{parent}</wcs:CoverageSubtype></wcs:CoverageSubtypeParent>"
+    summary += ("<ows:WGS84BoundingBox><ows:LowerCorner>-180 -90</ows:LowerCorner>"
+                "<ows:UpperCorner>180 90</ows:UpperCorner></ows:WGS84BoundingBox>")
+    summary += (f'<ows:BoundingBox crs="stand-in" dimensions="{len(axes)}"><ows:LowerCorner>{corner(1)}</ows:LowerCorner>'
+                f"<ows:UpperCorner>{corner(2)}</ows:UpperCorner></ows:BoundingBox>")
+    summary += ("<ows:AdditionalParameters><ows:AdditionalParameter><ows:Name>sizeInBytes</ows:Name>"
+                "<ows:Value>1024</ows:Value></ows:AdditionalParameter><ows:AdditionalParameter>"
+                f"<ows:Name>axisList</ows:Name><ows:Value>{labels}</ows:Value></ows:AdditionalParameter>"
+                "</ows:AdditionalParameters></wcs:CoverageSummary>\n")
+    return summary.encode()
+
+# a few coverages shaped like the ones served by ows.rasdaman.org
+DEFAULT_COVERAGES = [
+    coverage_summary("AvgLandTemp", [("ansi", "2000-02-01", "2015-06-01"), ("Lat", -90, 90), ("Long", -180, 180)]),
+    coverage_summary("mean_summer_airtemp", [("Lat", -44.525, -8.975), ("Long", 111.975, 156.275)],
+                     subtype="RectifiedGridCoverage"),
+    coverage_summary("S2_L2A_32631_B01_60m", [("ansi", "2021-04-09", "2022-12-12"), ("E", 300000, 409800),
+                                              ("N", 5390220, 5500020)],
+                     subtype="RectifiedGridCoverage", parent="GridCoverage"),
+]
+
+def coverage_description(coverage_id: str, axes: list) -> bytes:
+    """
+    Builds the DescribeCoverage response of one coverage.
+
+    :param coverage_id: the coverage's id.
+    :param axes: list of (label, lower, upper, number of grid points) tuples, in the coverage's axis order,
+        plus, for an irregular axis, the list of its points' dates. Dates are given as 'yyyy-mm-dd' strings.
+    """
+    def corner(index):
+        return " ".join(f'"{axis[index]}T00:00:00.000Z"' if isinstance(axis[index], str)
+                        else str(axis[index]) for axis in axes)
+    def coefficients(axis):
+        return " ".join(f'"{point}T00:00:00.000Z"' for point in axis[4])
+    labels = " ".join(axis[0] for axis in axes)
+    # the irregular axes' points, listed as rasdaman does for its referenceable grids
+    general_axes = "".join(f'<gmlrgrid:generalGridAxis><gmlrgrid:GeneralGridAxis>'
+                           f'<gmlrgrid:coefficients>{coefficients(axis)}</gmlrgrid:coefficients>'
+                           f'<gmlrgrid:gridAxesSpanned>{axis[0]}</gmlrgrid:gridAxesSpanned>'
+                           f'</gmlrgrid:GeneralGridAxis></gmlrgrid:generalGridAxis>' for axis in axes if len(axis) > 4)
+    return (f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<wcs:CoverageDescriptions xmlns:wcs="http://www.opengis.net/wcs/2.0" xmlns:gml="http://www.opengis.net/gml/3.2" '
+            f'xmlns:gmlrgrid="http://www.opengis.net/gml/3.3/rgrid">'
+            f'<wcs:CoverageDescription gml:id="{coverage_id}"><gml:boundedBy>'
+            f'<gml:Envelope srsName="stand-in" axisLabels="{labels}" srsDimension="{len(axes)}">'
+            f'<gml:lowerCorner>{corner(1)}</gml:lowerCorner><gml:upperCorner>{corner(2)}</gml:upperCorner>'
+            f'</gml:Envelope></gml:boundedBy><wcs:CoverageId>{coverage_id}</wcs:CoverageId>'
+            f'<gml:domainSet><gml:RectifiedGrid dimension="{len(axes)}"><gml:limits><gml:GridEnvelope>'
+            f'<gml:low>{" ".join("0" for _ in axes)}</gml:low><gml:high>{" ".join(str(axis[3] - 1) for axis in axes)}</gml:high>'
+            f'</gml:GridEnvelope></gml:limits><gml:axisLabels>{labels}</gml:axisLabels>{general_axes}</gml:RectifiedGrid></gml:domainSet>'
+            f'</wcs:CoverageDescription></wcs:CoverageDescriptions>\n').encode()
+
+# the first days of the months from 2000-02 to 2015-06, AvgLandTemp's time steps
+MONTHS = [f"{2000 + (month + 1) // 12}-{(month + 1) % 12 + 1:02d}-01" for month in range(185)]
+
+# the grids of the default coverages
+DEFAULT_DESCRIPTIONS = {
+    "AvgLandTemp": coverage_description("AvgLandTemp", [("ansi", "2000-02-01", "2015-06-01", 185, MONTHS),
+                                                        ("Lat", -90, 90, 1800), ("Long", -180, 180, 3600)]),
+    "mean_summer_airtemp": coverage_description("mean_summer_airtemp", [("Lat", -44.525, -8.975, 711),
+                                                                        ("Long", 111.975, 156.275, 886)]),
+}
+
+def capabilities_xml(summaries: list = None) -> bytes:
+    """Builds a GetCapabilities document out of CoverageSummary elements."""
+    if summaries is None:
+        summaries = DEFAULT_COVERAGES
+    return CAPABILITIES_HEAD + b"".join(summaries) + CAPABILITIES_TAIL
+
+class StandInServer:
+    def __init__(self, responder=None, delay: float = 0.0, capabilities: bytes = None,
+                 descriptions: dict = None, truncate_capabilities: bool = False,
+                 capabilities_delay: float = 0.0) -> None:
+        """
+        Initializes a StandInServer object, listening on a free local port.
+
+        :param responder: optional callable taking the posted query and
+            returning a (status_code, body_bytes) pair.
+        :param delay: seconds every POST request waits before answering.
+        :param capabilities: the GetCapabilities document, defaults to capabilities_xml().
+        :param descriptions: the DescribeCoverage responses by coverage id, defaults to DEFAULT_DESCRIPTIONS.
+        :param truncate_capabilities: if True, the connection is closed halfway through
+            the GetCapabilities document, as a dropped connection would.
+        :param capabilities_delay: seconds every GetCapabilities request waits before answering.
+        """
+        self.responder = responder
+        self.delay = delay
+        self.capabilities = capabilities if capabilities is not None else capabilities_xml()
+        self.capabilities_etag = '"1"'
+        self.truncate_capabilities = truncate_capabilities
+        self.capabilities_delay = capabilities_delay
+        self.capabilities_requests = 0
+        self.descriptions = descriptions if descriptions is not None else DEFAULT_DESCRIPTIONS
+        self.description_requests = 0
+        self.not_modified_responses = 0
+        self.posted_queries = []
+        self.client_ports = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def send_body(self, status: int, body: bytes) -> None:
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                with server.lock:
+                    server.client_ports.add(self.client_address[1])
+                if "getcapabilities" in self.path.lower():
+                    with server.lock:
+                        server.capabilities_requests += 1
+                    time.sleep(server.capabilities_delay)
+                    if self.headers.get("If-None-Match") == server.capabilities_etag:
+                        with server.lock:
+                            server.not_modified_responses += 1
+                        self.send_response(304)
+                        self.send_header("ETag", server.capabilities_etag)
+                        self.end_headers()
+                        return
+                    self.send_response(200)
+                    self.send_header("ETag", server.capabilities_etag)
+                    self.send_header("Content-Length", str(len(server.capabilities)))
+                    self.end_headers()
+                    if server.truncate_capabilities:
+                        self.wfile.write(server.capabilities[:len(server.capabilities) // 2])
+                        self.close_connection = True
+                        return
+                    self.wfile.write(server.capabilities)
+                elif "describecoverage" in self.path.lower():
+                    coverage_id = parse_qs(urlsplit(self.path).query).get("COVERAGEID", [""])[0]
+                    with server.lock:
+                        server.description_requests += 1
+                    if coverage_id in server.descriptions:
+                        self.send_body(200, server.descriptions[coverage_id])
+                    else:
+                        self.send_body(404, b"NoSuchCoverage")
+                else:
+                    self.send_body(200, b"OK")
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode())
+                query = form.get("query", [""])[0]
+                with server.lock:
+                    server.client_ports.add(self.client_address[1])
+                    server.posted_queries.append(query)
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(server.delay)
+                if server.responder:
+                    status, body = server.responder(query)
+                else:
+                    status, body = 200, query.encode()
+                with server.lock:
+                    server.in_flight -= 1
+                self.send_body(status, body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/rasdaman/ows"
+        self.capabilities_url = self.url + "?&SERVICE=WCS&ACCEPTVERSIONS=2.1.0&REQUEST=GetCapabilities"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
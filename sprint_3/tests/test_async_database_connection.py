@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+from src.async_database_connection import AsyncDatabaseConnectionObject
+from src.datacube import DatacubeObject
+from src.database_connection import DatabaseConnectionObject
+from tests.stand_in_server import StandInServer
+
+
+def failing_responder(query):
+    if "fail" in query:
+        return 400, b"<ows:ExceptionText>Invalid query.</ows:ExceptionText>"
+    return 200, query.encode()
+
+
+class async_dbc_tester(unittest.TestCase):
+    def test_async_dbc_param(self):
+        """Testing parameters' type check of an AsyncDatabaseConnectionObject."""
+        for test_case in [0, -3, 2.5, "10", True]:
+            with self.assertRaises(ValueError):
+                AsyncDatabaseConnectionObject("doesn_t_matter", max_concurrency=test_case)
+        with self.assertRaises(ValueError):
+            AsyncDatabaseConnectionObject(1)
+
+    def test_execute_queries_async(self):
+        """Testing concurrent execution, result order and the concurrency bound."""
+        async def run(dbc):
+            async with dbc:
+                return await dbc.execute_queries_async([f"avg($c) + {i}" for i in range(12)])
+
+        with StandInServer(delay=0.05) as server:
+            dbc = AsyncDatabaseConnectionObject(server.url, max_concurrency=4)
+            results = asyncio.run(run(dbc))
+            self.assertEqual(results, [f"avg($c) + {i}".encode() for i in range(12)])
+            self.assertEqual(server.max_in_flight, 4)
+            self.assertTrue(dbc.closed)
+
+    def test_execute_query_async_errors(self):
+        """Testing that server errors are raised or returned per query."""
+        async def run(dbc):
+            async with dbc:
+                with self.assertRaises(Exception) as context:
+                    await dbc.execute_query_async("fail")
+                self.assertIn("Invalid query.", str(context.exception))
+                return await dbc.execute_queries_async(["ok", "fail"], return_exceptions=True)
+
+        with StandInServer(failing_responder) as server:
+            results = asyncio.run(run(AsyncDatabaseConnectionObject(server.url)))
+            self.assertEqual(results[0], b"ok")
+            self.assertIsInstance(results[1], Exception)
+
+    def test_event_loop_change(self):
+        """Testing that the session of a previous event loop is closed before a new one is made."""
+        async def run(dbc):
+            return await dbc.execute_query_async("avg($c)"), dbc.async_session
+
+        with StandInServer() as server:
+            dbc = AsyncDatabaseConnectionObject(server.url)
+            first_response, first_session = asyncio.run(run(dbc))
+            second_response, second_session = asyncio.run(run(dbc))
+            self.assertEqual(first_response, second_response)
+            self.assertIsNot(first_session, second_session)
+            self.assertTrue(first_session.closed)
+            asyncio.run(dbc.aclose())
+
+    def test_datacube_execute_async(self):
+        """Testing the awaitable execution methods of DatacubeObject."""
+        async def run(dbc):
+            async with dbc:
+                datacube = DatacubeObject(dbc, "AvgLandTemp")
+                datacube.operations.append("Lat(53)")
+                datacube.aggregate("avg")
+                dynamic = DatacubeObject(dbc)
+                dynamic.init_var("AvgLandTemp", "c")
+                dynamic.main_subset("$c", "Lat(53)")
+                return await asyncio.gather(datacube.execute_async(),
+                                            dynamic.d_execute_async(),
+                                            datacube.d_execute_sobel_async("$c"),
+                                            datacube.d_execute_nir_green_red_ratio_async("$c"))
+
+        with StandInServer() as server:
+            results = asyncio.run(run(AsyncDatabaseConnectionObject(server.url)))
+            for response, query in results:
+                self.assertEqual(response, query.encode())
+            self.assertEqual(results[0][1], "for $c in (AvgLandTemp) return avg($c[Lat(53)])")
+
+        with self.assertRaises(TypeError):
+            asyncio.run(DatacubeObject(DatabaseConnectionObject("doesn_t_matter"), "AvgLandTemp").execute_async())
+
+
+if __name__ == '__main__':
+    unittest.main()
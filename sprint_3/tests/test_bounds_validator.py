@@ -0,0 +1,90 @@
+import unittest
+import numpy as np
+from datetime import date
+from src.bounds_validator import BoundsValidator, parse_date, dates_array
+from src.type_request import type_request
+from tests.coverage_fixtures import coverage
+
+
+class bounds_validator_tester(unittest.TestCase):
+    def setUp(self):
+        self.validator = BoundsValidator(coverage("AvgLandTemp", [
+            ("ansi", '"2000-02-01T00:00:00.000Z"', '"2015-06-01T00:00:00.000Z"'),
+            ("Lat", -90, 90), ("Long", -180, 180)]))
+
+    def test_parse_date(self):
+        """Testing the memoized parsing of single dates."""
+        parse_date.cache_clear()
+        self.assertEqual(parse_date("2012-07"), date(2012, 7, 1))
+        self.assertEqual(parse_date("2012-07-15"), date(2012, 7, 15))
+        parse_date("2012-07")
+        self.assertEqual(parse_date.cache_info().hits, 1)
+        for test_case in ["2012/07", "2012:01", "", "2012-13"]:
+            with self.assertRaises(ValueError):
+                parse_date(test_case)
+
+    def test_dates_array(self):
+        """Testing the conversion of many dates at once."""
+        self.assertEqual(dates_array(["2012-07", "2012-07-15"]).tolist(), [date(2012, 7, 1), date(2012, 7, 15)])
+        self.assertEqual(dates_array(np.array(["2012-07-15T10:00"], dtype="datetime64[m]"))[0],
+                         np.datetime64("2012-07-15"))
+        with self.assertRaises(TypeError):
+            dates_array([2012, 2013])
+        self.assertEqual(dates_array([date(2012, 7, 15), "2012-08"]).tolist(), [date(2012, 7, 15), date(2012, 8, 1)])
+        #the formats numpy would read but check_years doesn't accept
+        for test_case in [["2012/07"], ["2012"], ["2012-07", "2012"], ["2012-07-15T10:00"], ["2012-7-01"],
+                          ["2012-07-"], [date(2012, 7, 15), "2012"]]:
+            with self.assertRaises(ValueError):
+                dates_array(test_case)
+
+    def test_scalar_and_array_dates_agree(self):
+        """Testing that parse_date and dates_array accept and reject the same strings."""
+        for test_case in ["2012-1", "2012-1-5", "2012-01-5", "2012", "2012-07-15T10:00", " 2012-07", "2012-07-15 "]:
+            with self.assertRaises(ValueError):
+                parse_date(test_case)
+            with self.assertRaises(ValueError):
+                dates_array([test_case])
+        for test_case in ["2012-07", "2012-07-15"]:
+            self.assertEqual(parse_date(test_case), dates_array([test_case])[0].astype(object))
+
+    def test_check_years_array(self):
+        """Testing the vectorized date checks."""
+        sweep = np.arange("2000-02-01", "2015-06-02", dtype="datetime64[D]")
+        self.validator.check_years_array(sweep)
+        self.validator.check_years_array(["2000-02", "2015-06-01"])
+        self.assertEqual(self.validator.years_mask(["1999-12", "2012-01", "2016-01-01"]).tolist(), [False, True, False])
+        with self.assertRaisesRegex(ValueError, "2 date"):
+            self.validator.check_years_array(["1999-12", "2012-01", "2016-01-01"])
+        with self.assertRaisesRegex(Exception, "Unable to check"):
+            BoundsValidator(type_request("NoBounds")).check_years_array(["2012-01"])
+
+    def test_clamping(self):
+        """Testing the intersection of intervals with the bounds."""
+        self.assertEqual(self.validator.clamp_lat(-95, 10), (-90, 10))
+        self.assertEqual(self.validator.clamp_lat(10.5, -10), (-10, 10.5))
+        self.assertEqual(self.validator.clamp_lon(170, 190.5), (170, 180))
+        self.assertIsNone(self.validator.clamp_lat(95))
+        self.assertIsNone(self.validator.clamp_lon(-200, -190))
+        self.assertEqual(self.validator.clamp_years("1999-01", "2001-01"), (date(2000, 2, 1), date(2001, 1, 1)))
+        self.assertIsNone(self.validator.clamp_years("2016-01"))
+        with self.assertRaises(TypeError):
+            self.validator.clamp_lat("10")
+        with self.assertRaises(ValueError):
+            self.validator.clamp_years("2014-06", "2012-03")
+        with self.assertRaisesRegex(Exception, "Unable to check"):
+            BoundsValidator(type_request("NoBounds")).clamp_lon(10)
+
+    def test_points(self):
+        """Testing the vectorized checks of many points."""
+        points = np.array([[0, 0], [-90, 180], [95, 0], [0, -180.5], [np.nan, 0]])
+        self.assertEqual(self.validator.points_mask(points).tolist(), [True, True, False, False, False])
+        self.validator.check_points(points[:2])
+        with self.assertRaises(ValueError):
+            self.validator.check_points(points)
+        with self.assertRaisesRegex(Exception, "Unable to check"):
+            BoundsValidator(type_request("NoBounds")).points_mask(points)
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import pickle
+import tempfile
+import time
+import unittest
+from src.catalog_snapshot import CatalogSnapshot, SNAPSHOT_VERSION
+from src.database_connection import DatabaseConnectionObject
+from tests.stand_in_server import StandInServer, capabilities_xml, DEFAULT_COVERAGES
+
+
+class catalog_snapshot_tester(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "catalog.snapshot")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_snapshot_param(self):
+        """Testing parameters' type check of a CatalogSnapshot."""
+        for test_case in [1, "", None, []]:
+            with self.assertRaises(ValueError):
+                CatalogSnapshot(test_case)
+        for test_case in [-1, "10", True, None]:
+            with self.assertRaises(ValueError):
+                CatalogSnapshot(self.path, test_case)
+        with self.assertRaises(ValueError):
+            DatabaseConnectionObject("doesn_t_matter", snapshot=self.path)
+
+    def test_fresh_snapshot_skips_server(self):
+        """Testing that a fresh snapshot replaces the capabilities request."""
+        with StandInServer() as server:
+            first = DatabaseConnectionObject(server.url, server.capabilities_url, snapshot=CatalogSnapshot(self.path))
+            self.assertTrue(os.path.exists(self.path))
+            second = DatabaseConnectionObject(server.url, server.capabilities_url, snapshot=CatalogSnapshot(self.path))
+            self.assertEqual(server.capabilities_requests, 1)
+
+        self.assertTrue(second.pre_processed_coverage_support)
+        self.assertEqual(list(second.pre_processed_coverage_dict), list(first.pre_processed_coverage_dict))
+        self.assertEqual(second.pre_processed_coverage_dict["AvgLandTemp"].extracted_bounds_dict,
+                         first.pre_processed_coverage_dict["AvgLandTemp"].extracted_bounds_dict)
+
+    def test_stale_snapshot_revalidation(self):
+        """Testing the conditional request made for a stale snapshot."""
+        with StandInServer() as server:
+            DatabaseConnectionObject(server.url, server.capabilities_url, snapshot=CatalogSnapshot(self.path))
+            fetched_at = CatalogSnapshot(self.path).load(server.capabilities_url)["fetched_at"]
+            time.sleep(0.01)
+
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, snapshot=CatalogSnapshot(self.path, 0))
+            self.assertEqual(server.not_modified_responses, 1)
+            self.assertEqual(len(dbc.pre_processed_coverage_dict), 3)
+            self.assertGreater(CatalogSnapshot(self.path).load(server.capabilities_url)["fetched_at"], fetched_at)
+
+            server.capabilities = capabilities_xml(DEFAULT_COVERAGES[:1])
+            server.capabilities_etag = '"2"'
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, snapshot=CatalogSnapshot(self.path, 0))
+            self.assertEqual(list(dbc.pre_processed_coverage_dict), ["AvgLandTemp"])
+            self.assertEqual(CatalogSnapshot(self.path).load(server.capabilities_url)["etag"], '"2"')
+
+    def test_unusable_snapshots(self):
+        """Testing that snapshots of other versions, urls or corrupted files are ignored."""
+        snapshot = CatalogSnapshot(self.path)
+        self.assertIsNone(snapshot.load("url"))
+
+        snapshot.save("url", {"AvgLandTemp": None})
+        self.assertIsNotNone(snapshot.load("url"))
+        self.assertIsNone(snapshot.load("another_url"))
+
+        with open(self.path, "wb") as f:
+            pickle.dump({"version": SNAPSHOT_VERSION + 1, "coverage_url": "url"}, f)
+        self.assertIsNone(snapshot.load("url"))
+
+        with open(self.path, "wb") as f:
+            f.write(b"corrupted")
+        self.assertIsNone(snapshot.load("url"))
+
+        with StandInServer(capabilities=b"<not xml") as server:
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, snapshot=snapshot)
+            self.assertFalse(dbc.pre_processed_coverage_support)
+
+        #a connection dropped midway through the document doesn't fail the constructor
+        with StandInServer(truncate_capabilities=True) as server:
+            self.assertIsNone(CatalogSnapshot(self.path).coverages(server.capabilities_url))
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, snapshot=CatalogSnapshot(self.path))
+            self.assertFalse(dbc.pre_processed_coverage_support)
+
+
+if __name__ == '__main__':
+    unittest.main()
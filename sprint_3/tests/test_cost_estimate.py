@@ -0,0 +1,43 @@
+import unittest
+from src.cost_estimate import BYTES_PER_CELL, QueryEstimate, Guardrail, count_cells
+from src.coverage_grid import CoverageGrid
+from tests.stand_in_server import DEFAULT_DESCRIPTIONS
+
+
+class cost_estimate_tester(unittest.TestCase):
+    def setUp(self):
+        self.grid = CoverageGrid.from_describe(DEFAULT_DESCRIPTIONS["AvgLandTemp"])
+
+    def test_count_cells(self):
+        """Testing the cells selected along every axis."""
+        self.assertEqual(count_cells(self.grid, []), {"ansi": 185, "Lat": 1800, "Long": 3600})
+        self.assertEqual(count_cells(self.grid, ["Lat(0:10)", "Long(5)", 'ansi("2012-01":"2012-12")']),
+                         {"ansi": 12, "Lat": 100, "Long": 1})
+        #operations the grid doesn't know, or that can't be parsed, leave the axes whole
+        self.assertEqual(count_cells(self.grid, ["E(0:10)", "Lat($x)", "Lat(95:99)"]), {"ansi": 185, "Lat": 0, "Long": 3600})
+
+    def test_query_estimate(self):
+        """Testing the sizes derived from the cell counts."""
+        estimate = QueryEstimate({"ansi": 11, "Lat": 100, "Long": 1}, 1100, "csv")
+        self.assertEqual((estimate.cells, estimate.output_cells, estimate.round_trips), (1100, 1100, 1))
+        self.assertEqual(estimate.output_bytes, 1100 * BYTES_PER_CELL["csv"])
+        self.assertEqual(estimate.bytes["netcdf"], 1100 * BYTES_PER_CELL["netcdf"])
+        self.assertEqual(QueryEstimate({"Lat": 10}, 10, "application/x-custom").output_bytes, 40)
+        unknown = QueryEstimate(None, None, "csv")
+        self.assertEqual((unknown.cells, unknown.output_bytes), (None, None))
+
+    def test_guardrail(self):
+        """Testing the limits checked against the estimates."""
+        estimate = QueryEstimate({"Lat": 100, "Long": 100}, 10000, "csv")
+        self.assertTrue(Guardrail(max_cells=9999).exceeded(estimate))
+        self.assertFalse(Guardrail(max_cells=10000).exceeded(estimate))
+        self.assertTrue(Guardrail(max_bytes=10000 * BYTES_PER_CELL["csv"] - 1).exceeded(estimate))
+        self.assertFalse(Guardrail(max_cells=10, max_bytes=10).exceeded(QueryEstimate(None, None, "csv")))
+        self.assertEqual(Guardrail(max_cells=100, action="tile").tile_bytes(), 100 * BYTES_PER_CELL["netcdf"])
+        self.assertEqual(Guardrail(max_cells=100, max_bytes=1000).tile_bytes(), 1000)
+        for kwargs in [{}, {"max_cells": 0}, {"max_bytes": 1.5}, {"max_cells": True}, {"max_cells": 10, "action": "warn"}]:
+            with self.assertRaises(ValueError):
+                Guardrail(**kwargs)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import numpy as np
+from src.coverage_catalog import CoverageCatalog, CoverageCatalogBuilder
+from src.database_connection import DatabaseConnectionObject
+from src.get_coverage import processedDataIntoList
+from src.type_request import type_request
+from tests.stand_in_server import StandInServer
+from tests.coverage_fixtures import coverage
+
+
+class coverage_catalog_tester(unittest.TestCase):
+    def setUp(self):
+        self.catalog = CoverageCatalog.from_coverages([
+            coverage("World", [("ansi", '"2000-02-01T00:00:00.000Z"', '"2015-06-01T00:00:00.000Z"'),
+                               ("Lat", -90, 90), ("Long", -180, 180)]),
+            coverage("Australia", [("Lat", -44.5, -9), ("Long", 112, 156.2)]),
+            coverage("Europe", [("ansi", '"2021-04-09T00:00:00.000Z"', '"2022-12-12T00:00:00.000Z"'),
+                                ("Lat", 35, 71), ("Long", -25, 45)]),
+            type_request("NoBounds"),
+        ])
+
+    def test_coverage_catalog_param(self):
+        """Testing parameters' type check of a CoverageCatalog and its builder."""
+        for test_case in [None, "", 1, {}]:
+            with self.assertRaises(ValueError):
+                CoverageCatalogBuilder().add(test_case)
+        for test_case in [[True, False], np.ones(4), np.ones((2, 2), dtype=bool)]:
+            with self.assertRaises(ValueError):
+                self.catalog.select(test_case)
+        with self.assertRaises(ValueError):
+            processedDataIntoList("doesn_t_matter", catalog=[])
+
+    def test_coverage_catalog_columns(self):
+        """Testing the catalog's columns and vectorized filters."""
+        catalog = self.catalog
+        self.assertEqual(len(catalog), 4)
+        self.assertEqual(catalog.ids.tolist(), ["World", "Australia", "Europe", "NoBounds"])
+        self.assertEqual(catalog.types.tolist(), ["RectifiedGridCoverage"] * 3 + ["unset"])
+        self.assertEqual(catalog.lat_low[:3].tolist(), [-90.0, -44.5, 35.0])
+        self.assertTrue(np.isnan(catalog.lat_low[3]) and np.isnan(catalog.lon_high[3]))
+        self.assertEqual(catalog.time_high[0], np.datetime64("2015-06-01"))
+        self.assertTrue(np.isnat(catalog.time_low[1]))
+
+        self.assertEqual(catalog.select((catalog.time_high > np.datetime64("2020-12-31"))
+                                        & (catalog.lat_high - catalog.lat_low > 10)), ["Europe"])
+        self.assertEqual(catalog.select(catalog.lon_high - catalog.lon_low < 50), ["Australia"])
+        self.assertEqual(CoverageCatalog.from_coverages({}).select(np.ones(0, dtype=bool)), [])
+
+        #a duplicate id replaces the earlier coverage in place, as in a pre_processed_coverage_dict
+        catalog = CoverageCatalog.from_coverages([coverage("A", [("Lat", 0, 1)]), coverage("B", [("Lat", 2, 3)]),
+                                                  coverage("A", [("Lat", 4, 5)])])
+        self.assertEqual((catalog.ids.tolist(), catalog.lat_low.tolist()), (["A", "B"], [4.0, 2.0]))
+
+    def test_dbc_coverage_catalog(self):
+        """Testing the catalog filled during a DatabaseConnectionObject's preprocessing."""
+        self.assertIsNone(DatabaseConnectionObject("doesn_t_matter").coverage_catalog)
+        with StandInServer() as server:
+            builder = CoverageCatalogBuilder()
+            lst, _ = processedDataIntoList(server.capabilities_url, catalog=builder)
+            self.assertEqual(builder.build().ids.tolist(), [coverage.id for coverage in lst])
+
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url)
+        catalog = dbc.coverage_catalog
+        self.assertIs(dbc.coverage_catalog, catalog)
+        self.assertEqual(catalog.ids.tolist(), ["AvgLandTemp", "mean_summer_airtemp", "S2_L2A_32631_B01_60m"])
+        self.assertEqual(catalog.select(catalog.time_high > np.datetime64("2020-01-01")), ["S2_L2A_32631_B01_60m"])
+
+        dbc.pre_processed_coverage_dict = {"AvgLandTemp": dbc.pre_processed_coverage_dict["AvgLandTemp"]}
+        self.assertEqual(dbc.coverage_catalog.ids.tolist(), ["AvgLandTemp"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from datetime import date
+from src.coverage_grid import CoverageGrid
+from src.database_connection import DatabaseConnectionObject
+from tests.stand_in_server import StandInServer, DEFAULT_DESCRIPTIONS, MONTHS, coverage_description
+
+
+class coverage_grid_tester(unittest.TestCase):
+    def setUp(self):
+        self.grid = CoverageGrid.from_describe(DEFAULT_DESCRIPTIONS["AvgLandTemp"])
+
+    def test_from_describe(self):
+        """Testing the parsing of DescribeCoverage responses."""
+        self.assertEqual(self.grid.axis_labels, ("ansi", "Lat", "Long"))
+        self.assertEqual(self.grid.cells, (185, 1800, 3600))
+        self.assertEqual(self.grid.lower, (date(2000, 2, 1), -90, -180))
+        self.assertEqual(self.grid.upper, (date(2015, 6, 1), 90, 180))
+        self.assertEqual((len(self.grid.points["ansi"]), self.grid.points["ansi"][1]), (185, date(2000, 3, 1)))
+
+        #the grid envelope follows the grid's own axis order
+        document = coverage_description("Swapped", [("Lat", -90, 90, 180), ("Long", -180, 180, 720)])
+        document = document.replace(b"<gml:axisLabels>Lat Long", b"<gml:axisLabels>Long Lat")
+        self.assertEqual(CoverageGrid.from_describe(document).cells, (720, 180))
+        for document in [b"<wcs:CoverageDescriptions xmlns:wcs='wcs'/>",
+                         document.replace(b"<gml:axisLabels>Long Lat", b"<gml:axisLabels>E N")]:
+            with self.assertRaises(ValueError):
+                CoverageGrid.from_describe(document)
+        #coefficients that aren't the dates of every point are left out
+        document = coverage_description("Partial", [("ansi", "2000-02-01", "2000-04-01", 3, MONTHS[:2])])
+        self.assertEqual(CoverageGrid.from_describe(document).points, {})
+        for arguments in [(("Lat",), (1, 2), (0,), (1,)), (("ansi",), (3,), (0,), (1,), {"ansi": MONTHS[:2]}),
+                          (("ansi",), (2,), (0,), (1,), {"time": MONTHS[:2]})]:
+            with self.assertRaises(ValueError):
+                CoverageGrid(*arguments)
+
+    def test_cells_within(self):
+        """Testing the number of grid points within intervals."""
+        self.assertAlmostEqual(self.grid.resolution("Lat"), 0.1)
+        self.assertAlmostEqual(self.grid.resolution("ansi"), 5599 / 184)
+        self.assertEqual(self.grid.cells_within("Lat", 0, 10), 100)
+        self.assertEqual(self.grid.cells_within("Lat", 10, 0), 100)
+        self.assertEqual(self.grid.cells_within("Lat", 5), 1)
+        self.assertEqual(self.grid.cells_within("Lat", 90), 1)
+        self.assertEqual(self.grid.cells_within("Lat", 0.05, 0.15), 2)
+        self.assertEqual(self.grid.cells_within("Long", -200, 200), 3600)
+        self.assertEqual(self.grid.cells_within("Long"), 3600)
+        self.assertEqual(self.grid.cells_within("Lat", 95, 100), 0)
+        self.assertEqual(self.grid.cells_within("ansi"), 185)
+        #the monthly points are counted, a single month included
+        for low, high, count in [("2012-01", "2012-12", 12), ("2012-01", "2012-01", 1), ("2000-02", "2000-03", 2),
+                                 ("2012-01-10", "2012-01-20", 0), ("1999-01", "2000-02", 1)]:
+            self.assertEqual(self.grid.cells_within("ansi", low, high), count)
+        #without the listed points, the interval's ends are rounded to the nearest evenly spread point
+        uneven = CoverageGrid.from_describe(coverage_description("AvgLandTemp", [("ansi", "2000-02-01", "2015-06-01", 185)]))
+        for low, high, count in [("2012-01", "2012-12", 12), ("2012-01", "2012-01", 1), ("2000-02", "2000-03", 2)]:
+            self.assertEqual(uneven.cells_within("ansi", low, high), count)
+        self.assertEqual(self.grid.cells_within("ansi", date(2016, 1, 1)), 0)
+        for axis, low in [("E", 0), ("ansi", "2012/01")]:
+            with self.assertRaises(ValueError):
+                self.grid.cells_within(axis, low)
+
+    def test_dbc_coverage_grid(self):
+        """Testing that the dbc describes every coverage once."""
+        with StandInServer() as server:
+            with DatabaseConnectionObject(server.url) as dbc:
+                grid = dbc.coverage_grid("mean_summer_airtemp")
+                self.assertIs(dbc.coverage_grid("mean_summer_airtemp"), grid)
+                self.assertEqual(grid.cells, (711, 886))
+                self.assertEqual(server.description_requests, 1)
+                with self.assertRaisesRegex(Exception, "404"):
+                    dbc.coverage_grid("NoSuchCoverage")
+
+if __name__ == "__main__":
+    unittest.main()
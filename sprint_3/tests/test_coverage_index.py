@@ -0,0 +1,68 @@
+import unittest
+from src.coverage_index import CoverageIndex
+from src.database_connection import DatabaseConnectionObject
+from src.type_request import type_request
+from tests.coverage_fixtures import coverage
+from tests.stand_in_server import StandInServer
+
+
+class coverage_index_tester(unittest.TestCase):
+    def setUp(self):
+        self.index = CoverageIndex({
+            "World": coverage("World", [("ansi", '"2000-02-01T00:00:00.000Z"', '"2015-06-01T00:00:00.000Z"'),
+                                        ("Lat", -90, 90), ("Long", -180, 180)]),
+            "Australia": coverage("Australia", [("Lat", -44.5, -9), ("Long", 112, 156.2)]),
+            "Europe": coverage("Europe", [("ansi", '"2021-04-09T00:00:00.000Z"', '"2022-12-12T00:00:00.000Z"'),
+                                          ("Lat", 35, 71), ("Long", -25, 45)]),
+            "NoBounds": type_request("NoBounds"),
+        })
+
+    def test_coverage_index_param(self):
+        """Testing parameters' type check of a CoverageIndex and its lookups."""
+        for test_case in [None, [], "coverages"]:
+            with self.assertRaises(ValueError):
+                CoverageIndex(test_case)
+        for test_case in [(1, 2, 3), (1, 2, 3, "4"), (10, 0, 0, 10), (0, 10, 10, 0), "bbox"]:
+            with self.assertRaises(ValueError):
+                self.index.coverages_intersecting(bbox=test_case)
+        for test_case in [("2000-01-01",), ("2001-01-01", "2000-01-01"), ("2000", "2001"), (2000, 2001)]:
+            with self.assertRaises(ValueError):
+                self.index.coverages_intersecting(time_range=test_case)
+        for test_case in [(1,), (1, 2, 3, 4), None]:
+            with self.assertRaises(ValueError):
+                self.index.coverages_containing(test_case)
+
+    def test_coverages_intersecting(self):
+        """Testing bbox and time range lookups."""
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(sorted(self.index.coverages_intersecting()), ["Australia", "Europe", "NoBounds", "World"])
+        self.assertEqual(sorted(self.index.coverages_intersecting((-50, 100, -40, 120))), ["Australia", "World"])
+        self.assertEqual(sorted(self.index.coverages_intersecting((71, 45, 80, 50))), ["Europe", "World"])
+        self.assertEqual(self.index.coverages_intersecting((-50, 100, -40, 120), ("2021-05", "2021-06")), [])
+        self.assertEqual(sorted(self.index.coverages_intersecting(time_range=("2015-06-01", "2021-04-09"))),
+                         ["Europe", "World"])
+        self.assertEqual(self.index.coverages_intersecting(time_range=("2016-01", "2017-01")), [])
+
+    def test_coverages_containing(self):
+        """Testing point lookups."""
+        self.assertEqual(sorted(self.index.coverages_containing((48.8, 2.3))), ["Europe", "World"])
+        self.assertEqual(self.index.coverages_containing((48.8, 2.3, "2022-01-15")), ["Europe"])
+        self.assertEqual(self.index.coverages_containing((-30, 150, "2010-01")), ["World"])
+        self.assertEqual(self.index.coverages_containing((95, 0)), [])
+
+    def test_dbc_coverage_index(self):
+        """Testing the coverage index exposed by a DatabaseConnectionObject."""
+        self.assertIsNone(DatabaseConnectionObject("doesn_t_matter").coverage_index)
+        with StandInServer() as server:
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url)
+        index = dbc.coverage_index
+        self.assertIs(dbc.coverage_index, index)
+        self.assertEqual(index.coverages_containing((-20, 130, "2010-01-01")), ["AvgLandTemp"])
+        self.assertEqual(sorted(index.coverages_containing((-20, 130))), ["AvgLandTemp", "mean_summer_airtemp"])
+
+        dbc.pre_processed_coverage_dict = {"mean_summer_airtemp": dbc.pre_processed_coverage_dict["mean_summer_airtemp"]}
+        self.assertEqual(dbc.coverage_index.coverages_containing((-20, 130)), ["mean_summer_airtemp"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import numpy as np
+from src.csv_decoder import decode_csv, decode_csv_stream, plan_axes, to_xarray
+from src.query_plan import QueryPlan
+
+
+class csv_decoder_tester(unittest.TestCase):
+    def test_decode_csv(self):
+        """Testing the arrays read out of csv responses, their shapes and types."""
+        decoded = decode_csv(b"{{1,2},{3,4}},{{5,6},{7,8}}")
+        np.testing.assert_array_equal(decoded, np.arange(1, 9).reshape(2, 2, 2))
+        self.assertEqual(decoded.dtype, np.int64)
+        np.testing.assert_array_equal(decode_csv(b"1,2,3"), [1, 2, 3])
+        decoded = decode_csv(b"{1.5,nan},{-inf,2e3}")
+        self.assertEqual((decoded.dtype, decoded.shape), (np.float64, (2, 2)))
+        np.testing.assert_array_equal(decoded, [[1.5, np.nan], [-np.inf, 2000]])
+        self.assertEqual(decode_csv(b"12.5").tolist(), [12.5])
+        self.assertEqual(decode_csv(b"1,2", dtype=np.float32).dtype, np.float32)
+        self.assertEqual(decode_csv(b"").shape, (0,))
+
+        #the struct cells' bands make the last axis, the true / false cells are booleans
+        np.testing.assert_array_equal(decode_csv(b'{"1 2","3 4"},{"5 6","7 8"}'), np.arange(1, 9).reshape(2, 2, 2))
+        np.testing.assert_array_equal(decode_csv(b"{true,false}"), [[True, False]])
+
+        #the ints that don't fit in an int64 make the values floats instead of being saturated
+        for response in [b"9223372036854775808,1", b"-9223372036854775809,1"]:
+            decoded = decode_csv(response)
+            self.assertEqual(decoded.dtype, np.float64)
+            self.assertEqual(decoded.tolist(), [float(value) for value in response.split(b",")])
+        decoded = decode_csv(b"9223372036854775807,-9223372036854775808")
+        self.assertEqual((decoded.dtype, decoded.tolist()), (np.int64, [9223372036854775807, -9223372036854775808]))
+
+        #every group is checked, not only the totals, which {1,2,3},{4} would pass
+        for response in [b"{1,2},{3}", b"{1,2", b"1,2}", b'{"1 2","3"}', b"1,two,3", b"1,,2",
+                         b"{1,2,3},{4}", b"{1},{2,3,4}", b"{{1},{2},{3}},{{4}}"]:
+            with self.assertRaises(ValueError):
+                decode_csv(response)
+
+    def test_decode_csv_stream(self):
+        """Testing the responses read chunk after chunk, the values split across chunks included."""
+        values = np.arange(400 * 50).reshape(400, 50) * 1.5 - 7
+        response = ",".join("{%s}" % ",".join(map(str, row)) for row in values).encode()
+        for size in [1, 7, 4096, len(response)]:
+            decoded = decode_csv_stream(response[start:start + size] for start in range(0, len(response), size))
+            np.testing.assert_array_equal(decoded, values)
+        np.testing.assert_array_equal(decode_csv_stream([b"{1", b"0,2", b"0},{30,", b"40}"]), [[10, 20], [30, 40]])
+        self.assertEqual(decode_csv_stream([]).shape, (0,))
+        for chunks in [[b"{1,2},", b"{3}"], [b"{1,", b"2,3},{4", b",5}"], [b"{{1},{2", b"}},{{3", b"}}"]]:
+            with self.assertRaises(ValueError):
+                decode_csv_stream(chunks)
+
+    def test_to_xarray(self):
+        """Testing the dimensions taken from the plans' axes."""
+        plan = QueryPlan("AvgLandTemp", ('Lat(0:10)', 'Long(5)', 'ansi("2012-01":"2012-12")'))
+        self.assertEqual(plan_axes(plan), ("Lat", "ansi"))
+        self.assertEqual(plan_axes(plan, ("ansi", "Lat", "Long")), ("ansi", "Lat"))
+        self.assertEqual(plan_axes(QueryPlan("AvgLandTemp", ('Lat(0:10)',), aggregate_function="avg")), ())
+
+        wrapped = to_xarray(decode_csv(b"{1,2},{3,4},{5,6}"), plan, ("ansi", "Lat", "Long"))
+        self.assertEqual((wrapped.dims, wrapped.shape, wrapped.name), (("ansi", "Lat"), (3, 2), "AvgLandTemp"))
+        self.assertEqual(wrapped.attrs["query"], plan.render())
+        self.assertEqual(to_xarray(decode_csv(b'{"1 2","3 4"}'), QueryPlan("S2", ('E(0:10)',)), ("E",)).dims, ("dim_0", "dim_1", "dim_2"))
+        self.assertEqual(to_xarray(decode_csv(b'"1 2","3 4"'), QueryPlan("S2", ('E(0:10)',)), ("E",)).dims, ("E", "band"))
+        #an array without the plan's number of axes keeps xarray's default dimensions
+        self.assertEqual(to_xarray(decode_csv(b"1,2"), plan).dims, ("dim_0",))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
+import os
+import re
+import tempfile
 import unittest
+import numpy as np
 from src.datacube import DatacubeObject
 from src.database_connection import DatabaseConnectionObject
+from src.cost_estimate import Guardrail
+from tests.stand_in_server import StandInServer, coverage_description
 
 class TestDco(unittest.TestCase):
     def setUp(self):
@@ -637,6 +643,456 @@ class TestDco(unittest.TestCase):
 
         except Exception as e:
             self.fail(f"Sobel execution failed with error: {e}")
-        
+
+
+class TestDcoOffline(unittest.TestCase):
+    """Tests running against a local stand-in server instead of ows.rasdaman.org."""
+    def setUp(self):
+        self.server = StandInServer().__enter__()
+        self.dbc = DatabaseConnectionObject(self.server.url)
+
+    def tearDown(self):
+        self.dbc.close()
+        self.server.__exit__(None, None, None)
+
+    def test_execute_many(self):
+        datacubes = []
+        for agg in ["avg", "min", "max"]:
+            datacube = DatacubeObject(self.dbc, "AvgLandTemp")
+            datacube.operations.append("Lat(53)")
+            datacubes.append(datacube.aggregate(agg))
+
+        results = DatacubeObject.execute_many(datacubes, max_workers=2)
+        self.assertEqual([query for _, query, _ in results], [datacube.build_query() for datacube in datacubes])
+        for response, query, error in results:
+            self.assertEqual(response, query.encode())
+            self.assertIsNone(error)
+        self.assertEqual(DatacubeObject.execute_many([]), [])
+
+        #datacubes with the same query share a single request
+        self.server.posted_queries.clear()
+        same = DatacubeObject(self.dbc, "AvgLandTemp").aggregate("avg")
+        same.operations.append("Lat(53)")
+        results = DatacubeObject.execute_many(datacubes + [same, datacubes[1]])
+        self.assertEqual([result[:2] for result in results[3:]], [result[:2] for result in results[:2]])
+        self.assertEqual(len(self.server.posted_queries), 3)
+
+        with self.assertRaises(TypeError):
+            DatacubeObject.execute_many(["not a datacube"])
+        with self.assertRaises(ValueError):
+            DatacubeObject.execute_many([datacubes[0], DatacubeObject(DatabaseConnectionObject(self.server.url), "AvgLandTemp")])
+
+    def test_bounds_validation(self):
+        dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        datacube = DatacubeObject(dbc, "AvgLandTemp")
+        validator = dbc.bounds_validator("AvgLandTemp")
+        self.assertIs(dbc.bounds_validator("AvgLandTemp"), validator)
+        self.assertEqual(validator.lat, (-90.0, 90.0))
+
+        datacube.subset("Lat", "0.5:10.25").subset("Long", "-90:-100").subset("Lat", 90).subset("Lat", "10:-10")
+        self.assertEqual(datacube.operations, ["Lat(0.5:10.25)", "Long(-90:-100)", "Lat(90)", "Lat(10:-10)"])
+        for dimension, range_str in [("Lat", "-95:10"), ("Lat", "0:90.5"), ("Long", "170:188"), ("Lat", "a:b"), ("Lat", "1:2:3")]:
+            with self.assertRaises(ValueError):
+                datacube.subset(dimension, range_str)
+        with self.assertRaises(TypeError):
+            validator.check_lat(0, "10")
+
+        datacube.timerange("2012-06", "2014-03").check_years("2015-06-01")
+        for start, end in [("2016-01", None), ("2014-06", "2012-03"), ("2012/01", "2012-02")]:
+            with self.assertRaises(ValueError):
+                datacube.timerange(start, end)
+        with self.assertRaises(ValueError):
+            datacube.polygon([(0, 0), (10, 0), (95, 10)])
+
+        coverages = {"mean_summer_airtemp": dbc.pre_processed_coverage_dict["mean_summer_airtemp"]}
+        dbc.pre_processed_coverage_dict = coverages
+        with self.assertRaises(Exception):
+            datacube.check_lat(0)
+        DatacubeObject(dbc, "mean_summer_airtemp").subset("Lat", "-40:-10").subset("Long", 120)
+        with self.assertRaises(Exception):
+            DatacubeObject(dbc, "mean_summer_airtemp").check_years("2012-01")
+
+        #Without preprocessed coverages nothing can be checked
+        for check in [lambda: DatacubeObject(self.dbc, "AvgLandTemp").subset("Long", 10),
+                      lambda: DatacubeObject(self.dbc, "AvgLandTemp").check_lat(10),
+                      lambda: DatacubeObject(self.dbc, "AvgLandTemp").timerange("2012-01")]:
+            with self.assertRaisesRegex(Exception, "Unable to check"):
+                check()
+
+    def test_polygon_simplification(self):
+        dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        datacube = DatacubeObject(dbc, "AvgLandTemp")
+        side = [i / 10 for i in range(10)]
+        square = [(x, 0) for x in side] + [(1, y) for y in side] + [(1 - x, 1) for x in side] + [(0, 1 - y) for y in side]
+
+        datacube.polygon(square)
+        self.assertEqual(datacube.polygon_set[0].count(","), 39)
+        datacube.polygon(square, tolerance=0.01)
+        self.assertEqual(datacube.polygon_set, ("let $polygon := POLYGON((0.0 0, 1 0.0, 1.0 1, 0 1.0))", "image/png"))
+        #a dated vertex is only dropped when its neighbours have its date, so the temporal footprint is kept
+        datacube.polygon([(0, 0, "2012-01"), (0.5, 0, "2012-02"), (1, 0, "2012-03"), (1, 1, "2012-04")], tolerance=0.1)
+        self.assertEqual(datacube.polygon_set,
+                         ('let $polygon := POLYGON(("2012-01" 0 0, "2012-02" 0.5 0, "2012-03" 1 0, "2012-04" 1 1))', "csv"))
+        datacube.polygon([(0, 0, "2012-01"), (0.5, 0, "2012-01"), (1, 0, "2012-01"), (1, 1, "2012-04")], tolerance=0.1)
+        self.assertEqual(datacube.polygon_set,
+                         ('let $polygon := POLYGON(("2012-01" 0 0, "2012-01" 1 0, "2012-04" 1 1))', "csv"))
+
+        for coordinates in [square[:-1] + [(95, 0)], square[:-1] + [(0, 181)],
+                            [(0, 0, "2012-01"), (1, 0, "2016-01"), (1, 1, "2012-01")]]:
+            with self.assertRaises(ValueError):
+                datacube.polygon(coordinates)
+        with self.assertRaises(TypeError):
+            datacube.polygon(square[:-1] + [(0, "1")])
+
+    def test_optimization(self):
+        dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        datacube = DatacubeObject(dbc, "AvgLandTemp").subset("Lat", "0:20").subset("Lat", "5:10").to_Kelvin()
+        datacube.add_condition("+", 1).aggregate("avg")
+        self.assertEqual(datacube.build_query(), "for $c in (AvgLandTemp) return avg($c[Lat(0:20),Lat(5:10)]+ 273.15 + 1)")
+        response, query = datacube.execute()
+        self.assertEqual(query, "for $c in (AvgLandTemp) return avg($c[Lat(5:10)]+ 274.15)")
+        self.assertEqual(self.server.posted_queries, [query])
+        self.assertEqual(datacube.execute(optimize=False)[1], datacube.build_query())
+
+    def test_shared_variables(self):
+        datacube = DatacubeObject(self.dbc, "AvgLandTemp")
+        datacube.init_var("AvgLandTemp", "c").main_subset("$c", 'Lat(53.08), Long(8.80), ansi("2014-01":"2014-12")')
+        datacube.init_var("AvgLandTemp", "e").main_subset("$e", 'Lat(53.08),Long(8.80),ansi("2014-01":"2014-12")')
+        datacube.init_var("AvgTemperatureColor", "d").main_subset("$d", 'Lat(53.08), Long(8.80), ansi("2014-01":"2014-12")')
+        self.assertEqual(datacube.shared_variables(), {"$c": "$c", "$e": "$c", "$d": "$d"})
+
+        subset = '[Lat(53.08), Long(8.80), ansi("2014-01":"2014-12")]'
+        self.assertEqual(datacube.replace_vars("($c - $e) / $d"),
+                         ("$c in (AvgLandTemp), $d in (AvgTemperatureColor)", f"($c{subset} - $c{subset}) / $d{subset}"))
+        self.assertEqual(datacube.replace_vars("$e + $c", "$e"),
+                         ("$e in (AvgLandTemp)", '$e[Lat(53.08),Long(8.80),ansi("2014-01":"2014-12")] + $c'))
+        datacube.combination_complex_query("$c - $e")
+        self.assertEqual(datacube.d_build_query(),
+                         f'for $c in (AvgLandTemp), $d in (AvgTemperatureColor) return encode ($c{subset} - $c{subset}, "csv")')
+
+    def test_variable_registry(self):
+        datacube = DatacubeObject(self.dbc, "AvgLandTemp")
+        datacube.init_var("AvgLandTemp", "c").init_var("AvgLandTemp", "d").main_subset("$d", "Lat(53)")
+        datacube.init_var("AvgTemperatureColor", "c")
+        self.assertEqual(datacube.d_query_vars, ["$c", "$d"])
+        self.assertEqual(datacube.d_coverages, ["AvgTemperatureColor", "AvgLandTemp"])
+        self.assertEqual(datacube.d_main_operations, [None, "Lat(53)"])
+        with self.assertRaises(ValueError):
+            datacube.main_subset("$e", "Lat(53)")
+
+        #without a command the expression is a single variable, not a concatenation of them
+        self.assertEqual(datacube.replace_vars(), ("$c in (AvgTemperatureColor), $d in (AvgLandTemp)", "$d [Lat(53)]"))
+        datacube.d_main_operations = [None, None]
+        self.assertEqual(datacube.replace_vars()[1], "$d")
+
+        datacube.d_query_vars = ["$d", "$e"]
+        datacube.d_main_operations = ["Long(8)"]
+        self.assertEqual((datacube.d_coverages, datacube.d_main_operations), (["AvgLandTemp", None], ["Long(8)", None]))
+        with self.assertRaises(ValueError):
+            datacube.d_coverages = ["AvgLandTemp"] * 3
+
+        #hundreds of variables are substituted in one pass
+        datacube.reset()
+        for i in range(500):
+            datacube.init_var("AvgLandTemp", f"v{i}").main_subset(f"$v{i}", f"Lat({i / 10})")
+        command = " + ".join(f"$v{i}" for i in range(500))
+        variables, expression = datacube.replace_vars(command)
+        self.assertEqual(variables.count(" in "), 500)
+        self.assertEqual(expression.count("$v1["), 1)
+        self.assertTrue(expression.startswith("$v0[Lat(0.0)] + $v1[Lat(0.1)]"))
+
+    def test_replace_vars_prefix_overlap(self):
+        datacube = DatacubeObject(self.dbc, "AvgLandTemp")
+        datacube.init_var("AvgLandTemp", "c").main_subset("$c", "Lat(53)")
+        datacube.init_var("AvgTemperatureColor", "cc").main_subset("$cc", "Long(8)")
+        #$c is not replaced inside $cc, nor inside the $cc[...] it was replaced by
+        self.assertEqual(datacube.replace_vars("$cc - $c")[1], "$cc[Long(8)] - $c[Lat(53)]")
+        self.assertEqual(datacube.replace_vars("$c+$cc", "$c")[1], "$c[Lat(53)]+$cc")
+
+    def test_clamping(self):
+        dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        datacube = DatacubeObject(dbc, "AvgLandTemp", clamp=True)
+        datacube.subset("Lat", "-95:10").subset("Long", "170.5:188").subset("Lat", "10:-10").subset("Lat", 90)
+        datacube.timerange("1999-01", "2012-06").timerange("2014-01", "2016-01-15").timerange("2012-07")
+        self.assertEqual(datacube.operations, ["Lat(-90:10)", "Long(170.5:180)", "Lat(10:-10)", "Lat(90)",
+                                               'ansi("2000-02-01":"2012-06")', 'ansi("2014-01":"2015-06-01")',
+                                               'ansi("2012-07")'])
+        self.assertFalse(datacube.empty_result)
+        #format and order errors are still raised
+        for start, end in [("2014-06", "2012-03"), ("2012/01", "2012-02")]:
+            with self.assertRaises(ValueError):
+                datacube.timerange(start, end)
+        with self.assertRaises(TypeError):
+            DatacubeObject(dbc, "AvgLandTemp", clamp="yes")
+
+        #a range outside of the extent short-circuits to an empty result
+        empty = DatacubeObject(dbc, "mean_summer_airtemp", clamp=True).subset("Lat", "0:10").aggregate("avg")
+        self.assertTrue(empty.empty_result)
+        self.assertEqual(empty.execute(), (b"", None))
+        self.assertTrue(DatacubeObject(dbc, "AvgLandTemp", clamp=True).timerange("2016-01", "2017-01").empty_result)
+        with self.assertRaises(ValueError):
+            empty.create_datacube("unused.nc")
+        self.assertEqual(self.server.posted_queries, [])
+
+        datacube.aggregate("avg")
+        results = DatacubeObject.execute_many([empty, datacube])
+        self.assertEqual(results[0], (b"", None, None))
+        self.assertEqual(results[1], (datacube.build_query().encode(), datacube.build_query(), None))
+        self.assertEqual(self.server.posted_queries, [datacube.build_query()])
+
+    def test_sample_points(self):
+        def field(query):
+            #every band samples lat * 1000 + lon, at 3 time steps over a time range
+            cells = [float(lat) * 1000 + float(lon) for lat, lon in re.findall(r'Lat\(([^)]*)\),Long\(([^)]*)\)', query)]
+            steps = 3 if '":"' in query else 1
+            return 200, ",".join('"' + " ".join(str(cell + step) for cell in cells) + '"' for step in range(steps)).encode()
+
+        with StandInServer(responder=field) as server:
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url)
+            datacube = DatacubeObject(dbc, "AvgLandTemp")
+            points = np.column_stack((np.linspace(-80, 80, 50), np.linspace(-170, 170, 50)))
+            expected = points[:, 0] * 1000 + points[:, 1]
+
+            samples = datacube.sample_points(points, time_range="2014-01", max_query_length=1000)
+            np.testing.assert_allclose(samples, expected)
+            self.assertTrue(1 < len(server.posted_queries) < 10)
+            self.assertTrue(all(len(query) <= 1000 and 'ansi("2014-01")' in query for query in server.posted_queries))
+
+            series = datacube.sample_points(points[:3].tolist(), time_range=("2012-01", "2012-03"), as_xarray=True)
+            self.assertEqual(series.dims, ("point", "ansi"))
+            np.testing.assert_allclose(series.values, expected[:3, None] + np.arange(3))
+            np.testing.assert_allclose(series.lat.values, points[:3, 0])
+            self.assertEqual(datacube.sample_points([]).shape, (0,))
+
+            #the extras are applied to every sample
+            queries = len(server.posted_queries)
+            datacube.to_Kelvin().sample_points(points[:2])
+            self.assertEqual(len(server.posted_queries), queries + 1)
+            self.assertIn("+ 273.15", server.posted_queries[-1])
+
+            #invalid points are rejected before anything is sent, unless the datacube clamps
+            for bad_points, error in [([(0, 190)], ValueError), ([(0, 0, 0)], ValueError), ([("a", "b")], TypeError)]:
+                with self.assertRaises(error):
+                    datacube.sample_points(bad_points)
+            with self.assertRaises(ValueError):
+                datacube.sample_points(points, time_range="2016-01")
+            with self.assertRaises(TypeError):
+                datacube.sample_points(points, time_range=2014)
+            self.assertEqual(len(server.posted_queries), queries + 1)
+            clamped = DatacubeObject(dbc, "AvgLandTemp", clamp=True).sample_points([(0, 190), (10, 20)])
+            np.testing.assert_allclose(clamped, [np.nan, 10020])
+            dbc.close()
+
+    def test_execute_chunked(self):
+        failed = set()
+
+        def monthly(query):
+            #a 2 x 2 grid per month, whose cells count the months since 2000-01, failing once per chunk from 2001
+            start, end = re.search(r'ansi\("([^"]*)":"([^"]*)"\)', query).groups()
+            months = np.arange(np.datetime64(start, "M"), np.datetime64(end, "M") + 1).astype(int) - 360
+            if start >= "2001" and start not in failed:
+                failed.add(start)
+                return 500, b"overloaded"
+            return 200, ",".join("{{%d,%d},{%d,%d}}" % tuple(month * 10 + np.arange(4)) for month in months).encode()
+
+        with StandInServer(responder=monthly) as server:
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url)
+            datacube = DatacubeObject(dbc, "AvgLandTemp").subset("Lat", "0:10").subset("Long", "0:10")
+            datacube.timerange("2000-02", "2002-06")
+            stitched, queries = datacube.execute_chunked(steps_per_chunk=12)
+            self.assertEqual(stitched.shape, (29, 2, 2))
+            np.testing.assert_array_equal(stitched[:, 0, 0], np.arange(1, 30) * 10)
+            self.assertEqual(len(queries), 3)
+            self.assertIn('ansi("2001-02-01":"2002-01-31")', queries[1])
+            #the two chunks from 2001 were sent again, and only those
+            self.assertEqual(len(server.posted_queries), 5)
+            self.assertEqual(sorted(server.posted_queries[3:]), sorted(queries[1:]))
+
+            stitched, queries = datacube.execute_chunked(max_bytes=100, bytes_per_step=40)
+            self.assertEqual((stitched.shape, len(queries)), ((29, 2, 2), 15))
+            with self.assertRaises(Exception):
+                datacube.execute_chunked(steps_per_chunk=5, retries=0)
+            for kwargs in [{}, {"steps_per_chunk": 12, "max_bytes": 100}, {"max_bytes": 100}]:
+                with self.assertRaises(ValueError):
+                    datacube.execute_chunked(**kwargs)
+            for other in [DatacubeObject(dbc, "AvgLandTemp").subset("Lat", 0),
+                          DatacubeObject(dbc, "AvgLandTemp").timerange("2012-01"),
+                          DatacubeObject(dbc, "AvgLandTemp").timerange("2012-01", "2013-01").aggregate("avg")]:
+                with self.assertRaises(ValueError):
+                    other.execute_chunked(steps_per_chunk=12)
+            #the steps are the coverage's monthly time steps, whatever the unit
+            self.assertEqual(datacube.execute_chunked(steps_per_chunk=12, unit="D")[1], datacube.execute_chunked(steps_per_chunk=12)[1])
+            dbc.close()
+
+        #without the listed time steps, a unit finer than the coverage's is refused rather than sent as empty chunks
+        described = {"AvgLandTemp": coverage_description("AvgLandTemp", [("ansi", "2000-02-01", "2015-06-01", 185),
+                                                                          ("Lat", -90, 90, 1800), ("Long", -180, 180, 3600)])}
+        with StandInServer(responder=monthly, descriptions=described) as server:
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url)
+            datacube = DatacubeObject(dbc, "AvgLandTemp").subset("Lat", "0:10").subset("Long", "0:10")
+            datacube.timerange("2000-02", "2002-06")
+            with self.assertRaises(ValueError):
+                datacube.execute_chunked(steps_per_chunk=30, unit="D")
+            self.assertEqual(server.posted_queries, [])
+            self.assertEqual(len(datacube.execute_chunked(steps_per_chunk=12)[1]), 3)
+            dbc.close()
+
+    def test_tile_queries(self):
+        dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        datacube = DatacubeObject(dbc, "AvgLandTemp").subset("Lat", "0:10").subset("Long", "0:20").timerange("2012-01", "2012-06")
+        #6 time steps of 100 x 100 cells per tile
+        queries, lat_edges, lon_edges = datacube.tile_queries(max_bytes=100 * 100 * 6 * 4)
+        self.assertEqual((lat_edges.tolist(), lon_edges.tolist()), ([0, 10], [0, 10, 20]))
+        self.assertEqual(queries, ['for $c in (AvgLandTemp) return encode($c[Lat(0:10),Long(0:10),ansi("2012-01":"2012-06")], "netcdf")',
+                                   'for $c in (AvgLandTemp) return encode($c[Lat(0:10),Long(10:20),ansi("2012-01":"2012-06")], "netcdf")'])
+        self.assertEqual(len(datacube.tile_queries()[0]), 1)
+
+        #the axes without subset span the coverage's extent, the sliced ones aren't tiled
+        queries, lat_edges, lon_edges = DatacubeObject(dbc, "mean_summer_airtemp").subset("Lat", -20).tile_queries(1000, 1)
+        self.assertEqual((lat_edges.tolist(), len(queries)), ([-20, -20], 1))
+        self.assertTrue(queries[0].endswith('[Lat(-20),Long(111.975:156.275)], "netcdf")'))
+        queries, lat_edges, lon_edges = DatacubeObject(dbc, "mean_summer_airtemp").tile_queries(100 * 100 * 4)
+        self.assertEqual((len(lat_edges), len(lon_edges), len(queries)), (9, 10, 72))
+        self.assertEqual(dbc.coverage_grid("mean_summer_airtemp").cells, (711, 886))
+
+        for other, kwargs in [(datacube, {"max_bytes": 0}), (datacube, {"bytes_per_cell": 2.5}),
+                              (DatacubeObject(dbc, "AvgLandTemp").aggregate("avg"), {}),
+                              (DatacubeObject(dbc, "AvgLandTemp").encode("image/png"), {})]:
+            with self.assertRaises(ValueError):
+                other.tile_queries(**kwargs)
+        with self.assertRaises(Exception):
+            DatacubeObject(dbc, "S2_L2A_32631_B01_60m").tile_queries()
+        empty = DatacubeObject(dbc, "AvgLandTemp", clamp=True).subset("Lat", "95:99")
+        dataset, queries = empty.execute_tiled()
+        self.assertEqual((len(dataset.data_vars), queries), (0, []))
+        self.assertEqual(self.server.posted_queries, [])
+
+    def test_estimate(self):
+        dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        datacube = DatacubeObject(dbc, "AvgLandTemp").subset("Lat", "0:10").subset("Long", 5).timerange("2012-01", "2012-12")
+        estimate = datacube.estimate()
+        self.assertEqual(estimate.axes, {"ansi": 12, "Lat": 100, "Long": 1})
+        self.assertEqual((estimate.cells, estimate.output_cells, estimate.encoding, estimate.round_trips), (1200, 1200, "csv", 1))
+        self.assertEqual(estimate.output_bytes, estimate.bytes["csv"])
+        self.assertEqual(datacube.aggregate("avg").estimate().output_cells, 1)
+        self.assertEqual(DatacubeObject(dbc, "AvgLandTemp").encode("netcdf").estimate().output_bytes, 185 * 1800 * 3600 * 4)
+        self.assertEqual(DatacubeObject(dbc, "AvgLandTemp", clamp=True).subset("Lat", "95:99").estimate().round_trips, 0)
+        #without a grid the cost is unknown
+        self.assertIsNone(DatacubeObject(dbc, "S2_L2A_32631_B01_60m").estimate().cells)
+
+        #a refusing guardrail stops the query before it's sent, a tiling one plans its tiles
+        guarded = DatacubeObject(dbc, "AvgLandTemp", guardrail=Guardrail(max_cells=1000)).subset("Lat", "0:10")
+        with self.assertRaisesRegex(ValueError, "guardrail"):
+            guarded.execute()
+        self.assertEqual(self.server.posted_queries, [])
+        guarded.subset("Long", 5).timerange("2012-01", "2012-03")
+        self.assertEqual(guarded.execute(), (guarded.build_query(True).encode(), guarded.build_query(True)))
+        tiled = DatacubeObject(dbc, "AvgLandTemp", guardrail=Guardrail(max_bytes=4 * 100 * 100 * 12, action="tile"))
+        tiled.subset("Lat", "0:10").subset("Long", "0:20").timerange("2012-01", "2012-12")
+        self.assertEqual(tiled.estimate().round_trips, 2)
+        #execute keeps its return type: a tiling guardrail points to execute_tiled, which takes its budget
+        with self.assertRaisesRegex(ValueError, "guardrail.*execute_tiled"):
+            tiled.execute()
+        self.assertEqual(len(tiled.tile_queries(tiled.guardrail.tile_bytes())[0]), 2)
+        #the queries that can't be tiled get the guardrail's refusal, not the tiling error
+        cells = Guardrail(max_cells=1000, action="tile")
+        for untileable in [DatacubeObject(dbc, "AvgLandTemp", guardrail=cells).subset("Lat", "0:10").aggregate("avg"),
+                           DatacubeObject(dbc, "AvgLandTemp", guardrail=cells).encode("image/png")]:
+            with self.assertRaisesRegex(ValueError, "guardrail") as context:
+                untileable.execute()
+            self.assertNotIn("execute_tiled", str(context.exception))
+        self.assertEqual(self.server.posted_queries, [guarded.build_query(True)])
+        with self.assertRaises(TypeError):
+            DatacubeObject(dbc, "AvgLandTemp", guardrail={"max_cells": 10})
+
+    def test_fetch(self):
+        dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        budget = 4 * 100 * 100 * 12
+        tiled = DatacubeObject(dbc, "AvgLandTemp", guardrail=Guardrail(max_bytes=budget, action="tile"))
+        tiled.subset("Lat", "0:10").subset("Long", "0:20").timerange("2012-01", "2012-12")
+        #the echoed queries aren't netcdf files, so only the sent queries are checked
+        with self.assertRaises(Exception):
+            tiled.fetch()
+        #the tiles are sent concurrently, in any order
+        self.assertEqual(sorted(self.server.posted_queries), sorted(tiled.tile_queries(budget)[0]))
+        self.assertEqual(len(self.server.posted_queries), 2)
+
+        #a query within the guardrail is sent as one netcdf query
+        self.server.posted_queries.clear()
+        within = DatacubeObject(dbc, "AvgLandTemp", guardrail=Guardrail(max_bytes=budget, action="tile"))
+        within.subset("Lat", "0:10").subset("Long", "0:10").timerange("2012-01", "2012-12")
+        with self.assertRaises(Exception):
+            within.fetch()
+        self.assertEqual(self.server.posted_queries,
+                         ['for $c in (AvgLandTemp) return encode($c[Lat(0:10),Long(0:10),ansi("2012-01":"2012-12")], "netcdf")'])
+
+        #a refusing guardrail refuses it, and the queries that can't be tiled aren't fetched
+        self.server.posted_queries.clear()
+        refused = DatacubeObject(dbc, "AvgLandTemp", guardrail=Guardrail(max_bytes=budget))
+        with self.assertRaisesRegex(ValueError, "guardrail"):
+            refused.subset("Lat", "0:10").subset("Long", "0:20").timerange("2012-01", "2012-12").fetch()
+        with self.assertRaises(ValueError):
+            DatacubeObject(dbc, "AvgLandTemp").aggregate("avg").fetch()
+        self.assertEqual(self.server.posted_queries, [])
+        empty = DatacubeObject(dbc, "AvgLandTemp", clamp=True, guardrail=Guardrail(max_bytes=budget, action="tile"))
+        dataset, queries = empty.subset("Lat", "95:99").fetch()
+        self.assertEqual((len(dataset.data_vars), queries), (0, []))
+
+    def test_create_datacube_atomic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "datacube.nc")
+            with open(filename, "wb") as f:
+                f.write(b"previous export")
+            #a failed export leaves the previous file, and no temporary file, behind
+            with StandInServer(responder=lambda query: (500, b"overloaded")) as server:
+                dbc = DatabaseConnectionObject(server.url, server.capabilities_url)
+                with self.assertRaises(Exception):
+                    DatacubeObject(dbc, "AvgLandTemp").create_datacube(filename)
+                dbc.close()
+            with open(filename, "rb") as f:
+                self.assertEqual(f.read(), b"previous export")
+            self.assertEqual(os.listdir(directory), ["datacube.nc"])
+
+            #a complete response replaces it, even if it isn't a dataset xarray can open
+            with self.assertRaises(Exception):
+                DatacubeObject(self.dbc, "AvgLandTemp").create_datacube(filename)
+            with open(filename, "rb") as f:
+                self.assertIn(b'encode($c, "netcdf")', f.read())
+            self.assertEqual(os.listdir(directory), ["datacube.nc"])
+
+    def test_execute_decode(self):
+        def grids(query):
+            #a 3 x 2 grid for the subsets, one value for the aggregates
+            return 200, b"21.5" if "avg(" in query else b"{1,2},{3,4},{5,6}"
+
+        with StandInServer(responder=grids) as server:
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url)
+            datacube = DatacubeObject(dbc, "AvgLandTemp").subset("Lat", "0:10").subset("Long", 5).timerange("2012-01", "2012-03")
+            array, query = datacube.execute(decode=True)
+            np.testing.assert_array_equal(array, [[1, 2], [3, 4], [5, 6]])
+            self.assertEqual(query, datacube.build_query(True))
+            wrapped, _ = datacube.execute(decode="xarray")
+            self.assertEqual((wrapped.dims, wrapped.name), (("ansi", "Lat"), "AvgLandTemp"))
+            array, _ = DatacubeObject(dbc, "AvgLandTemp").subset("Lat", 0).aggregate("avg").execute(decode=True)
+            self.assertEqual((array.shape, float(array)), ((), 21.5))
+            self.assertEqual(DatacubeObject(dbc, "AvgLandTemp", clamp=True).subset("Lat", "95:99").execute(decode=True)[0].shape, (0,))
+
+            #the dynamic queries' responses are decoded as well
+            dynamic = DatacubeObject(dbc)
+            dynamic.init_var("AvgLandTemp", "c")
+            dynamic.main_subset("$c", "Lat(0:10)")
+            np.testing.assert_array_equal(dynamic.d_execute(decode=True)[0], [[1, 2], [3, 4], [5, 6]])
+
+            #only the csv responses are decoded, and nothing is sent otherwise
+            server.posted_queries.clear()
+            for encoded in [DatacubeObject(dbc, "AvgLandTemp").encode("netcdf"), datacube]:
+                with self.assertRaises(ValueError):
+                    encoded.execute(decode="numpy" if encoded is datacube else True)
+            dynamic.d_encoding("image/png")
+            with self.assertRaises(ValueError):
+                dynamic.d_execute(decode=True)
+            self.assertEqual(server.posted_queries, [])
+            dbc.close()
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,7 @@
+import io
 import unittest
 from src.database_connection import DatabaseConnectionObject
+from tests.stand_in_server import StandInServer
 
 class dbc_tester(unittest.TestCase):
     def test_dbc_param(self):
@@ -72,6 +74,155 @@ class dbc_tester(unittest.TestCase):
                     self.fail(f"test case: {test_case} failed.")
 
 
+    def test_dbc_pool_param(self):
+        """Testing parameters' type check of the connection pool settings."""
+        failing_lst = [0, -1, 1.5, "10", True, None]
+
+        for test_case in failing_lst:
+            with self.assertRaises(ValueError):
+                DatabaseConnectionObject("doesn_t_matter", pool_connections=test_case)
+            with self.assertRaises(ValueError):
+                DatabaseConnectionObject("doesn_t_matter", pool_maxsize=test_case)
+
+        for test_case in [1, "yes", None]:
+            with self.assertRaises(ValueError):
+                DatabaseConnectionObject("doesn_t_matter", keep_alive=test_case)
+            with self.assertRaises(ValueError):
+                DatabaseConnectionObject("doesn_t_matter", pool_block=test_case)
+
+    def test_dbc_preprocessing_modes(self):
+        """Testing the eager, lazy and background coverage preprocessing."""
+        for test_case in ["", "later", None, True]:
+            with self.assertRaises(ValueError):
+                DatabaseConnectionObject("doesn_t_matter", preprocessing=test_case)
+
+        with StandInServer() as server:
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, preprocessing="lazy")
+            self.assertEqual(server.capabilities_requests, 0)
+            self.assertFalse(dbc.preprocessing_future.done())
+            self.assertTrue(dbc.pre_processed_coverage_support)
+            self.assertIn("AvgLandTemp", dbc.pre_processed_coverage_dict)
+            self.assertEqual(server.capabilities_requests, 1)
+
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, preprocessing="background")
+            self.assertTrue(dbc.wait_for_preprocessing(timeout=10))
+            self.assertTrue(dbc.preprocessing_future.result())
+            self.assertEqual(len(dbc.pre_processed_coverage_dict), 3)
+            self.assertEqual(server.capabilities_requests, 2)
+
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, preprocessing="lazy")
+            dbc.pre_processed_coverage_dict = {}
+            self.assertEqual(dbc.pre_processed_coverage_dict, {})
+            self.assertFalse(dbc.wait_for_preprocessing())
+            self.assertEqual(server.capabilities_requests, 2)
+
+        with StandInServer(capabilities_delay=0.5) as server:
+            #the timeout holds in lazy mode too, the preprocessing going on in the background
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, preprocessing="lazy")
+            with self.assertRaises(TimeoutError):
+                dbc.wait_for_preprocessing(timeout=0.05)
+            self.assertTrue(dbc.wait_for_preprocessing(timeout=10))
+
+            #a value set by hand during a background run is merged with the run's other one
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, preprocessing="background")
+            dbc.pre_processed_coverage_dict = {"AvgLandTemp": None}
+            self.assertTrue(dbc.pre_processed_coverage_support)
+            self.assertEqual(dbc.pre_processed_coverage_dict, {"AvgLandTemp": None})
+            dbc = DatabaseConnectionObject(server.url, server.capabilities_url, preprocessing="background")
+            dbc.pre_processed_coverage_support = False
+            self.assertEqual(len(dbc.pre_processed_coverage_dict), 3)
+            self.assertFalse(dbc.pre_processed_coverage_support)
+
+        dbc = DatabaseConnectionObject("doesn_t_matter", preprocessing="lazy")
+        self.assertFalse(dbc.pre_processed_coverage_support)
+        self.assertIsNone(dbc.pre_processed_coverage_dict)
+
+    def test_dbc_pooled_connection_reuse(self):
+        """Testing that consecutive queries reuse one keep-alive connection."""
+        with StandInServer() as server:
+            with DatabaseConnectionObject(server.url) as dbc:
+                dbc.test_connection()
+                for i in range(5):
+                    self.assertEqual(dbc.execute_query(f"avg($c) + {i}"), f"avg($c) + {i}".encode())
+            self.assertEqual(len(server.client_ports), 1)
+
+            with DatabaseConnectionObject(server.url, keep_alive=False) as dbc:
+                for i in range(3):
+                    dbc.execute_query("avg($c)")
+            self.assertEqual(len(server.client_ports), 4)
+
+    def test_dbc_close(self):
+        """Testing that a closed dataBaseConnectionObject refuses queries."""
+        with StandInServer() as server:
+            with DatabaseConnectionObject(server.url) as dbc:
+                dbc.execute_query("avg($c)")
+            self.assertTrue(dbc.closed)
+            with self.assertRaises(Exception):
+                dbc.execute_query("avg($c)")
+            with self.assertRaises(Exception):
+                dbc.test_connection()
+
+    def test_dbc_execute_many(self):
+        """Testing batch execution: order, per-query errors and worker bound."""
+        def responder(query):
+            if "fail" in query:
+                return 400, b"<ows:ExceptionText>Invalid query.</ows:ExceptionText>"
+            return 200, query.encode()
+
+        queries = [f"avg($c) + {i}" if i % 5 else "fail" for i in range(20)]
+        with StandInServer(responder, delay=0.02) as server:
+            with DatabaseConnectionObject(server.url) as dbc:
+                results = dbc.execute_many(queries, max_workers=3)
+            self.assertLessEqual(server.max_in_flight, 3)
+
+        self.assertEqual(len(results), len(queries))
+        for query, (response, error) in zip(queries, results):
+            if query == "fail":
+                self.assertIsNone(response)
+                self.assertIn("Invalid query.", str(error))
+            else:
+                self.assertEqual(response, query.encode())
+                self.assertIsNone(error)
+
+        dbc = DatabaseConnectionObject("doesn_t_matter")
+        for test_case in ["avg($c)", [1], None]:
+            with self.assertRaises(ValueError):
+                dbc.execute_many(test_case)
+        for test_case in [0, -1, 1.5, True]:
+            with self.assertRaises(ValueError):
+                dbc.execute_many([], max_workers=test_case)
+            with self.assertRaises(ValueError):
+                dbc.execute_many([], max_in_flight=test_case)
+
+    def test_dbc_execute_query_stream(self):
+        """Testing chunked streaming of a response, into an iterator or a sink."""
+        def responder(query):
+            if "fail" in query:
+                return 400, b"<ows:ExceptionText>Invalid query.</ows:ExceptionText>"
+            return 200, query.encode() * 1000
+
+        with StandInServer(responder) as server:
+            with DatabaseConnectionObject(server.url) as dbc:
+                chunks = list(dbc.execute_query_stream("0123456789", chunk_size=256))
+                self.assertTrue(all(len(chunk) <= 256 for chunk in chunks))
+                self.assertEqual(b"".join(chunks), b"0123456789" * 1000)
+
+                sink = io.BytesIO()
+                self.assertEqual(dbc.execute_query_stream("abc", sink=sink), 3000)
+                self.assertEqual(sink.getvalue(), b"abc" * 1000)
+
+                with self.assertRaises(Exception) as context:
+                    dbc.execute_query_stream("fail")
+                self.assertIn("Invalid query.", str(context.exception))
+                # the connection is still usable after a failed or a dropped stream
+                iter(dbc.execute_query_stream("dropped"))
+                self.assertEqual(dbc.execute_query("abc"), b"abc" * 1000)
+
+                for test_case in [0, -1, 1.5, True]:
+                    with self.assertRaises(ValueError):
+                        dbc.execute_query_stream("abc", chunk_size=test_case)
+                with self.assertRaises(ValueError):
+                    dbc.execute_query_stream("abc", sink="not a file")
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+from src.geometry import vertices_array, simplify
+
+
+class geometry_tester(unittest.TestCase):
+    def test_vertices_array(self):
+        """Testing the conversion and validation of polygon vertices."""
+        points, dates = vertices_array([(1, 2), (3.5, 4), (5, 6)])
+        self.assertEqual(points.tolist(), [[1.0, 2.0], [3.5, 4.0], [5.0, 6.0]])
+        self.assertIsNone(dates)
+        points, dates = vertices_array([(1, 2, "2012-01"), (3, 4, "2012-02"), (5, 6, "2012-03")])
+        self.assertEqual(points.shape, (3, 2))
+        self.assertEqual(dates, ["2012-01", "2012-02", "2012-03"])
+
+        with self.assertRaises(ValueError):
+            vertices_array([(1, 2, "2012-01"), (3, 4), (5, 6)])
+        with self.assertRaises(NotImplementedError):
+            vertices_array([(1,), (2,), (3,)])
+        for test_case in [[(1, 2), (3, "4"), (5, 6)], [(1, 2), (3, None), (5, 6)], [(1, 2), 3, (5, 6)],
+                          [(True, 2), (False, 4), (True, 6)]]:
+            with self.assertRaises(TypeError):
+                vertices_array(test_case)
+
+    def test_simplify(self):
+        """Testing the Douglas-Peucker simplification of polygon rings."""
+        # a square whose sides are sampled every 0.01 degrees, with a tiny noise
+        side = np.linspace(0, 1, 101)[:-1]
+        ring = np.concatenate([np.column_stack((side, np.zeros(100))), np.column_stack((np.ones(100), side)),
+                               np.column_stack((1 - side, np.ones(100))), np.column_stack((np.zeros(100), 1 - side))])
+        ring = ring + np.random.default_rng(0).uniform(-1e-4, 1e-4, ring.shape)
+
+        kept = simplify(ring, 1e-3)
+        self.assertEqual(kept.tolist(), [0, 100, 200, 300])
+        self.assertEqual(len(simplify(ring, 0)), len(ring))
+
+        closed = np.vstack((ring, ring[:1]))
+        self.assertEqual(simplify(closed, 1e-3).tolist(), [0, 100, 200, 300, 400])
+
+        # the vertices next to a change of date are kept, the other ones simplified between them
+        dates = ["2012-01"] * 150 + ["2012-02"] * 250
+        self.assertEqual(simplify(ring, 1e-3, dates).tolist(), [0, 100, 149, 150, 200, 300, 399])
+        self.assertEqual(simplify(ring, 1e-3, ["2012-01"] * 400).tolist(), [0, 100, 200, 300])
+        self.assertEqual(simplify(closed, 1e-3, dates + dates[:1]).tolist(), [0, 100, 149, 150, 200, 300, 399, 400])
+
+        flat = np.column_stack((np.linspace(0, 1, 10), np.zeros(10)))
+        self.assertEqual(len(simplify(flat, 1)), 3)
+        self.assertEqual(simplify(ring[:3], 1).tolist(), [0, 1, 2])
+        for test_case in [-1, "1", True, None]:
+            with self.assertRaises(ValueError):
+                simplify(ring, test_case)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,11 @@
+import glob
+import io
+import tempfile
+import tracemalloc
 import unittest
-from src.get_coverage import formatText, isBlank, getAvailableRequests, processedDataIntoList
+import xml.etree.ElementTree as ET
+from src.get_coverage import formatText, isBlank, getAvailableRequests, processedDataIntoList, iterCapabilities
+from tests.stand_in_server import StandInServer, capabilities_xml, coverage_summary
 
 
 class get_coverage_functions_tester(unittest.TestCase):
@@ -150,7 +156,63 @@ class get_coverage_functions_tester(unittest.TestCase):
                 except ValueError:
                     self.fail(f"test case: {test_case} failed.")
 
-
+    def test_iterCapabilities(self):
+        """Testing the incremental parsing of a capabilities document held in memory."""
+        rows = list(iterCapabilities(io.BytesIO(capabilities_xml())))
+        self.assertEqual([len(row) for row in rows], [5, 5, 6])
+        self.assertEqual(rows[0][0], "AvgLandTemp")
+        self.assertEqual(rows[0][3], ['"2000-02-01T00:00:00.000Z" -90 -180', '"2015-06-01T00:00:00.000Z" 90 180'])
+        self.assertEqual(rows[0][4], ["sizeInBytes", "1024", "axisList", "ansi,Lat,Long"])
+        self.assertEqual(rows[2][2], ["GridCoverage"])
+
+        with self.assertRaises(ET.ParseError):
+            list(iterCapabilities(io.BytesIO(b"<wcs:Capabilities><Contents>")))
+
+    def test_iterCapabilities_bounded_memory(self):
+        """Testing that parsing many coverages doesn't keep the whole document in memory."""
+        summary = coverage_summary("Coverage", [("ansi", "2000-02-01", "2015-06-01"), ("Lat", -90, 90), ("Long", -180, 180)])
+        document = capabilities_xml([summary] * 20000)
+
+        tracemalloc.start()
+        count = 0
+        for row in iterCapabilities(io.BytesIO(document)):
+            count += 1
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        self.assertEqual(count, 20000)
+        self.assertLess(peak, len(document) // 4)
+
+    def test_processDataIntoList_stand_in(self):
+        """Testing requesting and formatting coverages from a local stand-in server."""
+        with StandInServer() as server:
+            lst, ignored = processedDataIntoList(server.capabilities_url)
+            self.assertEqual(ignored, 0)
+            self.assertEqual([coverage.id for coverage in lst], ["AvgLandTemp", "mean_summer_airtemp", "S2_L2A_32631_B01_60m"])
+            self.assertEqual(lst[0].extracted_bounds_dict["coord_1"], ["-90", "90", "Lat"])
+
+            with tempfile.TemporaryDirectory() as debug_dir:
+                getAvailableRequests(server.capabilities_url, False, debugDir=debug_dir)
+                processedDataIntoList(server.capabilities_url, False, debugDir=debug_dir)
+                paths = glob.glob(debug_dir + "/.debug_*.xml")
+                self.assertEqual(len(paths), 2)
+                for path in paths:
+                    with open(path, "rb") as f:
+                        self.assertEqual(f.read(), server.capabilities)
+
+            with self.assertRaises(ValueError):
+                getAvailableRequests(server.capabilities_url, False, debugDir=1)
+            with self.assertRaises(ValueError):
+                processedDataIntoList(server.capabilities_url, False, session="session")
+
+        with StandInServer(capabilities=b"<not xml") as server:
+            self.assertEqual(getAvailableRequests(server.capabilities_url), [])
+            self.assertEqual(processedDataIntoList(server.capabilities_url), ([], 0))
+
+        #a connection dropped midway through the document gives the same empty results
+        with StandInServer(truncate_capabilities=True) as server:
+            self.assertEqual(getAvailableRequests(server.capabilities_url), [])
+            self.assertEqual(processedDataIntoList(server.capabilities_url), ([], 0))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from src.point_sampling import point_terms, pack_queries, parse_samples
+
+
+class point_sampling_tester(unittest.TestCase):
+    def setUp(self):
+        self.points = np.array([[53.08, 8.8], [40.0, 12.0], [-10.5, 100.25]])
+
+    def test_point_terms(self):
+        """Testing the band written for each point."""
+        self.assertEqual(point_terms(self.points[:2]), ["p0: $c[Lat(53.08),Long(8.8)]", "p1: $c[Lat(40.0),Long(12.0)]"])
+        self.assertEqual(point_terms(self.points[2:], ',ansi("2014-01")', "+ 273.15"),
+                         ['p0: $c[Lat(-10.5),Long(100.25),ansi("2014-01")]+ 273.15'])
+        self.assertEqual(point_terms(np.empty((0, 2))), [])
+
+    def test_pack_queries(self):
+        """Testing the packing of the bands into as few queries as the length limit allows."""
+        terms = point_terms(self.points)
+        self.assertEqual(pack_queries("AvgLandTemp", terms),
+                         [('for $c in (AvgLandTemp) return encode({' + "; ".join(terms) + '}, "csv")', 3)])
+
+        limit = len(pack_queries("AvgLandTemp", terms)[0][0])
+        packed = pack_queries("AvgLandTemp", terms * 10, limit)
+        self.assertEqual([count for _, count in packed], [3] * 10)
+        self.assertTrue(all(len(query) <= limit for query, _ in packed))
+        single = len(pack_queries("AvgLandTemp", terms[:1])[0][0])
+        self.assertEqual(pack_queries("AvgLandTemp", []), [])
+        with self.assertRaises(ValueError):
+            pack_queries("AvgLandTemp", terms, single - 1)
+
+    def test_parse_samples(self):
+        """Testing the reading of the packed csv responses."""
+        self.assertEqual(parse_samples(b'{"1 2.5 -3e2"}', 3).tolist(), [1, 2.5, -300])
+        np.testing.assert_array_equal(parse_samples(b'{"1 nan","2 NaN","3 -inf"}', 2),
+                                      [[1, 2, 3], [np.nan, np.nan, -np.inf]])
+        self.assertEqual(parse_samples(b"42", 1).tolist(), [42])
+        for response, count in [(b'{"1 2 3"}', 2), (b"", 1), (b"1", 0)]:
+            with self.assertRaises(ValueError):
+                parse_samples(response, count)
+
+if __name__ == "__main__":
+    unittest.main()
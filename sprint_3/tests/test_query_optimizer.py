@@ -0,0 +1,42 @@
+import unittest
+from src.query_plan import QueryPlan
+from src.query_optimizer import merge_subsets, fold_arithmetic, optimize
+
+
+class query_optimizer_tester(unittest.TestCase):
+    def test_merge_subsets(self):
+        """Testing the intersection of repeated axis subsets."""
+        self.assertEqual(merge_subsets(("Lat(0:20)", "Long(5)", "Lat(5:10)")), ("Lat(5:10)", "Long(5)"))
+        self.assertEqual(merge_subsets(("Lat(0:20)", "Lat(5)")), ("Lat(5)",))
+        self.assertEqual(merge_subsets(("Lat(10:-10)", "Lat(-5:20.5)")), ("Lat(-5:10)",))
+        self.assertEqual(merge_subsets(('ansi("2012-01":"2014-01")', "Lat(1)", 'ansi("2013-01-15":"2016-01")')),
+                         ('ansi("2013-01-15":"2014-01")', "Lat(1)"))
+        #disjoint, unparsable and single subsets are left alone
+        for operations in [("Lat(0:2)", "Lat(5:10)"), ("Lat(1)", "Lat(2)"), ("Lat(x)", "Lat(1)"), ("Lat(10:-10)",)]:
+            self.assertEqual(merge_subsets(operations), operations)
+
+    def test_fold_arithmetic(self):
+        """Testing the folding of the constant arithmetic."""
+        self.assertEqual(fold_arithmetic(("+ 273.15", "+ 1")), ("+ 274.15",))
+        self.assertEqual(fold_arithmetic(("+ 0.1", "+ 0.2", "> 300", "+ 2")), ("+ 0.3", "> 300", "+ 2"))
+        self.assertEqual(fold_arithmetic(("* 2", "* 3", "- 3", "* 4", "+ 1")), ("* 6", "- 11"))
+        self.assertEqual(fold_arithmetic(("/ 2", "/ 5")), ("/ 10",))
+        #no-op steps are dropped, unless they turn integers into floats
+        self.assertEqual(fold_arithmetic(("* 1", "+ 1", "- 1")), ())
+        self.assertEqual(fold_arithmetic(("+ 0.5", "- 0.5")), ("+ 0.0",))
+        #rounding folds, divisions by zero, comparisons and modulos are left alone
+        for extras in [("* 3", "/ 7"), ("/ 0",), ("> 3", "+ 1"), ("+ 1", "% 3"), ("+ x", "+ 1")]:
+            self.assertEqual(fold_arithmetic(extras), extras)
+
+    def test_optimize(self):
+        """Testing the optimization of whole plans."""
+        plan = QueryPlan("AvgLandTemp", ("Lat(0:20)", "Lat(5:10)"), ("+ 273.15", "+ 1"), "avg")
+        self.assertEqual(optimize(plan).render(), "for $c in (AvgLandTemp) return avg($c[Lat(5:10)]+ 274.15)")
+        plan = QueryPlan("AvgLandTemp", ("Lat(5:10)",), ("+ 1",))
+        self.assertIs(optimize(plan), plan)
+        with self.assertRaises(ValueError):
+            optimize("for $c in (AvgLandTemp) return $c")
+
+
+if __name__ == '__main__':
+    unittest.main()
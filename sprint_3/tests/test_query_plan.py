@@ -0,0 +1,47 @@
+import unittest
+from src.query_plan import QueryPlan
+from src.response_cache import ResponseCache, normalize_query
+
+
+class query_plan_tester(unittest.TestCase):
+    def setUp(self):
+        self.polygon = ("let $polygon := POLYGON((0 0, 1 0, 1 1))", "image/png")
+
+    def test_render(self):
+        """Testing the WCPS text written for each kind of plan."""
+        self.assertEqual(QueryPlan("AvgLandTemp", ["Lat(53)", "Long(54)"], ["+ 273.15"], "avg").render(),
+                         'for $c in (AvgLandTemp) return avg($c[Lat(53),Long(54)]+ 273.15)')
+        self.assertEqual(QueryPlan("AvgLandTemp", ["Lat(53)"], encode_type="image/png").render(),
+                         'for $c in (AvgLandTemp) return encode($c[Lat(53)], "image/png")')
+        self.assertEqual(QueryPlan("AvgLandTemp", ["Lat(53)"]).render(),
+                         'for $c in (AvgLandTemp) return encode($c[Lat(53)], "csv")')
+        self.assertEqual(QueryPlan("AvgLandTemp", polygon=self.polygon).render(),
+                         'for $c in (AvgLandTemp) let $polygon := POLYGON((0 0, 1 0, 1 1)) '
+                         'return encode (clip($c, $polygon), "image/png")')
+        colors = QueryPlan("AvgLandTemp", ["Lat(53)"], color_cases=[("case 10", "return {red: 0; green: 0; blue: 255}")])
+        self.assertIn("\t\tcase 10 > $c[Lat(53)] return {red: 0; green: 0; blue: 255}\n", colors.render())
+
+        #the polygon is no longer dropped next to axis operations, nor is an empty plan left without a query
+        self.assertEqual(QueryPlan("AvgLandTemp", ['ansi("2012-01")'], aggregate_function="max", polygon=self.polygon).render(),
+                         'for $c in (AvgLandTemp) let $polygon := POLYGON((0 0, 1 0, 1 1)) '
+                         'return max(clip($c[ansi("2012-01")], $polygon))')
+        self.assertEqual(QueryPlan("AvgLandTemp").render(), 'for $c in (AvgLandTemp) return encode($c, "csv")')
+
+    def test_identity(self):
+        """Testing the immutability and the canonical form of plans."""
+        plan = QueryPlan("AvgLandTemp", ["Lat(53)"], aggregate_function="avg")
+        with self.assertRaises(AttributeError):
+            plan.operations = ()
+        with self.assertRaises(AttributeError):
+            plan.extra = None
+        self.assertIs(plan.render(), plan.render())
+        self.assertEqual(plan.canonical(), normalize_query(plan.render()))
+        self.assertEqual(ResponseCache.canonical_key(plan.canonical(), "url"), ResponseCache.key(plan.render(), "url"))
+
+        same = QueryPlan("AvgLandTemp", ("Lat(53)", ), aggregate_function="avg")
+        self.assertEqual(plan, same)
+        self.assertEqual(len({plan, same, QueryPlan("AvgLandTemp", ["Lat(54)"], aggregate_function="avg")}), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from src.database_connection import DatabaseConnectionObject
+from src.datacube import DatacubeObject
+from src.query_template import QueryTemplate
+from tests.stand_in_server import StandInServer
+
+
+class query_template_tester(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInServer().__enter__()
+        self.dbc = DatabaseConnectionObject(self.server.url, self.server.capabilities_url)
+        self.template = DatacubeObject(self.dbc, "AvgLandTemp").aggregate("avg").prepare(lat="Lat", date="ansi")
+
+    def tearDown(self):
+        self.dbc.close()
+        self.server.__exit__(None, None, None)
+
+    def test_render(self):
+        """Testing the compilation and the rendering of templates."""
+        self.assertEqual(self.template.placeholders, ("lat", "date"))
+        self.assertEqual(self.template.render(lat=53.08, date="2014-01"),
+                         'for $c in (AvgLandTemp) return avg($c[Lat(53.08),ansi("2014-01")])')
+        self.assertEqual(self.template.render_many({"lat": [1, (3, 4.5)], "date": [("2014-01", "2014-03"), "2014-02"]}),
+                         ['for $c in (AvgLandTemp) return avg($c[Lat(1),ansi("2014-01":"2014-03")])',
+                          'for $c in (AvgLandTemp) return avg($c[Lat(3:4.5),ansi("2014-02")])'])
+        self.assertEqual(self.template.render_many([]), [])
+
+        #untyped placeholders are written as they are, wherever they appear
+        sobel = QueryTemplate(DatacubeObject(self.dbc, "S2_L2A_32631_B01_60m").sobel_edge_detection_query(
+            "$c", cut_out=["{i_min}", "{i_max}", "{j_min}", "{j_max}"]))
+        self.assertEqual(sobel.placeholders, ("i_min", "i_max", "j_min", "j_max"))
+        self.assertIn("$cutOut := [ i(10:900), j(10:800) ]", sobel.render(i_min=10, i_max=900, j_min=10, j_max=800))
+
+    def test_validate(self):
+        """Testing the bulk validation of parameter sets."""
+        self.template.validate({"lat": [-90, 0.5, (10, 90)], "date": ["2000-02", "2015-06-01", ("2012-01", "2012-02")]})
+        for parameters in [{"lat": [95], "date": ["2014-01"]}, {"lat": [1], "date": ["2016-01"]},
+                           {"lat": [1, 2], "date": ["2014-01"]}, {"lat": [1]}, [{"lat": 1}], "lat=1"]:
+            with self.assertRaises(ValueError):
+                self.template.validate(parameters)
+        #the ranges' ends are checked against each other, not only against the bounds
+        for parameters in [{"lat": [(20, 10)], "date": ["2014-01"]}, {"lat": [1], "date": [("2014-02", "2014-01")]},
+                           {"lat": [(1, 2, 3)], "date": ["2014-01"]}]:
+            with self.assertRaises(ValueError):
+                self.template.validate(parameters)
+        with self.assertRaises(TypeError):
+            self.template.validate({"lat": ["1"], "date": ["2014-01"]})
+        for arguments in [("Lat({lat})", self.dbc, "AvgLandTemp", {"lat": "Height"}),
+                          ("Lat({lat})", self.dbc, "AvgLandTemp", {"lon": "Long"}),
+                          ("Lat({lat})", None, None, {"lat": "Lat"}), (10, )]:
+            with self.assertRaises(ValueError):
+                QueryTemplate(*arguments)
+        #an axis can't be subset twice, by two placeholders or by a placeholder and the datacube
+        for placeholders in [{"lat": "Height"}, {"lat": "Lat", "lat_2": "Lat"}, {"lon": "Long"}]:
+            with self.assertRaises(ValueError):
+                DatacubeObject(self.dbc, "AvgLandTemp").subset("Long", 10).prepare(**placeholders)
+        self.assertEqual(DatacubeObject(self.dbc, "AvgLandTemp").subset("Long", 10).prepare(lat="Lat").placeholders,
+                         ("lat",))
+
+    def test_execute_many(self):
+        """Testing the batch execution of parameter sets."""
+        rows = [{"lat": 1, "date": "2014-01"}, {"lat": 2, "date": "2014-01"}, {"lat": 1, "date": "2014-01"}]
+        results = self.template.execute_many(rows, max_workers=2)
+        self.assertEqual([query for _, query, _ in results], self.template.render_many(rows))
+        for response, query, error in results:
+            self.assertEqual(response, query.encode())
+            self.assertIsNone(error)
+        self.assertEqual(len(self.server.posted_queries), 2)
+        with self.assertRaises(ValueError):
+            QueryTemplate("{x}").execute_many({"x": [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
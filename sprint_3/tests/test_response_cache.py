@@ -0,0 +1,169 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from src.database_connection import DatabaseConnectionObject
+from src.response_cache import ResponseCache, normalize_query, query_coverages
+from tests.stand_in_server import StandInServer
+
+ENDPOINT = "https://ows.rasdaman.org/rasdaman/ows"
+
+
+class response_cache_tester(unittest.TestCase):
+    def test_cache_param(self):
+        """Testing parameters' type check of a ResponseCache."""
+        for test_case in [-1, 1.5, "10", True]:
+            with self.assertRaises(ValueError):
+                ResponseCache(max_bytes=test_case)
+        for test_case in [0, -1, "10", True]:
+            with self.assertRaises(ValueError):
+                ResponseCache(ttl=test_case)
+        with self.assertRaises(ValueError):
+            ResponseCache(disk_dir=1)
+        for test_case in [-1, 1.5, "10", True]:
+            with self.assertRaises(ValueError):
+                ResponseCache(max_disk_bytes=test_case)
+        with self.assertRaises(ValueError):
+            ResponseCache().put("avg($c)", ENDPOINT, "not bytes")
+
+    def test_normalize_query(self):
+        """Testing that whitespace-only differences share one normalized form."""
+        passing_pairs = [
+            ('for $c in (AvgLandTemp) return avg($c[Lat(0:10),Long(20:30)])',
+             'for $c in ( AvgLandTemp )\n\treturn avg( $c[ Lat(0 : 10), Long(20:30) ] )  '),
+            ('encode($c[ansi("2012-01")], "csv")', 'encode($c[ansi( "2012-01" )],\n"csv")'),
+        ]
+        failing_pairs = [
+            ('encode($c, "csv")', 'encode($c, " csv")'),
+            ('for $c in (AvgLandTemp) return avg($c)', 'for $c in (avglandtemp) return avg($c)'),
+        ]
+        for query_1, query_2 in passing_pairs:
+            self.assertEqual(normalize_query(query_1), normalize_query(query_2))
+        for query_1, query_2 in failing_pairs:
+            self.assertNotEqual(normalize_query(query_1), normalize_query(query_2))
+        with self.assertRaises(ValueError):
+            normalize_query(1)
+
+        self.assertEqual(query_coverages("for $c in (A), $d in (B, C) return $c + $d"), {"A", "B", "C"})
+
+    def test_lru_eviction(self):
+        """Testing the byte bound of the in-memory tier and its LRU order."""
+        cache = ResponseCache(max_bytes=10)
+        cache.put("q1", ENDPOINT, b"1234")
+        cache.put("q2", ENDPOINT, b"1234")
+        self.assertEqual(cache.get("q1", ENDPOINT), b"1234")
+        cache.put("q3", ENDPOINT, b"1234")
+        self.assertIsNone(cache.get("q2", ENDPOINT))
+        self.assertEqual(cache.get("q1", ENDPOINT), b"1234")
+        cache.put("too big", ENDPOINT, b"12345678901")
+        self.assertIsNone(cache.get("too big", ENDPOINT))
+        self.assertIsNone(cache.get("q1", "https://another.server/ows"))
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 3, 1))
+        self.assertEqual(stats["bytes"], 8)
+
+    def test_ttl(self):
+        """Testing that entries expire after their time to live."""
+        cache = ResponseCache(ttl=0.05)
+        cache.put("q1", ENDPOINT, b"1")
+        cache.put("q2", ENDPOINT, b"2", ttl=60)
+        self.assertEqual(cache.get("q1", ENDPOINT), b"1")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("q1", ENDPOINT))
+        self.assertEqual(cache.get("q2", ENDPOINT), b"2")
+
+    def test_disk_tier_and_invalidation(self):
+        """Testing the on-disk tier and the invalidation per coverage."""
+        with tempfile.TemporaryDirectory() as disk_dir:
+            cache = ResponseCache(disk_dir=disk_dir)
+            cache.put("for $c in (AvgLandTemp) return avg($c)", ENDPOINT, b"1")
+            cache.put("for $c in (NIR) return avg($c)", ENDPOINT, b"2")
+
+            other_process = ResponseCache(disk_dir=disk_dir)
+            self.assertEqual(other_process.get("for $c in (AvgLandTemp)  return avg($c)", ENDPOINT), b"1")
+            self.assertEqual(other_process.invalidate_coverage("AvgLandTemp"), 1)
+            self.assertIsNone(ResponseCache(disk_dir=disk_dir).get("for $c in (AvgLandTemp) return avg($c)", ENDPOINT))
+            self.assertEqual(ResponseCache(disk_dir=disk_dir).get("for $c in (NIR) return avg($c)", ENDPOINT), b"2")
+
+            cache.clear()
+            self.assertIsNone(ResponseCache(disk_dir=disk_dir).get("for $c in (NIR) return avg($c)", ENDPOINT))
+
+    def test_invalidation_during_disk_io(self):
+        """Testing that an invalidation running while the disk is read or written isn't undone."""
+        query = "for $c in (AvgLandTemp) return avg($c)"
+        with tempfile.TemporaryDirectory() as disk_dir:
+            #the coverage is invalidated between the write of the temporary files and their move into place
+            cache = ResponseCache(disk_dir=disk_dir)
+            write = cache._ResponseCache__temporary
+            def write_then_invalidate(data):
+                cache.invalidate_coverage("AvgLandTemp")
+                return write(data)
+            cache._ResponseCache__temporary = write_then_invalidate
+            cache.put(query, ENDPOINT, b"1")
+            self.assertEqual(os.listdir(disk_dir), [])
+            self.assertIsNone(cache.get(query, ENDPOINT))
+
+            #the coverage is invalidated while a disk hit is read, before it's stored in memory
+            ResponseCache(disk_dir=disk_dir).put(query, ENDPOINT, b"1")
+            cache = ResponseCache(disk_dir=disk_dir)
+            read = cache._ResponseCache__read_disk
+            def read_then_invalidate(key, now):
+                entry = read(key, now)
+                cache.invalidate_coverage("AvgLandTemp")
+                return entry
+            cache._ResponseCache__read_disk = read_then_invalidate
+            self.assertIsNone(cache.get(query, ENDPOINT))
+            self.assertEqual(cache.stats()["entries"], 0)
+            del cache._ResponseCache__read_disk
+            self.assertIsNone(cache.get(query, ENDPOINT))
+
+            #the other coverages' entries are kept
+            cache.put("for $c in (NIR) return avg($c)", ENDPOINT, b"2")
+            self.assertEqual(ResponseCache(disk_dir=disk_dir).get("for $c in (NIR) return avg($c)", ENDPOINT), b"2")
+
+    def test_disk_bound_and_errors(self):
+        """Testing the size bound of the on-disk tier, and that its write errors don't fail a put."""
+        with tempfile.TemporaryDirectory() as disk_dir:
+            cache = ResponseCache(max_bytes=0, disk_dir=disk_dir, max_disk_bytes=10)
+            queries = [f"for $c in (AvgLandTemp) return avg($c) + {i}" for i in range(3)]
+            for age, query in zip([200, 100], queries):
+                cache.put(query, ENDPOINT, b"1234")
+                written = time.time() - age
+                os.utime(os.path.join(disk_dir, ResponseCache.key(query, ENDPOINT) + ".bin"), (written, written))
+            #the third entry goes over the bound, the oldest written one is removed
+            cache.put(queries[2], ENDPOINT, b"1234")
+            self.assertEqual([cache.get(query, ENDPOINT) for query in queries], [None, b"1234", b"1234"])
+            cache.put("for $c in (NIR) return avg($c)", ENDPOINT, b"too big for the disk")
+            self.assertIsNone(cache.get("for $c in (NIR) return avg($c)", ENDPOINT))
+            self.assertFalse([name for name in os.listdir(disk_dir) if name.endswith(".tmp")])
+
+            #a failing disk is logged, and the entry kept in memory only
+            cache = ResponseCache(disk_dir=os.path.join(disk_dir, "gone"))
+            shutil.rmtree(cache.disk_dir)
+            with self.assertLogs("src.response_cache", "WARNING"):
+                cache.put("for $c in (NIR) return avg($c)", ENDPOINT, b"2")
+            self.assertEqual(cache.get("for $c in (NIR) return avg($c)", ENDPOINT), b"2")
+
+    def test_dbc_with_cache(self):
+        """Testing that repeated queries of a dataBaseConnectionObject skip the server."""
+        with self.assertRaises(ValueError):
+            DatabaseConnectionObject("doesn_t_matter", cache={})
+
+        cache = ResponseCache()
+        with StandInServer() as server:
+            with DatabaseConnectionObject(server.url, cache=cache) as dbc:
+                for _ in range(3):
+                    self.assertEqual(dbc.execute_query("for $c in (AvgLandTemp) return avg($c)"),
+                                     b"for $c in (AvgLandTemp) return avg($c)")
+                dbc.execute_query("for $c in (AvgLandTemp)\n return avg($c)")
+                self.assertEqual(len(server.posted_queries), 1)
+
+                cache.invalidate_coverage("AvgLandTemp")
+                dbc.execute_query("for $c in (AvgLandTemp) return avg($c)")
+                self.assertEqual(len(server.posted_queries), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
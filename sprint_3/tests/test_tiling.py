@@ -0,0 +1,54 @@
+import unittest
+import numpy as np
+import xarray as xr
+from src.tiling import tile_edges, plan_tiles, mosaic
+
+
+class tiling_tester(unittest.TestCase):
+    def setUp(self):
+        #a grid with a point on every integer, latitudes descending as in most netcdf responses
+        lat, lon = np.arange(10.0, -1, -1), np.arange(0.0, 21)
+        values = np.arange(lat.size * lon.size, dtype=float).reshape(lat.size, lon.size)
+        self.full = xr.Dataset({"v": (("Lat", "Long"), values)}, coords={"Lat": lat, "Long": lon})
+
+    def test_tile_edges(self):
+        """Testing the split of an axis into tiles of whole grid cells."""
+        np.testing.assert_allclose(tile_edges(0, 1, 0.1, 3), [0, 0.3, 0.6, 0.9, 1])
+        self.assertEqual(tile_edges(0, 1, 0.1, 5).tolist(), [0, 0.5, 1])
+        self.assertEqual(tile_edges(0, 1, 0.1, 20).tolist(), [0, 1])
+        self.assertEqual(tile_edges(5, 5, 0.1, 1).tolist(), [5, 5])
+
+    def test_plan_tiles(self):
+        """Testing the tiles' sizes for a cell budget."""
+        lat_edges, lon_edges = plan_tiles((0, 10), (0, 20), (0.1, 0.1), 10000)
+        self.assertEqual((lat_edges.tolist(), lon_edges.tolist()), ([0, 10], [0, 10, 20]))
+        #a narrow box gets long tiles rather than many small ones
+        lat_edges, lon_edges = plan_tiles((5, 5), (-180, 180), (0.1, 0.1), 1000)
+        self.assertEqual((lat_edges.tolist(), len(lon_edges)), ([5, 5], 5))
+        lat_edges, lon_edges = plan_tiles((-90, 90), (-180, 180), (0.1, 0.1), 1 << 30)
+        self.assertEqual((lat_edges.tolist(), lon_edges.tolist()), ([-90, 90], [-180, 180]))
+        for max_cells in [0, 1.5, True]:
+            with self.assertRaises(ValueError):
+                plan_tiles((0, 10), (0, 20), (0.1, 0.1), max_cells)
+
+    def test_mosaic(self):
+        """Testing that the tiles' shared edges are neither repeated nor left out."""
+        lat_edges, lon_edges = np.array([0.0, 4, 8, 10]), np.array([0.0, 10, 20])
+        #the server returns the rows and columns on the edges with both tiles
+        tiles = [self.full.sel(Lat=slice(lat_edges[i + 1], lat_edges[i]), Long=slice(lon_edges[j], lon_edges[j + 1]))
+                 for i in range(3) for j in range(2)]
+        self.assertEqual(sum(tile.sizes["Lat"] * tile.sizes["Long"] for tile in tiles), (5 + 5 + 3) * (11 + 11))
+        result = mosaic(tiles, lat_edges, lon_edges)
+        self.assertIsInstance(result, xr.Dataset)
+        xr.testing.assert_equal(result.sortby("Lat", ascending=False), self.full)
+
+        #a single tile, and tiles without one of the coordinates, are left as they are
+        xr.testing.assert_equal(mosaic([self.full], np.array([0.0, 10]), np.array([0.0, 20])), self.full)
+        row = self.full.isel(Lat=0, drop=True)
+        xr.testing.assert_equal(mosaic([row.sel(Long=slice(0, 10)), row.sel(Long=slice(10, 20))],
+                                       np.array([10.0, 10]), lon_edges), row)
+        with self.assertRaises(ValueError):
+            mosaic(tiles[:5], lat_edges, lon_edges)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+import numpy as np
+from src.time_chunking import steps_for_budget, chunk_ranges, chunk_points, execute_chunks, stitch
+
+
+class stand_in_dbc:
+    """Answers every query with its text, failing each query of failures the given number of times."""
+    def __init__(self, failures: dict):
+        self.failures = dict(failures)
+        self.batches = []
+
+    def execute_many(self, queries, max_workers=8):
+        self.batches.append(list(queries))
+        results = []
+        for query in queries:
+            if self.failures.get(query, 0):
+                self.failures[query] -= 1
+                results.append((None, Exception(f"bad response for {query}")))
+            else:
+                results.append((query.encode(), None))
+        return results
+
+
+class time_chunking_tester(unittest.TestCase):
+    def test_chunk_ranges(self):
+        """Testing the split of periods into consecutive ranges."""
+        self.assertEqual(chunk_ranges("1950-01", "1951-06", 6),
+                         [("1950-01-01", "1950-06-30"), ("1950-07-01", "1950-12-31"), ("1951-01-01", "1951-06-01")])
+        self.assertEqual(chunk_ranges("1950-01-15", "1950-03-02", 1),
+                         [("1950-01-15", "1950-01-31"), ("1950-02-01", "1950-02-28"), ("1950-03-01", "1950-03-02")])
+        self.assertEqual(chunk_ranges("2000-02-01", "2015-06-01", 10, "Y"),
+                         [("2000-02-01", "2009-12-31"), ("2010-01-01", "2015-06-01")])
+        self.assertEqual(chunk_ranges("2012-03-05", "2012-03-06", 1, "D"), [("2012-03-05", "2012-03-05"), ("2012-03-06", "2012-03-06")])
+        self.assertEqual(chunk_ranges("2012-03", "2012-03", 12), [("2012-03-01", "2012-03-01")])
+
+        #no day of the period is left out nor covered twice
+        ranges = np.array(chunk_ranges("1950-01", "2020-12", 7), dtype="datetime64[D]")
+        self.assertTrue(np.all(ranges[1:, 0] - ranges[:-1, 1] == np.timedelta64(1, "D")))
+        self.assertEqual((ranges[0, 0], ranges[-1, 1]), (np.datetime64("1950-01-01"), np.datetime64("2020-12-01")))
+
+        for start, end, steps, unit in [("2012-03", "2012-01", 1, "M"), ("2012/01", "2012-02", 1, "M"),
+                                        ("2012-01", "2012-02", 0, "M"), ("2012-01", "2012-02", 1, "W")]:
+            with self.assertRaises(ValueError):
+                chunk_ranges(start, end, steps, unit)
+        #days are finer than monthly time steps, months aren't
+        self.assertEqual(len(chunk_ranges("2012-01", "2012-12", 1, "M", 5599 / 184)), 12)
+        with self.assertRaises(ValueError):
+            chunk_ranges("2012-01", "2012-12", 10, "D", 5599 / 184)
+
+    def test_chunk_points(self):
+        """Testing the split of periods after the coverage's own time steps."""
+        months = np.arange("2000-02", "2015-07", dtype="datetime64[M]").astype("datetime64[D]")
+        self.assertEqual(chunk_points("2000-02", "2000-12", months, 6),
+                         [("2000-02-01", "2000-07-31"), ("2000-08-01", "2000-12-01")])
+        #every chunk holds steps_per_chunk time steps, the last one the remaining ones
+        ranges = np.array(chunk_points("2000-02-15", "2015-06-01", months, 7), dtype="datetime64[D]")
+        self.assertTrue(np.all(ranges[1:, 0] - ranges[:-1, 1] == np.timedelta64(1, "D")))
+        counts = [np.count_nonzero((months >= start) & (months <= end)) for start, end in ranges]
+        self.assertEqual((set(counts[:-1]), sum(counts)), ({7}, 184))
+        self.assertEqual(chunk_points("2000-02-10", "2000-02-20", months, 1), [("2000-02-10", "2000-02-20")])
+        for start, end, steps in [("2012-03", "2012-01", 1), ("2012-01", "2012-02", 0)]:
+            with self.assertRaises(ValueError):
+                chunk_points(start, end, months, steps)
+
+    def test_steps_for_budget(self):
+        """Testing the number of time steps a byte budget holds."""
+        self.assertEqual(steps_for_budget(1000, 300), 3)
+        self.assertEqual(steps_for_budget(100, 300), 1)
+        for max_bytes, bytes_per_step in [(0, 10), (10, None), (True, 10)]:
+            with self.assertRaises(ValueError):
+                steps_for_budget(max_bytes, bytes_per_step)
+
+    def test_execute_chunks(self):
+        """Testing that only the failing chunks are sent again."""
+        dbc = stand_in_dbc({"b": 2, "c": 1})
+        self.assertEqual(execute_chunks(dbc, ["a", "b", "c"]), [b"a", b"b", b"c"])
+        self.assertEqual(dbc.batches, [["a", "b", "c"], ["b", "c"], ["b"]])
+        with self.assertRaisesRegex(Exception, "bad response for b"):
+            execute_chunks(stand_in_dbc({"b": 3}), ["a", "b"], retries=2)
+        self.assertEqual(execute_chunks(dbc, []), [])
+
+    def test_stitch(self):
+        """Testing the join of the chunks' csv responses along the time axis."""
+        stitched = stitch([b"{{1,2},{3,4}},{{5,6},{7,8}}", b"{{9,10},{11,12}}"])
+        np.testing.assert_array_equal(stitched, np.arange(1, 13).reshape(3, 2, 2))
+        np.testing.assert_array_equal(stitch([b"1,2", b"3"]), [1, 2, 3])
+        np.testing.assert_array_equal(stitch([b"{1,2},{3,4}", b"{5},{6}"], time_axis=1), [[1, 2, 5], [3, 4, 6]])
+        for responses in [[b"{1,2},{3}"], [b"{1,2}", b"{3,4,5}"]]:
+            with self.assertRaises(ValueError):
+                stitch(responses)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+import pickle
 import unittest
+from datetime import date
 from src.type_request import type_request
 
 
@@ -149,6 +151,46 @@ class dbc_tester(unittest.TestCase):
         elif dummy_2 > dummy_1 or dummy_2 >= dummy_1:
             pass
 
+    def test_type_request_parsed_bounds(self):
+        """Testing the bounds parsed once at initialization."""
+        coverage = type_request("AvgLandTemp", "ReferenceableGridCoverage", ["-180 -90", "180 90"],
+                                ['"2000-02-01T00:00:00.000Z" -90 -180', '"2015-06-01T00:00:00.000Z" 90 180'],
+                                ["axisList", "ansi,Lat,Long"])
+        self.assertEqual(coverage.extracted_bounds_dict["coord_1"], ["-90", "90", "Lat"])
+        self.assertEqual(coverage.parsed_bounds_dict, {"date": (date(2000, 2, 1), date(2015, 6, 1)),
+                                                       "coord_1": (-90.0, 90.0),
+                                                       "coord_2": (-180.0, 180.0)})
+
+        coverage = type_request("Broken", bounds_2=["a 0", "b 1"], additionalParameters=["axisList", "Lat,z"])
+        self.assertEqual(coverage.extracted_bounds_dict["coord_1"], ["a", "b", "Lat"])
+        self.assertEqual(coverage.parsed_bounds_dict, {"z": (0.0, 1.0)})
+
+        with self.assertRaises(AttributeError):
+            coverage.unknown_attribute = 1
+        copy = pickle.loads(pickle.dumps(coverage))
+        self.assertEqual(copy.parsed_bounds_dict, coverage.parsed_bounds_dict)
+        self.assertEqual(copy.extracted_bounds_dict, {"coord_1": ["a", "b", "Lat"], "z": ["0", "1", "z"]})
+        #the extracted bounds are stored once, and stay assignable
+        coverage.extracted_bounds_dict["t"] = ["0", "1", "t"]
+        self.assertEqual(coverage.extracted_bounds_dict["t"], ["0", "1", "t"])
+        coverage.extracted_bounds_dict = {}
+        self.assertEqual(coverage.extracted_bounds_dict, {})
+        self.assertEqual(type_request("Odd", additionalParameters=["axisList"]).extracted_bounds_dict, {})
+
+    def test_type_request_sort_key(self):
+        """Testing the ordering of type_request objects by their sort key."""
+        coverages = [type_request("bb", "b"), type_request("a", "b"), type_request("zz", "a"), type_request("c", "b")]
+        self.assertEqual([coverage.id for coverage in sorted(coverages)], ["zz", "a", "c", "bb"])
+        self.assertEqual(sorted(coverages), sorted(coverages, key=lambda coverage: coverage.sort_key))
+        #setting the attributes the sort key is made of updates it
+        coverages[0].id = "zzz"
+        self.assertEqual(coverages[0].sort_key, ("b", 3, "zzz"))
+        coverages[0].coverageType = "a"
+        self.assertEqual(coverages[0].sort_key, ("a", 3, "zzz"))
+        self.assertEqual([coverage.id for coverage in sorted(coverages)], ["zz", "zzz", "a", "c"])
+        with self.assertRaises(AttributeError):
+            coverages[0].sort_key = ("z", 1, "z")
+
 
 if __name__ == '__main__':
     unittest.main()